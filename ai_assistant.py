@@ -4,15 +4,6 @@ import time
 import datetime
 import re
 
-try:
-    import noisereduce as nr
-except ImportError:
-    nr = None
-    print("Warning: noisereduce not installed or failed to import. ANC disabled.")
-except Exception as e:
-    nr = None
-    print(f"Warning: noisereduce import error: {e}")
-
 try:
     import pyautogui
 except ImportError:
@@ -26,22 +17,34 @@ except ImportError:
     psutil = None
 
 import numpy as np
-import io
 import speech_recognition as sr
 import pyttsx3
 import datetime
 import asyncio
-import edge_tts
 import pygame
 import asyncio
-import edge_tts
 import pygame
-import requests
 import json
 import dateparser
 from duckduckgo_search import DDGS
 import shutil
 import glob
+from urllib.parse import quote
+from speech_text import normalize_speech_text
+from speech_stream import SpeechChunker, SentenceSegmenter
+from latency_trace import LatencyTracer, format_summary
+from intent_router import IntentRouter, COMMAND_INTENTS
+from command_executor import CommandExecutor
+from system_monitor import SystemMonitor
+from http_cache import HTTPClient
+from answer_cache import AnswerCache, is_standalone
+from llm_session import ChatSession
+from conversation_memory import ConversationMemory
+from voice_activity import UtteranceCapture
+from audio_sources import open_audio_source, ReplayFinished
+from echo_cancel import EchoReference
+from wake_word import WakeWordDetector
+from stt_backends import create_stt_backend
 try:
     import vision_utils
 except:
@@ -53,11 +56,9 @@ except:
 # engine = pyttsx3.init()
 
 # --- Memory ---
-conversation_history = [] # List of (User, Bot) tuples
-MAX_HISTORY = 5
-MAX_HISTORY = 5
 REMINDERS_FILE = "reminders.json"
 SETTINGS_FILE = "settings.json"
+ANSWER_CACHE_FILE = "answer_cache.json"
 
 # Voice Configuration
 VOICE_MAP = {
@@ -73,7 +74,28 @@ VOICE_MAP = {
 current_settings = {
     "voice": VOICE_MAP["1"]["id"],
     "voice_list": VOICE_MAP, # Save this so user can see it in JSON
-    "require_wake_word": True # Default to True if missing
+    "require_wake_word": True, # Default to True if missing
+    "tts_cache_mb": 64, # Disk budget for cached speech clips (0 disables)
+    "tts_max_inflight": 3, # Sentences synthesized concurrently
+    "tts_deadline_ms": 1500, # Time-to-first-audio before the offline voice races edge-tts
+    "tts_local_fallback": True, # Use pyttsx3 when edge-tts is slow or unreachable
+    "tts_speculative": True, # Start synthesizing clauses before the sentence ends
+    "latency_trace": True, # Append per-turn stage timings to latency_traces.jsonl
+    "noise_suppression": True, # Streaming spectral gating of the microphone
+    "echo_cancellation": True, # Cancel the assistant's own voice using the playback signal
+    "wake_word_gate": True, # Skip STT for speech outside the conversation window unless the wake word is heard
+    "stt_backend": "auto", # "google", "vosk" or "auto" (Vosk when its model is installed)
+    "command_workers": 2, # Commands handled at the same time (listening continues meanwhile)
+    "system_sample_interval": 1.0, # Seconds between CPU/RAM/battery samples (status command and HUD)
+    "http_timeout_s": 6.0, # Read timeout for web lookups (weather, IP, location...)
+    "llm_model": "llama3.2", # Ollama model for conversation
+    "ollama_host": "http://localhost:11434",
+    "llm_keep_alive": "30m", # How long Ollama keeps the model (and its prompt cache) loaded
+    "answer_cache": True, # Reuse answers to repeated or near-identical questions (chat, Wikipedia, search)
+    "llm_speculative": True, # Start the LLM reply while the command is still being routed
+    "memory_token_budget": 1200, # Conversation history kept in the prompt; older turns are summarized
+    "audio_source": "microphone", # Or a WAV file / folder of WAVs to replay instead of the mic
+    "vosk_model_path": "models/vosk-model-small-en-us"
 }
 
 def load_settings():
@@ -97,6 +119,9 @@ def save_settings():
 
 # Load settings on startup
 load_settings()
+
+# Per-turn stage timestamps (mic -> STT -> router -> LLM -> TTS -> speaker)
+latency_tracer = LatencyTracer(enabled=current_settings.get("latency_trace", True))
 # --------------
 
 # Initialize mixer once for speed
@@ -145,6 +170,11 @@ async def broadcast_avatar_message(message_type, data=None):
         # We need to schedule this on the avatar_loop
         websockets.broadcast(connected_clients, message)
 
+async def broadcast_avatar_binary(payload):
+    """Sends a packed binary frame (e.g. a lip sync envelope) to all clients."""
+    if connected_clients:
+        websockets.broadcast(connected_clients, payload)
+
 def avatar_server_worker():
     import face_tracker # Import here to avoid circularity if any
 
@@ -189,101 +219,245 @@ def update_emotion(new_emotion):
 # ... (Previous imports exist above, we are just ensuring we have what we need)
 
 # --- TTS Threading Setup ---
+from tts_cache import TTSCache
+from audio_stream import AudioRingBuffer, mp3_tail
+from audio_playback import PlaybackEngine, pack_envelope
+from visemes import build_timeline
+from tts_backends import EdgeTTSBackend, LocalTTSBackend, TieredSynthesizer
+tts_cache = TTSCache(max_disk_mb=current_settings.get("tts_cache_mb", 64))
+
+# Neural voice first; the offline voice joins the race if it misses the deadline
+tts_backends = [EdgeTTSBackend()]
+if current_settings.get("tts_local_fallback", True):
+    tts_backends.append(LocalTTSBackend())
+tts_synthesizer = TieredSynthesizer(tts_backends, deadline_ms=current_settings.get("tts_deadline_ms", 1500))
+
 tts_text_queue = queue.Queue() # Text chunks waiting for generation
 tts_audio_queue = queue.Queue() # Audio blobs waiting for playback
 shutdown_event = threading.Event()
 playback_generation_id = 0 # Counter to invalidate stale audio on stop
 
 def tts_generator_worker():
-    """Background worker 1: CONVERTS Text -> Audio."""
+    """
+    Background worker 1: CONVERTS Text -> Audio.
+    Runs one persistent event loop. Up to `tts_max_inflight` sentences are
+    synthesized concurrently, but clips are handed to the player in the
+    order they were queued.
+    """
     print("TTS Generator Started")
     
-    async def _generate_audio(text, voice):
-        communicate = edge_tts.Communicate(text, voice)
-        audio_data = b""
-        async for chunk in communicate.stream():
-            if chunk["type"] == "audio":
-                audio_data += chunk["data"]
-        return audio_data
-
-    while not shutdown_event.is_set():
+    async def _synthesize(text, gen_id, stream):
         try:
-            # Block until text is available
-            item = tts_text_queue.get(timeout=1)
-            text = item["text"]
-            gen_id = item["id"]
-            
-            # Helper to check if we should abort generation
+            # Skip work that was invalidated while waiting in the queue
             if gen_id != playback_generation_id:
-                tts_text_queue.task_done()
-                continue
+                return
             
             # Get current voice preference
             voice = current_settings.get("voice", VOICE_MAP["1"]["id"])
             
-            # Generate Audio
+            # Generate Audio (repeated phrases come straight from the cache)
+            audio_bytes = tts_cache.get(voice, text)
+            if audio_bytes is None:
+                backend, audio_bytes = await tts_synthesizer.synthesize(text, voice, stream)
+                if backend.cacheable:
+                    tts_cache.put(voice, text, audio_bytes, stream.boundaries)
+            else:
+                stream.boundaries.extend(tts_cache.get_boundaries(voice, text))
+                stream.write(audio_bytes)
+            stream.close()
+        except BaseException as e:
+            stream.close(error=e)
+            raise
+
+    async def _run():
+        loop = asyncio.get_running_loop()
+        max_inflight = max(1, int(current_settings.get("tts_max_inflight", 3)))
+        slots = asyncio.Semaphore(max_inflight) # Bounds synthesized-but-unplayed clips
+        pending = asyncio.Queue() # (item, stream, task) in speaking order
+
+        def _next_text():
             try:
-                audio_bytes = asyncio.run(_generate_audio(text, voice))
-                if audio_bytes and gen_id == playback_generation_id:
-                    tts_audio_queue.put({"audio": audio_bytes, "id": gen_id})
-            except Exception as e:
-                print(f"TTS Gen Error: {e}")
-            
-            tts_text_queue.task_done()
-            
-        except queue.Empty:
-            continue
+                return tts_text_queue.get(timeout=1)
+            except queue.Empty:
+                return None
+
+        async def producer():
+            while not shutdown_event.is_set():
+                await slots.acquire()
+                # Block (off-loop) until text is available
+                item = await loop.run_in_executor(None, _next_text)
+                if item is None:
+                    slots.release()
+                    continue
+                stream = AudioRingBuffer()
+                task = asyncio.ensure_future(_synthesize(item["text"], item["id"], stream))
+                await pending.put((item, stream, task))
+
+        async def consumer():
+            while True:
+                item, stream, task = await pending.get()
+                gen_id = item["id"]
+                try:
+                    if gen_id != playback_generation_id:
+                        task.cancel()
+                    else:
+                        # Head of the line: the player starts draining while we synthesize
+                        tts_audio_queue.put({"stream": stream, "id": gen_id, "trace": item.get("trace")})
+                    await task
+                except asyncio.CancelledError:
+                    if not task.cancelled():
+                        raise
+                except Exception as e:
+                    print(f"TTS Gen Error: {e}")
+                finally:
+                    slots.release()
+                    tts_text_queue.task_done()
+
+        consumer_task = asyncio.ensure_future(consumer())
+        try:
+            await producer()
+        finally:
+            consumer_task.cancel()
+
+    while not shutdown_event.is_set():
+        try:
+            # One loop for the lifetime of the worker (re-created only after a crash)
+            asyncio.run(_run())
         except Exception as e:
             print(f"TTS Generator Error: {e}")
+            time.sleep(1)
+
+TTS_CHANNEL_ID = 0 # Mixer channel reserved for speech
+MP3_OVERLAP_FRAMES = 2 # Frames re-decoded in front of each segment (bit reservoir)
+ENVELOPE_FRAME_RATE = 60 # Lip sync loudness frames per second
+
+clip_visemes = {} # clip_id -> {"stream", "t0", "sent"} for lip sync
+clip_visemes_lock = threading.Lock()
+clip_traces = {} # clip_id -> latency trace of the turn that produced it
+
+def _send_visemes(clip_id):
+    """Sends the clip's viseme timeline if it has boundaries the avatar hasn't seen."""
+    with clip_visemes_lock:
+        state = clip_visemes.get(clip_id)
+        if not state or state["t0"] is None:
+            return
+        boundaries = state["stream"].boundaries[:]
+        if len(boundaries) <= state["sent"]:
+            return
+        state["sent"] = len(boundaries)
+        t0 = state["t0"]
+    
+    timeline = build_timeline(boundaries)
+    if avatar_loop and timeline["t"]:
+        data = {"clip": clip_id, "t0": t0, "t": timeline["t"], "v": timeline["v"]}
+        asyncio.run_coroutine_threadsafe(broadcast_avatar_message("visemes", data), avatar_loop)
+
+def _on_playback_event(kind, clip_id, timestamp):
+    """Forwards engine events to the avatar, stamped with the real sample time."""
+    if kind == "start":
+        latency_tracer.mark(clip_traces.pop(clip_id, None), "first_audio", latency_tracer.from_wall(timestamp))
+        with clip_visemes_lock:
+            if clip_id in clip_visemes:
+                clip_visemes[clip_id]["t0"] = timestamp
+        # Timeline first so the client has it when the mouth starts moving
+        _send_visemes(clip_id)
+    else:
+        with clip_visemes_lock:
+            clip_visemes.pop(clip_id, None)
+    
+    if avatar_loop:
+        message = "speak_start" if kind == "start" else "speak_stop"
+        asyncio.run_coroutine_threadsafe(broadcast_avatar_message(message, {"t": timestamp, "clip": clip_id}), avatar_loop)
+
+playback_engine = PlaybackEngine(channel_id=TTS_CHANNEL_ID, on_event=_on_playback_event)
+
+def is_assistant_speaking():
+    """True while speech audio is audible."""
+    return playback_engine.is_busy()
+
+def get_voice_stats():
+    """Prints per-backend TTS latency histograms and returns a spoken summary."""
+    stats = tts_synthesizer.stats()
+    parts = []
+    for name, b in stats["backends"].items():
+        print(f"TTS [{name}] wins={b['wins']} failures={b['failures']} "
+              f"p50<={b['p50_ms']}ms p95<={b['p95_ms']}ms "
+              f"({b['first_byte']['censored']} cut short before audio)")
+        for bucket, count in b["first_byte"]["buckets"].items():
+            if count:
+                print(f"    {bucket:>10}: {'#' * min(count, 50)} {count}")
+        parts.append(f"{name} voice won {b['wins']} times and failed {b['failures']}")
+    cache = tts_cache.stats()
+    return (f"Speech failed over {stats['failovers']} times. " + ". ".join(parts) +
+            f". The speech cache hit rate is {cache['hit_rate'] * 100:.0f} percent.")
 
 def tts_player_worker():
-    """Background worker 2: PLAYS Audio -> Speaker."""
+    """
+    Background worker 2: DECODES Audio -> PCM for the playback engine.
+    Drains whole MP3 frames from the generator's stream while synthesis is
+    still running, so the next clip is decoded while the current one plays.
+    """
     print("TTS Player Started")
+    clip_counter = 0
     
     while not shutdown_event.is_set():
         try:
             item = tts_audio_queue.get(timeout=1)
-            audio_bytes = item["audio"]
+            stream = item["stream"]
             gen_id = item["id"]
+            trace = item.get("trace")
             
             # Discard stale audio from before a stop
             if gen_id != playback_generation_id:
                 tts_audio_queue.task_done()
                 continue
                 
+            clip_counter += 1
+            submitted = False
+            if trace is not None:
+                clip_traces[clip_counter] = trace
+            with clip_visemes_lock:
+                clip_visemes[clip_counter] = {"stream": stream, "t0": None, "sent": 0}
             try:
-                if audio_bytes:
-                    if not pygame.mixer.get_init():
-                         pygame.mixer.init()
-                         
-                    audio_buffer = io.BytesIO(audio_bytes)
-                    pygame.mixer.music.load(audio_buffer)
+                overlap, overlap_frames = b"", 0
+                clip_samples = 0 # Position of the next segment within the clip
+                
+                while gen_id == playback_generation_id:
+                    data, frames = stream.read_frames(timeout=0.05)
+                    if not frames:
+                        if stream.finished():
+                            break
+                        continue
                     
-                    # Notify Avatar: START
-                    # We need to run async function from sync thread.
-                    if avatar_loop:
-                        print("DEBUG: Broadcasting speak_start")
-                        asyncio.run_coroutine_threadsafe(broadcast_avatar_message("speak_start"), avatar_loop)
-                    else:
-                        print("DEBUG: Avatar loop NOT READY for speak_start")
+                    if not submitted:
+                        latency_tracer.mark(trace, "tts_first_byte", stream.first_write_at)
+                    trim = overlap_frames * stream.samples_per_frame if overlap_frames else 0
+                    sound, samples, pcm = playback_engine.decode(overlap + data, trim, stream.sample_rate)
+                    overlap, overlap_frames = mp3_tail(data, MP3_OVERLAP_FRAMES)
                     
-                    pygame.mixer.music.play()
+                    # Loudness for lip sync, computed once per decoded segment
+                    # (a cached clip arrives in one piece, so that is one frame per clip)
+                    if avatar_loop and connected_clients:
+                        levels = playback_engine.envelope(pcm, ENVELOPE_FRAME_RATE)
+                        offset_ms = clip_samples * 1000 / playback_engine.freq
+                        payload = pack_envelope(clip_counter, offset_ms, ENVELOPE_FRAME_RATE, levels)
+                        asyncio.run_coroutine_threadsafe(broadcast_avatar_binary(payload), avatar_loop)
                     
-                    # BLOCKING WAIT (while verifying not stopped)
-                    while pygame.mixer.music.get_busy():
-                        if gen_id != playback_generation_id:
-                            pygame.mixer.music.stop()
-                            break
-                        time.sleep(0.05)
-                        
-                    # Notify Avatar: STOP
-                    if avatar_loop:
-                        print("DEBUG: Broadcasting speak_stop")
-                        asyncio.run_coroutine_threadsafe(broadcast_avatar_message("speak_stop"), avatar_loop)
+                    playback_engine.submit(sound, samples, clip_counter, gen_id)
+                    clip_samples += samples
+                    submitted = True
                         
             except Exception as e:
                 print(f"Playback Error: {e}")
-                
+            
+            if submitted:
+                # Boundaries that arrived after playback began go out as an update
+                _send_visemes(clip_counter)
+                playback_engine.end_clip(clip_counter)
+            else:
+                with clip_visemes_lock:
+                    clip_visemes.pop(clip_counter, None)
+                clip_traces.pop(clip_counter, None)
             tts_audio_queue.task_done()
             
         except queue.Empty:
@@ -309,15 +483,25 @@ def stop_speaking():
     with tts_audio_queue.mutex:
         tts_audio_queue.queue.clear()
     
-    # 3. Stop actual audio
-    if pygame.mixer.get_init() and pygame.mixer.music.get_busy():
-        pygame.mixer.music.stop()
+    # 3. Stop actual audio (the engine wakes instantly, no poll interval)
+    playback_engine.stop(playback_generation_id)
+    with clip_visemes_lock:
+        clip_visemes.clear()
+    clip_traces.clear()
 
 def speak(text):
     """
     Non-blocking speak function. Pushes text to the background worker.
+    Inside a command handler the executor decides when (and whether) it is
+    spoken, so replies come out in the order the commands were given.
     """
     if not text: return
+    if command_executor.speech(text):
+        return
+    _queue_speech(text)
+
+def _queue_speech(text, trace=None):
+    """Preprocess one piece of speech and hand it to the TTS workers."""
     print(f"Assistant: {text}")
     
     # --- Emotion Adaptation (Speech) ---
@@ -330,31 +514,9 @@ def speak(text):
              text = "I understand. " + text
 
     # --- Action Mapping for Cuteness (Preprocessing) ---
-    replacements = {
-        r'[\(\*]+(laughs|laughter|laughing|chuckles|giggles|rofl|lol)[\)\*]+': ' Haha! ',
-        r'[\(\*]+(sighs|sighing)[\)\*]+': ' hh... ',
-        r'[\(\*]+(clears throat|ahem)[\)\*]+': ' mm-hm ',
-        r'[\(\*]+(gasps|gasp)[\)\*]+': ' oh! ',
-        r'[\(\*]+(yawn|yawns)[\)\*]+': ' yawn... ',
-        r'[\(\*]+(cries|sobs|sniffles)[\)\*]+': ' snff... ',
-        r'[\(\*]+(hums|humming)[\)\*]+': ' hmm hmm ',
-        r'[\(\*]+(screams|shouts)[\)\*]+': ' ah! ',
-        r'[\(\*]+(smirk|smirks|smirking)[\)\*]+': ' heh. ',
-        r'[\(\*]+(blushes|shy|acting shy)[\)\*]+': ' um... ',
-        r'[\(\*]+(pauses|thinking|thinks)[\)\*]+': ' hmm... ',
-        r'[\(\*]+(winks|nods|shrugs|smiles|frowns|looks|points|waves|stares|leans|bounces|beams)[\)\*]+': '', # Silent actions
-    }
-
-    for pattern, replacement in replacements.items():
-        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
-
-    # Clean up "..." which sounds bad in TTS
-    text = re.sub(r'(\.\.\.|…)', ' ', text)
-    
-    # Final cleanup of any remaining bracketed text
-    text = re.sub(r'\s*[\(\*][^\)\*]+[\)\*]\s*', ' ', text)
+    # *laughs* -> "Haha!", silent actions and asides dropped, "..." removed
+    text = normalize_speech_text(text)
     
-    text = text.strip()
     if text:
         # Notify Avatar: Start Speaking
         # We can't await here easily as we are in main thread logic potentially.
@@ -367,8 +529,28 @@ def speak(text):
         # Let's modify the PLAYER worker instead?
         # Yes, let's do that. See below modifications to tts_player_worker.
         
-        # Push with current ID
-        tts_text_queue.put({"text": text, "id": playback_generation_id})
+        # Push with current ID (and the turn's trace so the player can time first audio)
+        if trace is None:
+            trace = latency_tracer.current
+        latency_tracer.mark(trace, "tts_queued")
+        tts_text_queue.put({"text": text, "id": playback_generation_id, "trace": trace})
+
+# Seconds a command may run before it is abandoned (its later speech is dropped)
+COMMAND_TIMEOUTS = {
+    "knowledge": 10, "search_web": 15, "current_events": 15, "weather": 8,
+    "my_ip": 6, "location": 6, "system_status": 5, "vision_hand": 10, "see": 15,
+    "chat": 60,
+}
+
+# Commands run off the listening thread; replies are spoken in the order they were asked
+command_executor = CommandExecutor(emit=_queue_speech,
+                                   workers=current_settings.get("command_workers", 2),
+                                   timeouts=COMMAND_TIMEOUTS)
+
+def _current_trace():
+    """Latency trace of the command running on this thread (or of the latest utterance)."""
+    job = command_executor.current_job()
+    return job.trace if job else latency_tracer.current
 # (Rest of the file unchanged until process_command/chat)
 
 # ... (Previous imports and setup)
@@ -520,23 +702,44 @@ def system_control(command):
         pyautogui.press("volumemute")
         speak("System muted.")
 
+# Background CPU/RAM/battery sampler shared by the status command and the HUD
+system_monitor = SystemMonitor(interval=current_settings.get("system_sample_interval", 1.0))
+system_monitor.start()
+
 def get_system_status():
-    if not psutil:
+    sample = system_monitor.latest()
+    if sample is None:
         return "I cannot check system status."
     
-    cpu = psutil.cpu_percent(interval=1)
-    memory = psutil.virtual_memory().percent
-    battery = psutil.sensors_battery()
-    
-    status = f"CPU usage is at {cpu} percent. Memory usage is at {memory} percent."
-    if battery:
-        status += f" Battery is at {battery.percent} percent."
-        if battery.power_plugged:
+    cpu = system_monitor.average("cpu", seconds=5) # Smoother than one reading
+    status = f"CPU usage is at {cpu:.0f} percent. Memory usage is at {sample['memory']:.0f} percent."
+    if sample["battery"] is not None:
+        status += f" Battery is at {sample['battery']:.0f} percent."
+        if sample["plugged"]:
              status += " and charging."
+        else:
+            drain = system_monitor.trend("battery", seconds=300) # Percent per minute
+            if drain is not None and drain < -0.05:
+                status += f" About {sample['battery'] / -drain:.0f} minutes left."
     return status
 
+# Pooled session + TTL cache for every web lookup (location/IP for hours, weather for minutes)
+http_client = HTTPClient(timeout=(3.05, current_settings.get("http_timeout_s", 6.0)))
+# Persistent semantic cache of chat, Wikipedia and search answers
+answer_cache = AnswerCache(path=ANSWER_CACHE_FILE)
+
+def _cached_answer(namespace, query):
+    """Answer to `query` from the answer cache (marked on the latency trace), or None."""
+    if not current_settings.get("answer_cache", True):
+        return None
+    answer, similarity = answer_cache.lookup(namespace, query)
+    if answer is not None:
+        latency_tracer.annotate(_current_trace(), cache="hit", cache_namespace=namespace,
+                                cache_similarity=round(similarity, 3))
+    return answer
+
 def get_weather(city=""):
-    # If no city provided, try to guess from IP
+    # If no city provided, try to guess from IP (cached, so this is usually free)
     if not city:
         loc_str = get_location() # "City, Region, Country"
         if loc_str:
@@ -544,12 +747,15 @@ def get_weather(city=""):
         else:
             return "I need to know which city to check for."
             
-    try:
+    def fetch():
         # Using wttr.in for simple text based weather
-        url = f"https://wttr.in/{city}?format=%C+%t"
-        response = requests.get(url)
-        if response.status_code == 200:
-            return f"The weather in {city} is {response.text.strip()}"
+        response = http_client.get(f"https://wttr.in/{city}?format=%C+%t")
+        return response.text.strip() if response.status_code == 200 else None
+        
+    try:
+        conditions = http_client.cached("weather", city, fetch)
+        if conditions:
+            return f"The weather in {city} is {conditions}"
         else:
              return "I couldn't fetch the weather."
     except:
@@ -558,53 +764,104 @@ def get_weather(city=""):
 def get_public_ip():
     """Fetches the public IP address of the network."""
     try:
-        response = requests.get('https://api.ipify.org?format=json')
-        if response.status_code == 200:
-            return response.json()['ip']
-        else:
-            return None
+        return http_client.cached("ip", "", lambda: http_client.get_json('https://api.ipify.org?format=json')['ip'])
     except Exception as e:
         print(f"IP Error: {e}")
         return None
 
-def search_web(query):
-    """Searches the web using DuckDuckGo and returns a summary."""
-    try:
-        with DDGS() as ddgs:
+def search_web(query, namespace="search"):
+    """
+    Searches the web using DuckDuckGo and returns a summary.
+    Results are cached per normalized query (`namespace` picks the lifetime, e.g. "news").
+    """
+    def fetch():
+        with DDGS(timeout=current_settings.get("http_timeout_s", 6.0)) as ddgs:
             results = list(ddgs.text(query, max_results=2))
-            if results:
-                # Combine snippets from top 2 results
-                summary = f"Here is what I found. {results[0]['body']} Also, {results[1]['body']}"
-                # Remove "..." or "…" from end of snippets to prevent "dot dot dot" reading
-                summary = re.sub(r'(\.\.\.|…)$', '.', summary)
-                summary = re.sub(r'(\.\.\.|…)\s', '. ', summary)
-                return summary
-            else:
-                return "I couldn't find any information on that."
+        if not results:
+            return None
+        # Combine snippets from top 2 results
+        summary = f"Here is what I found. {results[0]['body']}"
+        if len(results) > 1:
+            summary += f" Also, {results[1]['body']}"
+        # Remove "..." or "…" from end of snippets to prevent "dot dot dot" reading
+        summary = re.sub(r'(\.\.\.|…)$', '.', summary)
+        summary = re.sub(r'(\.\.\.|…)\s', '. ', summary)
+        return summary
+        
+    cached = _cached_answer(namespace, query)
+    if cached:
+        return cached
+    try:
+        summary = http_client.cached(namespace, query, fetch)
+        answer_cache.put(namespace, query, summary)
+        return summary or "I couldn't find any information on that."
     except Exception as e:
         print(f"Search Error: {e}")
         return "I am having trouble connecting to the internet search."
 
 def get_location():
     """Fetches the current approximate location based on IP address."""
-    try:
-        response = requests.get('http://ip-api.com/json/')
-        if response.status_code == 200:
-            data = response.json()
-            if data['status'] == 'success':
-                city = data.get('city')
-                region = data.get('regionName')
-                country = data.get('country')
-                location_parts = [p for p in [city, region, country] if p]
-                return ", ".join(location_parts)
-            else:
-                return None
-        else:
+    def fetch():
+        data = http_client.get_json('http://ip-api.com/json/')
+        if data['status'] != 'success':
             return None
+        city = data.get('city')
+        region = data.get('regionName')
+        country = data.get('country')
+        location_parts = [p for p in [city, region, country] if p]
+        return ", ".join(location_parts)
+        
+    try:
+        return http_client.cached("location", "", fetch)
     except Exception as e:
         print(f"Location Error: {e}")
         return None
 
+WIKI_API = "https://en.wikipedia.org"
+# Wikimedia asks API clients to identify themselves
+WIKI_HEADERS = {"User-Agent": "Jarvis-Assistant/1.0 (voice assistant)"}
+
+def _fetch_wiki_summary(query, sentences=2):
+    """
+    First sentences of the best matching Wikipedia article, over the pooled session
+
+    Raises:
+        wikipedia.exceptions.PageError: Nothing matches `query`
+        wikipedia.exceptions.DisambiguationError: The match is a disambiguation page
+    """
+    # Resolve the title the way wikipedia.summary() did (search, best hit)
+    found = http_client.get_json(f"{WIKI_API}/w/api.php",
+                                 params={"action": "opensearch", "search": query, "limit": 1,
+                                         "namespace": 0, "format": "json"}, headers=WIKI_HEADERS)
+    if len(found) < 2 or not found[1]:
+        raise wikipedia.exceptions.PageError(None, query)
+    title = found[1][0]
+
+    response = http_client.get(f"{WIKI_API}/api/rest_v1/page/summary/{quote(title.replace(' ', '_'), safe='')}",
+                               headers=WIKI_HEADERS)
+    if response.status_code == 404:
+        raise wikipedia.exceptions.PageError(None, title)
+    response.raise_for_status()
+    page = response.json()
+    if page.get("type") == "disambiguation":
+        raise wikipedia.exceptions.DisambiguationError(title, [])
+    extract = page.get("extract", "").strip()
+    if not extract:
+        raise wikipedia.exceptions.PageError(None, title)
+
+    segmenter = SentenceSegmenter()
+    parts = list(segmenter.feed(extract)) + [segmenter.flush()]
+    return " ".join([p.strip() for p in parts if p.strip()][:sentences])
+
+def wiki_summary(query):
+    """Two-sentence Wikipedia summary, cached per normalized query (lookup errors propagate)."""
+    cached = _cached_answer("wiki", query)
+    if cached:
+        return cached
+    summary = http_client.cached("wiki", query, lambda: _fetch_wiki_summary(query))
+    answer_cache.put("wiki", query, summary)
+    return summary
+
 def set_reminder(command):
     """Sets a reminder based on the command."""
     # Example: "remind me to call mom tomorrow at 10 AM"
@@ -735,25 +992,50 @@ def check_reminders():
         with open(REMINDERS_FILE, "w") as f:
             json.dump(reminders_to_keep, f, indent=4)
 
-def listen_loop(status_callback, command_callback):
+MIC_SAMPLE_RATE = 16000 # Plenty for speech and keeps the per-frame DSP cheap
+
+# On-device wake word spotting ahead of STT (needs templates: python wake_word.py enroll)
+wake_detector = None
+if current_settings.get("wake_word_gate", True):
+    wake_detector = WakeWordDetector(MIC_SAMPLE_RATE)
+    if wake_detector.enabled:
+        print(f"Wake word gate: {len(wake_detector.templates)} templates")
+    else:
+        print("Wake word gate off: record templates with 'python wake_word.py enroll'")
+
+def _in_conversation_window():
+    """Same 60 s window as process_command (active if it hasn't run yet)."""
+    return time.time() - globals().get("last_interaction_time", time.time()) < 60
+
+def listen_loop(status_callback, command_callback, partial_callback=None):
     """
     Continously listens to the microphone and triggers callbacks.
     Keeps the microphone open to reduce latency.
     Auto-reconnects if stream is closed.
+    With a streaming recognizer, partial_callback (default: process_partial)
+    receives hypotheses while the user is still talking.
     """
+    global last_interaction_time
     reconnect_delay = 1
+    if partial_callback is None:
+        partial_callback = process_partial
+    stt = create_stt_backend(current_settings.get("stt_backend", "auto"),
+                             current_settings.get("vosk_model_path", "models/vosk-model-small-en-us"))
+    print(f"Speech recognition: {stt.name}")
     
     while True: # Outer loop for connection persistence
         try:
-            r = sr.Recognizer()
-            r.pause_threshold = 2.0 
-            r.energy_threshold = 300
-            r.dynamic_energy_threshold = True # Enable dynamic adjustment for better accuracy
             
             status_callback("Adjusting noise...")
-            with sr.Microphone() as source:
-                # Adjust for ambient noise (longer sample for better accuracy)
-                r.adjust_for_ambient_noise(source, duration=2.0)
+            with open_audio_source(current_settings.get("audio_source", "microphone"), MIC_SAMPLE_RATE) as source:
+                # Frame-level VAD: endpoints on an adaptive hangover instead of a 2 s pause.
+                # Echo of our own voice is cancelled and noise gated frame by frame during capture.
+                echo_reference = None
+                if current_settings.get("echo_cancellation", True):
+                    echo_reference = EchoReference(playback_engine, source.SAMPLE_RATE)
+                capture = UtteranceCapture(source, denoise=current_settings.get("noise_suppression", True),
+                                           echo_reference=echo_reference)
+                capture.calibrate(duration=1.0)
                 
                 status_callback("Listening...")
                 print("Microphone initialized. Starting loop...")
@@ -761,54 +1043,83 @@ def listen_loop(status_callback, command_callback):
                 while True: # Inner loop for processing
                     try:
                          # --- Barge-in Logic ---
-                        # If assistant is speaking, we still want to listen, but with higher threshold
-                        is_speaking = False
-                        if pygame.mixer.get_init():
-                            try:
-                                is_speaking = pygame.mixer.music.get_busy()
-                            except:
-                                pass
-                        
-                        if is_speaking:
-                             r.dynamic_energy_threshold = False  # Don't adapt to own voice
-                             r.energy_threshold = 400            # Moderately high (enough to ignore quiet PC fans, low enough to detect user speaking over bot)
-                             # Note: If this is too low, she will interrupt herself. If too high, she ignores you.
+                        # If assistant is speaking, we still want to listen (her echo is cancelled)
+                        if is_assistant_speaking():
                              status_callback("Listening (Barge-in)...")
                         else:
-                             r.dynamic_energy_threshold = True   # Adapt to ambient noise when silent
-                             r.energy_threshold = 300            # Normal sensitivity
                              status_callback("Listening...")
                         
-                        # Capture audio (Timeout removed for long sentences)
-                        audio = r.listen(source, timeout=None, phrase_time_limit=None)
+                        # Capture one utterance (returns as soon as the endpoint is confident).
+                        # While she talks the VAD freezes its noise floor, and until the echo
+                        # canceller has converged it demands louder, longer onsets.
+                        # Note: If this is too low, she will interrupt herself.
+                        session = stt.start(source.SAMPLE_RATE)
+                        
+                        def on_frame(data):
+                            partial = session.accept(data)
+                            if partial:
+                                partial_callback(partial)
+                        
+                        audio = capture.listen(is_speaking=is_assistant_speaking,
+                                               on_frame=on_frame if stt.streaming else None)
+                        trace = latency_tracer.begin(speech_end=capture.speech_end)
+                        latency_tracer.mark(trace, "captured")
                     
                         # If we caught audio while speaking, STOP SPEAKING IMMEDIATELY
-                        if is_speaking:
+                        if capture.barge_in:
                              print("Barge-in detected! Stopping speech.")
                              stop_speaking()
+                             command_executor.cancel_all()
+                             llm_session.cancel_speculation()
+                        
+                        # --- Wake Word Gate ---
+                        # Outside the conversation window only speech that contains the
+                        # wake word goes to the recognizer
+                        if wake_detector and wake_detector.enabled and not _in_conversation_window():
+                            samples = np.frombuffer(audio.get_raw_data(), dtype=np.int16)
+                            if not wake_detector.detect(samples):
+                                latency_tracer.annotate(trace, wake="rejected")
+                                continue
+                            # Heard acoustically: open the window so process_command accepts
+                            # it even if STT misspells the name
+                            last_interaction_time = time.time()
+                            latency_tracer.annotate(trace, wake="detected")
                              
-                        # --- Noise Reduction Step ---
-                        if nr: # Only if import succeeded
-                            try:
-                                audio_data = np.frombuffer(audio.get_raw_data(), dtype=np.int16)
-                                reduced_noise_data = nr.reduce_noise(y=audio_data, sr=audio.sample_rate, stationary=True)
-                                audio = sr.AudioData(reduced_noise_data.tobytes(), audio.sample_rate, audio.sample_width)
-                            except Exception as nr_error:
-                                # Fail silently on NR error to keep loop going
-                                pass
-                        # ----------------------------
-
                         status_callback("Processing...")
-                        text = r.recognize_google(audio)
+                        text = session.finish(audio)
+                        latency_tracer.mark(trace, "stt_done")
+                        latency_tracer.annotate(trace, stt=stt.name)
                         print(f"You said: {text}")
                         
                         # Callback with command
-                        result = command_callback(text.lower())
-                        
-                        if result == "exit":
-                            status_callback("Idle")
-                            return # Exit the function completely
+                        command = text.lower()
+                        # Same wake word / conversation window gate as process_command, so an
+                        # overheard "stop" can't cancel anything
+                        heard, clean_command = _strip_command(command)
+                        addressed = heard or _in_conversation_window()
+                        route = command_router.route(clean_command)
+                        if addressed and route.intent in ("exit", "stop"):
+                            # Instant, and they decide the fate of everything still running
+                            command_executor.cancel_all()
+                            llm_session.cancel_speculation()
+                            result = command_callback(command)
+                            if result == "exit":
+                                status_callback("Idle")
+                                return # Exit the function completely
+                        else:
+                            if addressed and route.intent == "chat" and current_settings.get("llm_speculative", True):
+                                # Likely conversation: the reply starts generating while
+                                # the command waits for a worker and goes through routing
+                                _speculate_chat(command, trace)
+                            # Slow handlers run on the pool; capture continues meanwhile
+                            job = command_executor.submit(command_callback, command,
+                                                          intent=route.intent, trace=trace)
+                            if job is None:
+                                # Dropped (too busy): don't leave its reply generating
+                                llm_session.cancel_speculation()
                         
+                    except ReplayFinished:
+                        raise # End of a recorded source: handled below
                     except sr.WaitTimeoutError:
                         pass # Just keep listening
                     except sr.UnknownValueError:
@@ -827,6 +1138,10 @@ def listen_loop(status_callback, command_callback):
                              print("Restarting audio stream...")
                              break
                         
+        except ReplayFinished:
+            print("Audio replay finished.")
+            status_callback("Idle")
+            return
         except Exception as e:
             print(f"CRITICAL ERROR in listen_loop connection: {e}")
             status_callback("retrying...")
@@ -844,6 +1159,87 @@ except ImportError:
     wikipedia = None
     print("Warning: wikipedia not installed. Knowledge disabled.")
 
+# Spellings the recognizer produces for "Jarvis"
+WAKE_WORDS = ["jarvis", "javis", "travis", "mavis", "davis"]
+VISION_CUES = ["in my hand", "in hand", "holding", "what is this", "what's this",
+               "what objects", "list objects", "what do you see", "look at this", "identify"]
+
+command_router = IntentRouter(COMMAND_INTENTS)
+
+def _strip_command(command):
+    """
+    Wake word and filler handling shared by process_command and the speculative LLM start
+
+    Returns:
+        tuple: (wake word heard, command without the wake word and conversational filler)
+    """
+    heard = False
+    clean_command = command
+    for w in WAKE_WORDS:
+        if w in command:
+            heard = True
+            # Remove wake word to clean command
+            clean_command = command.replace(w, "").replace("hey", "").strip()
+            break
+
+    # Remove conversational filler prefix
+    for clean_start in ["can you", "please", "could you", "would you", "hey", "jarvis", "zeta"]:
+        if clean_command.startswith(clean_start):
+            clean_command = clean_command.replace(clean_start, "").strip()
+    return heard, clean_command
+
+def _speculate_chat(command, trace):
+    """
+    Start the LLM on what chat() is going to receive, as soon as the transcript is in.
+    process_command cancels it if the command turns out not to be a chat turn.
+    """
+    heard, text = _strip_command(command)
+    if not text or not (heard or _in_conversation_window()):
+        return
+    if command_router.route(text).intent != "chat":
+        return
+    if llm_session.speculate(text):
+        latency_tracer.mark(trace, "llm_start")
+        latency_tracer.annotate(trace, llm_speculative=True)
+
+vision_prefetch_lock = threading.Lock()
+last_vision_prefetch = 0.0
+
+def _prefetch_vision():
+    """Loads YOLO and runs it once on the current frame so the real query hits a warm model."""
+    try:
+        from yolo_detector import get_detector
+        import shared_state
+        detector = get_detector()
+        if shared_state.latest_frame is not None:
+            detector.detect_objects(shared_state.latest_frame)
+    except Exception as e:
+        print(f"Vision Prefetch Error: {e}")
+    finally:
+        vision_prefetch_lock.release()
+
+def process_partial(partial):
+    """
+    Routing work that can start on a partial transcript while the user is
+    still talking: the wake-word check and vision warm-up.
+    """
+    global last_vision_prefetch
+    command = partial.lower()
+    
+    explicit_wake = any(w in command for w in WAKE_WORDS)
+    if not (explicit_wake or _in_conversation_window()):
+        return
+    
+    # Being addressed by name while talking: go quiet now rather than at the endpoint
+    if explicit_wake and is_assistant_speaking():
+        print("Wake word heard over speech. Stopping speech.")
+        stop_speaking()
+    
+    if any(cue in command for cue in VISION_CUES) and time.time() - last_vision_prefetch > 2.0:
+        if vision_prefetch_lock.acquire(blocking=False):
+            last_vision_prefetch = time.time()
+            threading.Thread(target=_prefetch_vision, daemon=True, name="Vision_Prefetch").start()
+
 def process_command(command):
     """
     Processes the command and performs actions.
@@ -862,12 +1258,6 @@ def process_command(command):
         # User requested "already triggered".
         last_interaction_time = time.time()
 
-    wake_word_detected = False
-    clean_command = command
-    
-    # Check for various spellings of "Jarvis"
-    wake_words = ["jarvis", "javis", "travis", "mavis", "davis"] 
-    
     # Logic:
     # 1. If explicit wake word is used -> Allowed.
     # 2. If valid interaction happened recently (< 5 mins) -> Allowed (Conversation Mode).
@@ -878,12 +1268,7 @@ def process_command(command):
     is_active_mode = (current_time - last_interaction_time < 60)
     
     # 1. Explicit Wake Word Check (Always works)
-    for w in wake_words:
-        if w in command:
-            wake_word_detected = True
-            # Remove wake word to clean command
-            clean_command = command.replace(w, "").replace("hey", "").strip()
-            break
+    wake_word_detected, clean_command = _strip_command(command)
             
     # 2. Auto-Active Check (Smart Wake)
     # If we are in the 60s window, we don't need the wake word
@@ -894,6 +1279,7 @@ def process_command(command):
     if not wake_word_detected:
          # Debug print to help user understand why it's ignored
          # print(f"Ignored (No 'Jarvis' detected and timeout passed): {command}")
+         llm_session.cancel_speculation()
          return "continue"
          # No need to clean command in conversation mode
          
@@ -908,26 +1294,28 @@ def process_command(command):
     
     command = clean_command
     # -----------------------
-    
-    # --- 0. Clean Command ---
-    # Remove conversational filler prefix
-    for clean_start in ["can you", "please", "could you", "would you", "hey", "jarvis", "zeta"]:
-        if command.startswith(clean_start):
-            command = command.replace(clean_start, "").strip()
+
+    # --- Intent Routing ---
+    # One pass over the command against every trigger phrase (see intent_router.py)
+    route = command_router.route(command)
+    intent = route.intent
+    if intent != "chat" or not command:
+        # Not a conversational turn after all: stop the reply listen_loop started early
+        llm_session.cancel_speculation()
 
     # --- 1. System Commands ---
-    if any(k in command for k in ["exit", "quit", "shutdown", "terminate", "code 999", "999"]):
+    if intent == "exit":
         speak("Goodbye!")
         return "exit"
     
-    if "stop" in command:
+    if intent == "stop":
         # User just wanted to barge-in/silence. 
         # Speech already stopped by listen_loop.
         # Just ack or do nothing.
         return "continue"
 
     # --- 1.5 Emotion-Based Music & Actions ---
-    if "play music" in command or "play songs" in command:
+    if intent == "play_music":
         if current_emotion == "sad":
              speak("I see you are feeling down. Playing something to match your mood.")
              webbrowser.open("https://www.youtube.com/watch?v=hLQl3WQQoQ0") # Sad song (Adele - Someone Like You example)
@@ -937,62 +1325,51 @@ def process_command(command):
         return "continue"
         
     # --- 2. Dynamic App Opening ---
-    if "open" in command:
-        # Split by "open" and take the last part
-        # e.g. "can you open notepad" -> ["can you ", " notepad"]
-        parts = command.split("open")
-        if len(parts) > 1:
-            app_name = parts[-1].strip()
+    if intent == "open_app":
+        # Slot is whatever follows the last "open" ("can you open notepad" -> "notepad");
+        # the router skips this intent when nothing follows ("HIV is open")
+        app_name = route.slot
+        speak(f"Opening {app_name}")
+        if open_app:
+            try:
+                open_app(app_name, match_closest=True, output=False) 
+            except:
+                webbrowser.open(f"https://www.google.com/search?q={app_name}")
         else:
-            app_name = command.replace("open", "").strip()
-            
-        if app_name and len(app_name) > 1: # Avoid "HIV is open" -> ""
-            speak(f"Opening {app_name}")
-            if open_app:
-                try:
-                    open_app(app_name, match_closest=True, output=False) 
-                except:
-                    webbrowser.open(f"https://www.google.com/search?q={app_name}")
-            else:
-                speak("I cannot open apps right now.")
-            return "continue" # Return only if we actually tried to open something
+            speak("I cannot open apps right now.")
+        return "continue"
 
     # --- 3. Knowledge / Wikipedia ---
-    if "who is" in command or "what is" in command or "tell me about" in command:
-        # Exclude vision-related queries
-        vision_keywords = ["in my hand", "this", "in front", "holding", "see"]
-        if any(keyword in command for keyword in vision_keywords):
-            # Skip to next command handler (will be caught by YOLO commands below)
-            pass
-        else:
-            query = command.replace("who is", "").replace("what is", "").replace("tell me about", "").strip()
-            if wikipedia and query:
-                try:
-                    speak(f"Searching for {query}...")
-                    results = wikipedia.summary(query, sentences=2)
-                    speak(results)
-                except wikipedia.exceptions.DisambiguationError:
-                    speak("There are multiple results for that. Be more specific.")
-                except wikipedia.exceptions.PageError:
-                    speak("I couldn't find anything on that.")
-                except Exception as e:
-                    # speak("Something went wrong with the search.")
-                    pass
-            return "continue"
+    # (Vision phrasings like "what is this" are excluded by the router and go to the YOLO commands)
+    if intent == "knowledge":
+        query = route.slot
+        if wikipedia and query:
+            try:
+                speak(f"Searching for {query}...")
+                results = wiki_summary(query)
+                speak(results)
+            except wikipedia.exceptions.DisambiguationError:
+                speak("There are multiple results for that. Be more specific.")
+            except wikipedia.exceptions.PageError:
+                speak("I couldn't find anything on that.")
+            except Exception as e:
+                # speak("Something went wrong with the search.")
+                pass
+        return "continue"
 
     # --- 4. Basic Time/Date ---
-    if "time" in command:
+    if intent == "time":
         now = datetime.datetime.now().strftime("%I:%M %p")
         speak(f"The time is {now}")
         return "continue"
-    elif "date" in command:
+    elif intent == "date":
         today = datetime.datetime.now().strftime("%B %d, %Y")
         speak(f"Today's date is {today}")
         return "continue"
     
     # --- 5. Web Search (Explicit) ---
     # --- 5. Web Search & Data Retrieval ---
-    if "my ip" in command or "my internet address" in command:
+    if intent == "my_ip":
         ip = get_public_ip()
         if ip:
             speak(f"Your public IP address is {ip}")
@@ -1000,8 +1377,8 @@ def process_command(command):
             speak("I couldn't enable your IP address retrieval.")
         return "continue"
 
-    if "search web for" in command or "search online for" in command:
-        query = command.replace("search web for", "").replace("search online for", "").strip()
+    if intent == "search_web":
+        query = route.slot
         
         # Clean specific conversational filler from query (Garbage In/Garbage Out fix)
         # e.g. "search web for i want you to find ranking of..." -> "ranking of..."
@@ -1017,34 +1394,32 @@ def process_command(command):
         speak(summary)
         return "continue"
 
-    if "current events" in command:
+    if intent == "current_events":
         speak("Checking the latest news...")
-        summary = search_web("latest current events news world")
+        summary = search_web("latest current events news world", namespace="news")
         speak(summary)
         return "continue"
 
     # Legacy Google Search (Only if explicitly asked to 'google' or 'open google')
-    if "google" in command:
-        query = command.replace("google", "").replace("search", "").replace("for", "").strip()
+    if intent == "google":
+        query = route.slot
         speak(f"Opening Google for {query}")
         webbrowser.open(f"https://www.google.com/search?q={query}")
         return "continue"
     
     # --- 6. Location & Reminders ---
-    if "organize" in command and "downloads" in command:
+    if intent == "organize_downloads":
         organize_files()
         return "continue"
     
-    if "clean" in command and "temp" in command:
+    if intent == "clean_temp":
         clean_temp_files()
         return "continue"
 
     
-    # --- YOLO Vision Commands (MUST come before web search) ---
-    # Check for "in my hand" or "in hand" FIRST (most specific)
-    if ("in my hand" in command or "in hand" in command or 
-        "what am i holding" in command or "what's in my hand" in command or
-        ("what is" in command and "this" in command)):
+    # --- YOLO Vision Commands ---
+    # "In my hand" / "what is this" outrank knowledge in the intent table
+    if intent == "vision_hand":
         try:
             from yolo_detector import get_detector
             import shared_state
@@ -1071,7 +1446,7 @@ def process_command(command):
             speak("I'm having trouble with my vision right now.")
         return "continue"
     
-    if "what objects" in command or "list objects" in command:
+    if intent == "list_objects":
         try:
             from yolo_detector import get_detector
             import shared_state
@@ -1094,11 +1469,11 @@ def process_command(command):
             speak("I'm having trouble with my vision right now.")
         return "continue"
     
-    if "what do you see" in command or "look at this" in command or "identify" in command:
+    if intent == "see":
         see_environment()
         return "continue"
     
-    if "where am i" in command or "my location" in command:
+    if intent == "location":
         loc = get_location()
         if loc:
             speak(f"You are currently in {loc}")
@@ -1106,31 +1481,55 @@ def process_command(command):
             speak("I couldn't determine your location.")
         return "continue"
 
-    if "weather" in command:
-        # Extract city if possible e.g. "weather in London"
-        city = ""
-        if "in" in command:
-            city = command.split("in")[-1].strip()
-        
-        speak(get_weather(city))
+    if intent == "weather":
+        # City is whatever follows "in", e.g. "weather in London" (empty = current location)
+        speak(get_weather(route.slot))
+        return "continue"
+
+    if intent == "latency_report":
+        summary = latency_tracer.summary()
+        print(format_summary(summary))
+        if wake_detector and wake_detector.enabled:
+            print(f"Wake word spotting: {wake_detector.cpu_per_audio_second():.2f} ms CPU per second of audio")
+        llm_stats = llm_session.stats()
+        if llm_stats:
+            print(f"LLM (median of {llm_stats['turns']} turns): {llm_stats['prompt_tokens']} prompt tokens "
+                  f"evaluated in {llm_stats['prompt_ms']} ms, first token after {llm_stats['ttft_ms']} ms, "
+                  f"{llm_stats['tokens_per_s']} tokens/s")
+            print(f"Conversation memory: {conversation_memory.prompt_tokens()} of "
+                  f"{conversation_memory.budget} history tokens, {conversation_memory.folds} summaries folded")
+        cache_stats = answer_cache.stats
+        print(f"Answer cache: {len(answer_cache)} answers, {cache_stats['exact']} exact and "
+              f"{cache_stats['similar']} similar hits, {cache_stats['miss']} misses")
+        first_audio = summary["stages"]["first_audio"]
+        if first_audio["count"]:
+            speak(f"Over the last {first_audio['count']} replies, time to first audio was "
+                  f"{first_audio['p50'] / 1000:.1f} seconds typically and "
+                  f"{first_audio['p95'] / 1000:.1f} seconds at the 95th percentile.")
+        else:
+            speak("I haven't timed any replies yet.")
+        return "continue"
+
+    if intent == "voice_stats":
+        speak(get_voice_stats())
         return "continue"
 
-    if "system status" in command or "cpu" in command or "battery" in command:
+    if intent == "system_status":
         speak(get_system_status())
         return "continue"
 
-    if "screenshot" in command or "volume" in command or "mute" in command:
+    if intent == "system_control":
         system_control(command)
         return "continue"
 
-    if "remind me" in command or "set a reminder" in command:
+    if intent == "reminder":
         set_reminder(command)
         return "continue"
 
     # --- 7. Context / Memory Queries ---
-    if "what did i say" in command or "repeat me" in command:
-        if conversation_history:
-            last_user_text = conversation_history[-1][0]
+    if intent == "memory":
+        last_user_text = conversation_memory.last_user_text()
+        if last_user_text:
             speak(f"You just said: {last_user_text}")
         else:
             speak("I don't remember you saying anything before this.")
@@ -1140,7 +1539,7 @@ def process_command(command):
 
     # --- 8. Voice Switching ---
     # --- 8. Voice Switching ---
-    if "change voice" in command or "switch voice" in command or "set voice" in command:
+    if intent == "change_voice":
         import re
         
         # Unified regex to find "voice" followed eventually by a number or number-word
@@ -1194,94 +1593,87 @@ def process_command(command):
         speak("Yes? I am listening.")
     return "continue"
 
-try:
-    import ollama
-except ImportError:
-    ollama = None
-    print("Warning: ollama python lib not installed. Intelligence limited.")
+SYSTEM_PROMPT = ('You are Jarvis, a helpful, witty, and slightly flirty AI assistant. You are NOT a robot. You are a "cute real human girl" personality. In EVERY response, you MUST use human emotions. Start sentences with fillers like "Hmm...", "Well...", "Oh!". Use action markers frequently: *laughs*, *giggles*, *sighs*, *clears throat*, *hums*. Be expressive and dynamic.')
+
+# Persistent Ollama session: model kept loaded, system prompt prefilled, history append-only
+# so each turn only evaluates its new tokens. The memory keeps history under a token budget
+# and has the model summarize evicted turns in the background.
+conversation_memory = ConversationMemory(budget_tokens=current_settings.get("memory_token_budget", 1200))
+llm_session = ChatSession(model=current_settings.get("llm_model", "llama3.2"),
+                          system_prompt=SYSTEM_PROMPT,
+                          host=current_settings.get("ollama_host", "http://localhost:11434"),
+                          keep_alive=current_settings.get("llm_keep_alive", "30m"),
+                          memory=conversation_memory)
+conversation_memory.summarizer = llm_session.summarize
+llm_session.warm()
 
 def chat(text):
     """
     Advanced conversational capability using Ollama (Llama 3.2).
     Uses STREAMING for faster response times.
     """
-    global conversation_history
+    full_response = ""
+    # Sentences (and, in speculative mode, stable clause prefixes) go to TTS as they form.
+    # Angry mode rewrites each spoken piece, so it keeps whole sentences.
+    speculative = current_settings.get("tts_speculative", True) and current_emotion != "angry"
+    chunker = SpeechChunker(speculative=speculative)
     
-    if not ollama:
-        speak("I cannot think right now because my brain library is missing.")
+    trace = _current_trace()
+
+    # Questions that don't depend on the conversation so far can be answered from the cache
+    standalone = is_standalone(text)
+    cached = _cached_answer("chat", text) if standalone else None
+    if cached:
+        llm_session.cancel_speculation()
+        for piece in chunker.feed(cached):
+            speak(piece)
+        rest = chunker.flush()
+        if rest:
+            speak(rest)
+        llm_session.commit(text, cached)
         return
 
-    # Construct prompt from history
-    messages = []
-    # Add system personality
-    messages.append({
-        'role': 'system', 
-        'content': 'You are Jarvis, a helpful, witty, and slightly flirty AI assistant. You are NOT a robot. You are a "cute real human girl" personality. In EVERY response, you MUST use human emotions. Start sentences with fillers like "Hmm...", "Well...", "Oh!". Use action markers frequently: *laughs*, *giggles*, *sighs*, *clears throat*, *hums*. Be expressive and dynamic.'
-    })
-    
-    # Add history
-    for user_text, bot_text in conversation_history:
-        messages.append({'role': 'user', 'content': user_text})
-        messages.append({'role': 'assistant', 'content': bot_text})
-        
-    # Add current input
-    messages.append({'role': 'user', 'content': text})
-    
-    full_response = ""
-    buffer = ""
-    
     try:
         print("Thinking (Streaming)...")
+        latency_tracer.mark(trace, "llm_start")
         # Generate response WITH STREAMING
-        stream = ollama.chat(model='llama3.2', messages=messages, stream=True)
-        
-        for chunk in stream:
-            content = chunk['message']['content']
+        cancelled = False
+        reply_stream = llm_session.stream(text)
+        for content in reply_stream:
+            if command_executor.is_cancelled():
+                print("Reply cancelled.")
+                cancelled = True
+                reply_stream.close()  # Stops generation
+                break
+            if not full_response:
+                latency_tracer.mark(trace, "llm_first_token")
             full_response += content
-            buffer += content
             
-            # Use punctuation to identify sentence breaks for smoother speech
-            # Split by . ! ? or newline
-            if any(punct in buffer for punct in [". ", "? ", "! ", ".\n", "?\n", "!\n"]):
-                # Find the split point
-                import re
-                # Split but keep the delimiter
-                parts = re.split(r'([.?!]\s+)', buffer)
-                
-                # If we have a complete sentence part
-                if len(parts) > 1:
-                     # part[0] is text, part[1] is delimiter, part[2] is remainder
-                    candidate = parts[0] + parts[1]
-                    
-                    # Optimization: Don't speak very short fragments alone unless end of stream
-                    # e.g. "Oh! " might be too short and start/stop feels choppy.
-                    # Combine if short.
-                    MIN_LENGTH = 20
-                    if len(candidate) < MIN_LENGTH and len(parts[2]) > 0:
-                        # Too short, keep in buffer? 
-                        # Actually, keeping it in buffer is simple: just don't split yet.
-                        # But parts[2] is remainder.
-                        # We must reconstruct buffer to be candidate + remainder and wait for more?
-                        # No, simpler logic:
-                        # Only split if the accumulated sentence is substantial OR it's a strong delimiter.
-                        pass # For now, let's just emit. The Dual Thread pipeline handles gaps well.
-                    
-                    speak(candidate) # Send to queue immediately
-                    
-                    # Keep remainder in buffer
-                    buffer = "".join(parts[2:])
+            for piece in chunker.feed(content):
+                speak(piece) # Send to queue immediately
 
         # Speak any remaining text in buffer
-        if buffer.strip():
-            speak(buffer)
+        rest = chunker.flush()
+        if rest:
+            speak(rest)
         
-        # Update history
-        conversation_history.append((text, full_response))
-        if len(conversation_history) > MAX_HISTORY:
-            conversation_history.pop(0)
+        # Update history (the memory summarizes old turns once it is over budget).
+        # Only replies the model finished are kept; one cut off by barge-in is dropped, and
+        # one whose playback was interrupted is kept but not cached (the user didn't hear it all)
+        stats = llm_session.last_stats
+        if cancelled or stats is None:
+            llm_session.discard()
+        else:
+            llm_session.commit(text, full_response)
+            if standalone and not command_executor.is_cancelled():
+                answer_cache.put("chat", text, full_response)
+        if stats:
+            latency_tracer.annotate(trace, prompt_tokens=stats["prompt_tokens"], prompt_ms=stats["prompt_ms"],
+                                    gen_tokens=stats["gen_tokens"], llm_head_start_ms=stats["head_start_ms"])
             
     except Exception as e:
         print(f"Ollama Error: {e}")
+        llm_session.discard()
         # Fallback to simple chat if AI brain is dead
         print("Falling back to simple chat...")
         from ai_assistant import chat as simple_chat
@@ -0,0 +1,297 @@
+"""
+Answer Cache for Jarvis AI Assistant
+Remembers answers to questions users keep asking ("how are you", "who is X",
+"tell me about Y") across LLM chat, Wikipedia and web search, so a repeat or
+near-duplicate comes back in milliseconds instead of another model run or
+network round trip. Queries are normalized into an exact key (lowercase,
+contractions expanded, fillers dropped); Wikipedia and search answers are
+only ever reused on that exact key. Chat questions may also match a cached
+question worded slightly differently: a hashed word + character-trigram
+embedding finds the most similar one (NumPy dot product over all entries),
+and it only counts if the similarity is very high and both questions have
+exactly the same content words, so "who is george washington" never gets
+the answer about George Washington Carver. Entries expire per namespace,
+the least recently used are evicted, and the store is saved to disk in the
+background.
+
+Run this module directly for a demo:
+
+    python answer_cache.py
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from http_cache import normalize_query
+
+# namespace -> seconds an answer stays valid (namespaces not listed are never cached)
+DEFAULT_TTLS = {
+    "chat": 7 * 24 * 3600,
+    "wiki": 30 * 24 * 3600,
+    "search": 24 * 3600,
+}
+
+# Namespaces where a differently worded question may reuse an answer (others need the exact key)
+FUZZY_NAMESPACES = {"chat"}
+
+# Words that never change what is being asked
+FILLERS = {"jarvis", "hey", "please", "um", "uh", "so", "okay", "ok", "now", "just"}
+
+# Words that may differ between two questions with the same answer; everything else
+# (including question words and numbers) must match exactly
+STOPWORDS = {"a", "an", "the", "is", "are", "was", "were", "am", "be", "do", "does", "did",
+             "of", "in", "on", "at", "to", "for", "about", "me", "tell", "can", "could",
+             "would", "will", "some", "any", "and", "with"}
+
+# Questions that lean on earlier turns; their answers depend on the conversation
+CONTEXT_WORDS = {"it", "that", "this", "those", "these", "he", "she", "they", "him", "her",
+                 "them", "his", "its", "their", "more", "again", "else", "why", "also",
+                 "i", "my", "we", "our"}
+
+_CONTRACTIONS = [(re.compile(r"\b(who|what|where|when|how|that|it|there)'s\b"), r"\1 is"),
+                 (re.compile(r"'re\b"), " are"), (re.compile(r"'m\b"), " am"), (re.compile(r"n't\b"), " not")]
+
+
+def cache_text(text):
+    """Normalized query without fillers (the exact cache key)."""
+    text = (text or "").lower().replace("\u2019", "'")
+    for pattern, replacement in _CONTRACTIONS:
+        text = pattern.sub(replacement, text)
+    return " ".join(w for w in normalize_query(text).split() if w not in FILLERS)
+
+
+def is_standalone(text):
+    """True if `text` can be answered without the conversation so far."""
+    return not any(w in CONTEXT_WORDS for w in normalize_query(text).split())
+
+
+def content_words(text):
+    """Words of a cache_text() that decide what is being asked."""
+    return frozenset(w for w in text.split() if w not in STOPWORDS)
+
+
+def embed(text, dim=512):
+    """L2-normalized hashed bag of words and character trigrams (stable across runs)."""
+    vector = np.zeros(dim, dtype=np.float32)
+    words = text.split()
+    padded = f" {text} "
+    features = [("w", w) for w in words] + [("c", padded[i:i + 3]) for i in range(len(padded) - 2)]
+    for kind, feature in features:
+        h = zlib.crc32(f"{kind}:{feature}".encode())
+        vector[h % dim] += (2.0 if kind == "w" else 1.0) * (1 if h & 0x80000000 else -1)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class AnswerCache:
+    def __init__(self, path="answer_cache.json", threshold=0.95, max_entries=2000, ttls=None,
+                 dim=512, save_delay=2.0):
+        """
+        Initialize the cache (loads `path` if it exists)
+
+        Args:
+            path: JSON file the entries persist to (None keeps them in memory only)
+            threshold: Cosine similarity a differently worded chat question needs
+                       (its content words must match as well)
+            max_entries: Least recently used entries beyond this are evicted
+            ttls: namespace -> seconds, merged over DEFAULT_TTLS
+            dim: Embedding size
+            save_delay: Seconds writes are batched before saving
+        """
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.dim = dim
+        self.save_delay = save_delay
+
+        self.entries = OrderedDict()  # slot -> entry dict, least recently used first
+        self.keys = {}  # (namespace, cache_text) -> slot
+        self.vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self.namespaces = np.full(max_entries, -1, dtype=np.int16)  # -1 = free slot
+        self.namespace_ids = {}
+        self.free = list(range(max_entries - 1, -1, -1))
+
+        self.lock = threading.Lock()
+        self.save_timer = None
+        self.stats = {"exact": 0, "similar": 0, "miss": 0}
+        self.load()
+
+    def lookup(self, namespace, query):
+        """
+        Find a cached answer for `query`
+
+        Returns:
+            tuple: (answer, similarity); (None, best similarity) on a miss.
+                   Similarity is 1.0 for an exact (normalized) match.
+        """
+        if namespace not in self.ttls:
+            return None, 0.0
+        text = cache_text(query)
+        now = time.time()
+        with self.lock:
+            slot = self.keys.get((namespace, text))
+            if slot is not None and self._alive(slot, now):
+                self.entries.move_to_end(slot)
+                self.stats["exact"] += 1
+                return self.entries[slot]["answer"], 1.0
+
+            ns = self.namespace_ids.get(namespace)
+            if namespace not in FUZZY_NAMESPACES or ns is None or not self.entries:
+                self.stats["miss"] += 1
+                return None, 0.0
+            vector = embed(text, self.dim)
+            scores = self.vectors @ vector
+            scores[self.namespaces != ns] = -1.0
+
+            words = content_words(text)
+            top = np.argpartition(scores, -3)[-3:] if len(scores) > 3 else np.arange(len(scores))
+            for slot in top[np.argsort(scores[top])[::-1]]:
+                similarity = float(scores[slot])
+                if similarity < self.threshold:
+                    break
+                slot = int(slot)
+                entry = self.entries[slot]
+                # Similar wording isn't enough: "a joke about bats" must not get the cats joke,
+                # "what is 5 plus 4" must not get the answer to 5 plus 3
+                if content_words(entry["query"]) != words or not self._alive(slot, now):
+                    continue
+                self.entries.move_to_end(slot)
+                self.stats["similar"] += 1
+                return entry["answer"], similarity
+            self.stats["miss"] += 1
+            return None, float(max(scores.max(), 0.0))
+
+    def _alive(self, slot, now):
+        """False (and the entry removed) if it has expired (lock held)."""
+        entry = self.entries[slot]
+        if now - entry["time"] < self.ttls.get(entry["namespace"], 0):
+            return True
+        self._remove(slot)
+        return False
+
+    def put(self, namespace, query, answer):
+        """Cache `answer` for `query` (ignored for uncached namespaces and empty answers)."""
+        if namespace not in self.ttls or not answer:
+            return
+        self._insert({"namespace": namespace, "query": cache_text(query), "answer": answer, "time": time.time()})
+        self._save_later()
+
+    def _insert(self, entry):
+        key = (entry["namespace"], entry["query"])
+        vector = embed(entry["query"], self.dim)
+        with self.lock:
+            if key in self.keys:
+                self._remove(self.keys[key])
+            if not self.free:
+                self._remove(next(iter(self.entries)))  # Least recently used
+            slot = self.free.pop()
+            ns = self.namespace_ids.setdefault(entry["namespace"], len(self.namespace_ids))
+            self.vectors[slot] = vector
+            self.namespaces[slot] = ns
+            self.entries[slot] = entry
+            self.keys[key] = slot
+
+    def _remove(self, slot):
+        """Free a slot (lock held)."""
+        entry = self.entries.pop(slot)
+        self.keys.pop((entry["namespace"], entry["query"]), None)
+        self.namespaces[slot] = -1
+        self.vectors[slot] = 0.0
+        self.free.append(slot)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        with self.lock:
+            for slot in list(self.entries):
+                self._remove(slot)
+        self._save_later()
+
+    def _save_later(self):
+        if not self.path:
+            return
+        with self.lock:
+            if self.save_timer is not None:
+                return
+            self.save_timer = threading.Timer(self.save_delay, self.save)
+            self.save_timer.daemon = True
+            self.save_timer.start()
+
+    def save(self):
+        """Write all live entries to `path` (atomically)."""
+        if not self.path:
+            return
+        with self.lock:
+            self.save_timer = None
+            entries = list(self.entries.values())  # LRU order, so the load keeps it
+        try:
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Answer Cache Save Error: {e}")
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Answer Cache Load Error: {e}")
+            return
+        now = time.time()
+        for entry in entries[-self.max_entries:]:
+            if now - entry.get("time", 0) < self.ttls.get(entry.get("namespace"), 0):
+                self._insert(entry)
+
+
+def _demo():
+    import tempfile
+
+    path = os.path.join(tempfile.mkdtemp(), "answer_cache.json")
+    cache = AnswerCache(path=path, save_delay=0.1)
+    cache.put("wiki", "Who is Elon Musk?", "Elon Musk is a businessman...")
+    cache.put("wiki", "who is george washington carver", "George Washington Carver was a scientist...")
+    cache.put("chat", "How are you?", "Hmm... I'm doing great, thanks for asking!")
+    cache.put("chat", "What is 5 plus 3", "Well... that's 8!")
+    cache.put("chat", "tell me a joke about cats", "Why did the cat sit on the computer?...")
+    cache.put("search", "best pizza in new york", "Here is what I found...")
+
+    probes = [("wiki", "who is elon musk"), ("wiki", "Jarvis, who's Elon Musk?"),
+              ("wiki", "who is george washington"), ("chat", "how are you"), ("chat", "hey how are you jarvis"),
+              ("chat", "what is 5 plus 4"), ("chat", "tell me joke about the cats"),
+              ("chat", "tell me a joke about bats"), ("search", "best pizza in new york city")]
+    for namespace, query in probes:
+        start = time.perf_counter()
+        answer, similarity = cache.lookup(namespace, query)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"  {namespace:<6} {query!r:<32} {'HIT ' if answer else 'miss'} sim {similarity:.2f}  {elapsed:.3f} ms")
+
+    time.sleep(0.3)
+    print(f"Reloaded from disk: {len(AnswerCache(path=path))} entries")
+
+    # Lookup cost of a full cache (every fuzzy lookup scores all entries)
+    rng = np.random.default_rng(1)
+    words = "who what is the a of in how tell me about capital river planet king song movie city".split()
+    full = AnswerCache(path=None)
+    questions = [" ".join(rng.choice(words, 6)) + f" {i}" for i in range(full.max_entries)]
+    for q in questions:
+        full.put("chat", q, "answer")
+    start = time.perf_counter()
+    hits = sum(full.lookup("chat", "the " + q + "?")[0] is not None for q in questions[:200])
+    per_query = (time.perf_counter() - start) * 1000 / 200
+    print(f"  {full.max_entries} entries: {per_query:.3f} ms per lookup, {hits}/200 rewordings found")
+
+if __name__ == "__main__":
+    _demo()
@@ -0,0 +1,20 @@
+"""
+PCM Format Helpers for Jarvis AI Assistant
+Conversions between the mixer's raw sample formats and NumPy arrays. Kept
+free of pygame (NumPy only) so the capture side (echo cancellation, VAD,
+the offline voice benchmark) can use them without an audio device.
+"""
+
+import numpy as np
+
+
+def pcm_to_mono(pcm, channels, size=-16):
+    """Interleaved mixer PCM bytes -> mono float32 in [-1, 1]."""
+    if size == 32:
+        samples = np.frombuffer(pcm, dtype=np.float32)
+    elif abs(size) == 8:
+        samples = (np.frombuffer(pcm, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    else:
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+    usable = len(samples) // channels * channels
+    return samples[:usable].reshape(-1, channels).mean(axis=1)
@@ -0,0 +1,269 @@
+"""
+Gapless Playback Engine for Jarvis AI Assistant
+Schedules pre-decoded PCM segments back to back on one mixer channel.
+Completion is computed from sample counts instead of polling get_busy(),
+so the scheduler sleeps until the exact moment the next segment can be
+queued and speak_start/speak_stop carry real sample-position timestamps.
+Also computes the loudness envelope of decoded PCM for lip sync.
+"""
+
+import io
+import time
+import struct
+import threading
+from collections import deque
+
+import numpy as np
+import pygame
+
+from audio_format import pcm_to_mono
+
+# Binary envelope frame: type, version, frame rate, clip id, offset (ms), count
+ENVELOPE_HEADER = struct.Struct("<BBHIIH")
+ENVELOPE_MESSAGE_TYPE = 1
+
+
+def rms_envelope(pcm, sample_rate, channels, size=-16, frame_rate=60):
+    """
+    RMS loudness of interleaved PCM in fixed frames
+
+    Args:
+        pcm: Raw mixer bytes
+        sample_rate: Mixer frequency
+        channels: Interleaved channel count
+        size: Mixer sample size as reported by pygame.mixer.get_init()
+        frame_rate: Envelope frames per second
+
+    Returns:
+        np.ndarray: uint8 levels (0 = silence, 255 = loud speech), one per frame
+    """
+    hop = max(1, sample_rate // frame_rate)
+    mono = pcm_to_mono(pcm, channels, size)
+
+    count = -(-len(mono) // hop)  # ceil
+    if count == 0:
+        return np.zeros(0, dtype=np.uint8)
+    padded = np.zeros(count * hop, dtype=np.float32)
+    padded[:len(mono)] = mono
+    rms = np.sqrt(np.mean(padded.reshape(count, hop) ** 2, axis=1))
+
+    # Speech RMS rarely exceeds ~0.3 full scale; sqrt gives quiet syllables some motion
+    levels = np.sqrt(np.clip(rms / 0.3, 0.0, 1.0)) * 255.0
+    return levels.astype(np.uint8)
+
+
+def pack_envelope(clip_id, offset_ms, frame_rate, levels):
+    """Pack an envelope into one binary websocket frame."""
+    header = ENVELOPE_HEADER.pack(ENVELOPE_MESSAGE_TYPE, 1, frame_rate, clip_id, int(offset_ms), len(levels))
+    return header + levels.tobytes()
+
+
+class PlaybackEngine:
+    def __init__(self, channel_id=0, on_event=None):
+        """
+        Initialize the engine
+
+        Args:
+            channel_id: Mixer channel reserved for speech
+            on_event: Callback(kind, clip_id, timestamp) for "start"/"stop";
+                      timestamp is wall-clock seconds of the first/last sample
+        """
+        self.channel_id = channel_id
+        self.on_event = on_event
+
+        self.cond = threading.Condition()
+        self.pending = deque()   # [sound, samples, clip_id, gen_id] waiting for the channel
+        self.timeline = deque()  # [start, end, clip_id, sound] handed to the channel (monotonic)
+        self.clip_ends = {}      # clip_id -> True once the decoder submitted its last segment
+        self.clip_last_end = {}  # clip_id -> end time of its latest retired segment
+        self.started_clips = set()
+        self.generation = 0
+        self.last_stop = 0.0  # Monotonic time of the last stop() (audio after it never played)
+        self.channel = None
+        self.freq = None
+        self.size = None
+        self.channels = None
+        self.bytes_per_sample = None
+
+        # Monotonic -> wall clock offset for event timestamps
+        self._wall_offset = time.time() - time.monotonic()
+
+        threading.Thread(target=self._scheduler, daemon=True, name="TTS_Scheduler").start()
+
+    def _ensure_channel(self):
+        if self.channel is None:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+            pygame.mixer.set_reserved(self.channel_id + 1)
+            self.channel = pygame.mixer.Channel(self.channel_id)
+            freq, size, channels = pygame.mixer.get_init()
+            self.freq = freq
+            self.size = size
+            self.channels = channels
+            self.bytes_per_sample = abs(size) // 8 * channels
+        return self.channel
+
+    def decode(self, mp3_bytes, trim_source_samples=0, source_rate=None):
+        """
+        Decode MP3 bytes to a mixer Sound holding raw PCM
+
+        Args:
+            mp3_bytes: Whole MP3 frames
+            trim_source_samples: Leading samples (at source_rate) to drop
+            source_rate: Sample rate of the MP3 stream
+
+        Returns:
+            tuple: (Sound, sample_count at mixer rate, raw PCM bytes)
+        """
+        with self.cond:
+            self._ensure_channel()
+        pcm = pygame.mixer.Sound(file=io.BytesIO(mp3_bytes)).get_raw()
+        if trim_source_samples and source_rate:
+            trim = int(trim_source_samples * self.freq / source_rate) * self.bytes_per_sample
+            pcm = pcm[trim:]
+        return pygame.mixer.Sound(buffer=pcm), len(pcm) // self.bytes_per_sample, pcm
+
+    def envelope(self, pcm, frame_rate=60):
+        """Loudness envelope of PCM produced by decode()."""
+        return rms_envelope(pcm, self.freq, self.channels, self.size, frame_rate)
+
+    def submit(self, sound, samples, clip_id, gen_id):
+        """Append a decoded segment of `clip_id` to the play queue."""
+        with self.cond:
+            if gen_id < self.generation or not samples:
+                return
+            self.pending.append([sound, samples, clip_id, gen_id])
+            self.cond.notify_all()
+
+    def end_clip(self, clip_id):
+        """Mark that no more segments will follow for `clip_id`."""
+        with self.cond:
+            self.clip_ends[clip_id] = True
+            self.cond.notify_all()
+
+    def stop(self, generation):
+        """Stop immediately and reject segments older than `generation`."""
+        with self.cond:
+            self.generation = generation
+            self.pending.clear()
+            if self.channel is not None:
+                self.channel.stop()
+            now = time.monotonic()
+            self.last_stop = now
+            for clip_id in list(self.started_clips):
+                self._emit("stop", clip_id, now)
+            self.started_clips.clear()
+            self.timeline.clear()
+            self.clip_ends.clear()
+            self.clip_last_end.clear()
+            self.cond.notify_all()
+
+    def is_busy(self):
+        """True while any scheduled sample has not been played yet."""
+        with self.cond:
+            return bool(self.timeline) and self.timeline[-1][1] > time.monotonic()
+
+    def playing_segments(self):
+        """Snapshot of (start, end, sound) for audio on or queued to the channel (monotonic times)."""
+        with self.cond:
+            return [(start, end, sound) for start, end, _, sound in self.timeline]
+
+    def _emit(self, kind, clip_id, mono_time):
+        if self.on_event:
+            try:
+                self.on_event(kind, clip_id, mono_time + self._wall_offset)
+            except Exception as e:
+                print(f"Playback Event Error: {e}")
+
+    def _schedule(self, now):
+        """
+        Hand the next pending segment to the channel if the queue slot is free (lock held)
+
+        Returns:
+            bool: True if a segment is waiting on the mixer to release its queue slot
+        """
+        if not self.pending:
+            return False
+        channel = self._ensure_channel()
+        sound, samples, clip_id, _ = self.pending[0]
+        duration = samples / self.freq
+
+        if not self.timeline or self.timeline[-1][1] <= now:
+            # Idle (or we fell behind the network): start right away
+            channel.play(sound)
+            start = now
+        elif len(self.timeline) == 1 and channel.get_queue() is None:
+            # One segment playing, queue slot free: starts on its last sample
+            channel.queue(sound)
+            start = self.timeline[-1][1]
+        else:
+            # Either the slot is taken (retry when the head ends) or the mixer
+            # has not switched to the queued sound yet (retry shortly)
+            return len(self.timeline) == 1
+
+        self.pending.popleft()
+        self.timeline.append([start, start + duration, clip_id, sound])
+        return False
+
+    def _next_wakeup(self, now):
+        """Seconds until something on the timeline changes state."""
+        times = []
+        for start, end, clip_id, _ in self.timeline:
+            if clip_id not in self.started_clips:
+                times.append(start)
+            times.append(end)
+        future = [t - now for t in times if t > now]
+        return min(future) if future else None
+
+    def _scheduler(self):
+        while True:
+            with self.cond:
+                now = time.monotonic()
+
+                # Retire finished segments, emitting events at their sample positions
+                while self.timeline and self.timeline[0][1] <= now:
+                    start, end, clip_id, _ = self.timeline.popleft()
+                    self.clip_last_end[clip_id] = end
+                    if clip_id not in self.started_clips:
+                        self.started_clips.add(clip_id)
+                        self._emit("start", clip_id, start)
+                    still_queued = any(seg[2] == clip_id for seg in self.timeline) or \
+                        any(seg[2] == clip_id for seg in self.pending)
+                    if self.clip_ends.get(clip_id) and not still_queued:
+                        self._finish_clip(clip_id)
+
+                # Fill the channel (one playing + one queued), then announce starts
+                slot_busy = False
+                try:
+                    while self.pending and not slot_busy and len(self.timeline) < 2:
+                        before = len(self.pending)
+                        slot_busy = self._schedule(time.monotonic())
+                        if len(self.pending) == before:
+                            break
+                except Exception as e:
+                    print(f"Playback Error: {e}")
+                    self.pending.clear()
+
+                now = time.monotonic()
+                for start, _, clip_id, _ in self.timeline:
+                    if start <= now and clip_id not in self.started_clips:
+                        self.started_clips.add(clip_id)
+                        self._emit("start", clip_id, start)
+
+                # A clip whose last segment already played before end_clip() arrived
+                for clip_id in [c for c in self.clip_ends if c in self.started_clips]:
+                    if not any(seg[2] == clip_id for seg in self.timeline) and \
+                            not any(seg[2] == clip_id for seg in self.pending):
+                        self._finish_clip(clip_id)
+
+                wait = self._next_wakeup(time.monotonic())
+                if slot_busy:
+                    wait = 0.005 if wait is None else min(wait, 0.005)
+                self.cond.wait(wait)
+
+    def _finish_clip(self, clip_id):
+        """Emit "stop" at the last sample of a fully played clip (lock held)."""
+        self.clip_ends.pop(clip_id, None)
+        self.started_clips.discard(clip_id)
+        end = self.clip_last_end.pop(clip_id, time.monotonic())
+        self._emit("stop", clip_id, end)
@@ -0,0 +1,156 @@
+"""
+Audio Sources for Jarvis AI Assistant
+Everything the capture front end reads from: an object with SAMPLE_RATE,
+SAMPLE_WIDTH and a `stream` whose read(n) returns n frames of mono int16
+PCM, usable as a context manager. sr.Microphone already fits; ReplaySource
+plays recorded WAV files (or a folder of them) through the same interface,
+in real time or as fast as the pipeline can consume it, so the voice path
+can be exercised and load-tested without a microphone.
+"""
+
+import os
+import glob
+import time
+import wave
+
+import numpy as np
+
+
+class ReplayFinished(EOFError):
+    """The replay source has no audio left."""
+
+
+def _load_wav(path, rate):
+    """Mono int16 samples of a 16-bit WAV, resampled to `rate`."""
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM is supported")
+        data = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+        channels, file_rate = w.getnchannels(), w.getframerate()
+    if channels > 1:
+        data = data.reshape(-1, channels).mean(axis=1)
+    if file_rate != rate:
+        positions = np.arange(int(len(data) * rate / file_rate)) * (file_rate / rate)
+        data = np.interp(positions, np.arange(len(data)), data)
+    return np.asarray(data).astype(np.int16)
+
+
+def load_corpus(paths, rate=16000):
+    """
+    Load recordings for replay
+
+    Args:
+        paths: WAV files and/or folders of WAV files (sorted by name)
+        rate: Sample rate to convert everything to
+
+    Returns:
+        list: (path, np.int16 samples) per recording
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.wav"))))
+        else:
+            files.append(path)
+    return [(path, _load_wav(path, rate)) for path in files]
+
+
+class _ReplayStream:
+    def __init__(self, owner):
+        self.owner = owner
+
+    def read(self, frames, exception_on_overflow=False):
+        return self.owner.read(frames)
+
+
+class ReplaySource:
+    SAMPLE_WIDTH = 2
+
+    def __init__(self, clips, rate=16000, speed=0.0, gap_ms=800, lead_ms=1200, noise_level=3.0):
+        """
+        Initialize the source
+
+        Args:
+            clips: (name, np.int16 samples at `rate`) pairs, e.g. from load_corpus()
+            rate: Sample rate reported to the capture stage
+            speed: 1.0 = real time, 2.0 = twice as fast, 0 = as fast as it is read
+            gap_ms: Silence between clips (must exceed the VAD hangover)
+            lead_ms: Silence before the first clip (room for noise calibration)
+            noise_level: Std-dev of the low hiss mixed into silence (pure
+                         digital zero is not a realistic noise floor)
+        """
+        self.SAMPLE_RATE = rate
+        self.CHUNK = 1024
+        self.speed = speed
+        self.stream = None
+
+        rng = np.random.default_rng(0)
+        hiss = lambda n: rng.normal(0.0, noise_level, n)
+        pieces = [hiss(int(rate * lead_ms / 1000))]
+        self.spans = []  # (start_sample, end_sample, name) of each clip in the timeline
+        position = len(pieces[0])
+        gap = int(rate * gap_ms / 1000)
+        for name, samples in clips:
+            pieces.append(samples.astype(np.float64) + hiss(len(samples)))
+            self.spans.append((position, position + len(samples), name))
+            position += len(samples)
+            pieces.append(hiss(gap))
+            position += gap
+        self.samples = np.clip(np.concatenate(pieces), -32768, 32767).astype(np.int16)
+        self.position = 0
+        self.started = None
+
+    @classmethod
+    def from_paths(cls, paths, rate=16000, **kwargs):
+        return cls(load_corpus(paths, rate), rate, **kwargs)
+
+    def __enter__(self):
+        self.stream = _ReplayStream(self)
+        self.started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream = None
+
+    @property
+    def duration(self):
+        """Total replay length in seconds."""
+        return len(self.samples) / self.SAMPLE_RATE
+
+    def read(self, frames):
+        """Next `frames` samples as bytes; raises ReplayFinished at the end."""
+        if self.position + frames > len(self.samples):
+            raise ReplayFinished("Replay finished")
+        chunk = self.samples[self.position:self.position + frames]
+        self.position += frames
+        if self.speed > 0:
+            # Pace like a sound card: block until this audio would have been recorded
+            due = self.started + self.position / (self.SAMPLE_RATE * self.speed)
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return chunk.tobytes()
+
+    def clip_at(self, start, end):
+        """Name of the clip that overlaps timeline samples [start, end) the most (None for silence)."""
+        best, best_overlap = None, 0
+        for clip_start, clip_end, name in self.spans:
+            overlap = min(end, clip_end) - max(start, clip_start)
+            if overlap > best_overlap:
+                best, best_overlap = name, overlap
+        return best
+
+
+def open_audio_source(spec="microphone", rate=16000, speed=1.0):
+    """
+    Create the capture source named in settings
+
+    Args:
+        spec: "microphone", or a WAV file / folder of WAV files to replay
+        rate: Sample rate to capture at
+        speed: Replay speed (see ReplaySource)
+    """
+    if not spec or spec == "microphone":
+        import speech_recognition as sr
+        return sr.Microphone(sample_rate=rate)
+    return ReplaySource.from_paths([spec], rate, speed=speed)
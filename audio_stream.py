@@ -0,0 +1,234 @@
+"""
+Streaming audio helpers for Jarvis AI Assistant
+A growable ring buffer that the TTS generator writes network chunks into
+while the player drains whole MP3 frames out of it, so playback can begin
+before synthesis of the sentence has finished.
+"""
+
+import time
+import threading
+
+# Bitrate tables (kbps) for Layer III, indexed by the 4-bit header field
+_BITRATES_V1_L3 = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+_BITRATES_V2_L3 = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+
+# Sample rates indexed by [version][2-bit header field]
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG-1
+    2: [22050, 24000, 16000],  # MPEG-2
+    0: [11025, 12000, 8000],   # MPEG-2.5
+}
+
+
+def parse_mp3_header(b0, b1, b2):
+    """
+    Parse an MPEG audio Layer III frame header
+
+    Args:
+        b0, b1, b2: First three header bytes
+
+    Returns:
+        tuple: (frame_length_bytes, samples_per_frame, sample_rate), or None if
+               the bytes are not a valid Layer III header
+    """
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version = (b1 >> 3) & 0x03
+    layer = (b1 >> 1) & 0x03
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 0x03
+    padding = (b2 >> 1) & 0x01
+
+    if version == 1 or layer != 1 or rate_index == 3:
+        return None
+    if bitrate_index == 0 or bitrate_index == 15:
+        return None  # Free-format / invalid
+
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    if version == 3:
+        bitrate = _BITRATES_V1_L3[bitrate_index] * 1000
+        return 144 * bitrate // sample_rate + padding, 1152, sample_rate
+
+    bitrate = _BITRATES_V2_L3[bitrate_index] * 1000
+    return 72 * bitrate // sample_rate + padding, 576, sample_rate
+
+
+class AudioRingBuffer:
+    """
+    Single-producer / single-consumer byte ring buffer.
+
+    Writes never block (the producer lives on the TTS event loop), so the
+    buffer doubles its capacity when full. Reads hand back whole MP3 frames.
+    """
+
+    def __init__(self, capacity=64 * 1024):
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._read = 0   # Absolute read position
+        self._write = 0  # Absolute write position
+        self._cond = threading.Condition()
+        self.closed = False
+        self.error = None
+        self.sample_rate = None  # Source rate, known after the first frame
+        self.samples_per_frame = None
+        self.boundaries = []  # Word timing metadata that travels with the audio
+        self.format = "mp3"  # "wav" clips (offline TTS) are only handed out whole
+        self.first_write_at = None  # Monotonic time of the first audio byte (latency tracing)
+
+    def __len__(self):
+        with self._cond:
+            return self._write - self._read
+
+    def _grow(self, needed):
+        """Re-linearize into a larger buffer (caller holds the lock)."""
+        size = self._write - self._read
+        capacity = len(self._buf)
+        while capacity - size < needed:
+            capacity *= 2
+        new_buf = bytearray(capacity)
+        new_buf[:size] = self._peek(0, size)
+        self._view.release()
+        self._buf = new_buf
+        self._view = memoryview(self._buf)
+        self._write = size
+        self._read = 0
+
+    def _peek(self, offset, length):
+        """Copy `length` unread bytes starting `offset` past the read position."""
+        capacity = len(self._buf)
+        start = (self._read + offset) % capacity
+        end = start + length
+        if end <= capacity:
+            return bytes(self._view[start:end])
+        return bytes(self._view[start:]) + bytes(self._view[:end - capacity])
+
+    def write(self, data):
+        """Append a chunk (bytes-like). Never blocks."""
+        n = len(data)
+        if not n:
+            return
+        with self._cond:
+            if self.first_write_at is None:
+                self.first_write_at = time.monotonic()
+            if len(self._buf) - (self._write - self._read) < n:
+                self._grow(n)
+            capacity = len(self._buf)
+            start = self._write % capacity
+            first = min(n, capacity - start)
+            src = memoryview(data)
+            self._view[start:start + first] = src[:first]
+            if first < n:
+                self._view[:n - first] = src[first:]
+            self._write += n
+            self._cond.notify_all()
+
+    def set_format(self, audio_format):
+        """Declare the container of the bytes about to be written ("mp3" or "wav")."""
+        with self._cond:
+            self.format = audio_format
+
+    def close(self, error=None):
+        """Mark end-of-stream (optionally with the exception that ended it)."""
+        with self._cond:
+            self.closed = True
+            self.error = error
+            self._cond.notify_all()
+
+    def _complete_frames(self):
+        """
+        Length of the unread prefix made of whole MP3 frames, plus the
+        number of frames in it (caller holds the lock).
+        """
+        available = self._write - self._read
+        capacity = len(self._buf)
+        buf = self._buf
+        offset = 0
+        frames = 0
+
+        while available - offset >= 4:
+            pos = (self._read + offset) % capacity
+            header = parse_mp3_header(buf[pos], buf[(pos + 1) % capacity], buf[(pos + 2) % capacity])
+            if header is None:
+                if frames:
+                    break  # Hand back what we have; resync on the next read
+                # Resync: drop one garbage byte in front of the first frame
+                self._read += 1
+                available -= 1
+                continue
+            length, samples, rate = header
+            if available - offset < length:
+                break
+            if self.sample_rate is None:
+                self.sample_rate = rate
+                self.samples_per_frame = samples
+            offset += length
+            frames += 1
+
+        return offset, frames
+
+    def read_frames(self, timeout=None):
+        """
+        Block until at least one whole MP3 frame (or end-of-stream) is available
+
+        Returns:
+            tuple: (bytes, frame_count). Empty bytes means the stream is
+                   finished (or the timeout expired while still open).
+                   A WAV stream comes back as one piece with frame_count 1.
+        """
+        with self._cond:
+            while True:
+                if self.format == "wav":
+                    rest = self._write - self._read
+                    if self.closed:
+                        data = self._peek(0, rest) if rest else b""
+                        self._read = self._write
+                        return data, 1 if rest else 0
+                    if not self._cond.wait(timeout):
+                        return b"", 0
+                    continue
+                length, frames = self._complete_frames()
+                if frames:
+                    data = self._peek(0, length)
+                    self._read += length
+                    return data, frames
+                if self.closed:
+                    # Flush any trailing partial frame as-is
+                    rest = self._write - self._read
+                    data = self._peek(0, rest) if rest else b""
+                    self._read = self._write
+                    return data, 0
+                if not self._cond.wait(timeout):
+                    return b"", 0
+
+    def finished(self):
+        """True once the producer closed and every byte has been read."""
+        with self._cond:
+            return self.closed and self._write == self._read
+
+
+def mp3_tail(data, frame_count):
+    """
+    Return the last `frame_count` whole MP3 frames of `data`
+
+    Used to prime the decoder for the next segment: Layer III frames may
+    borrow bits from earlier frames (the bit reservoir), so each segment is
+    decoded with a few frames of the previous one in front of it.
+
+    Returns:
+        tuple: (bytes, frames_returned)
+    """
+    offsets = []
+    pos = 0
+    n = len(data)
+    while n - pos >= 4:
+        header = parse_mp3_header(data[pos], data[pos + 1], data[pos + 2])
+        if header is None or n - pos < header[0]:
+            break
+        offsets.append(pos)
+        pos += header[0]
+
+    if not offsets or frame_count <= 0:
+        return b"", 0
+    frame_count = min(frame_count, len(offsets))
+    return data[offsets[-frame_count]:pos], frame_count
@@ -0,0 +1,162 @@
+"""
+Command Execution for Jarvis AI Assistant
+Runs recognized commands on a small worker pool so slow handlers
+(Wikipedia, web search, weather, system status) no longer stall the
+microphone loop. Speech produced by a command is released in the order the
+commands were given: the oldest unfinished command speaks straight through,
+later ones are buffered until everything before them is done. Commands can
+be cancelled (barge-in) and are abandoned after a per-intent timeout.
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+_local = threading.local()
+
+
+class CommandJob:
+    def __init__(self, seq, text, intent, trace):
+        self.seq = seq
+        self.text = text
+        self.intent = intent
+        self.trace = trace  # Latency trace of the utterance that produced this command
+        self.outbox = []  # Speech waiting for earlier commands to finish
+        self.cancelled = False
+        self.finished = False  # No more speech will be released for this job
+        self.result = None
+        self.done = threading.Event()  # The handler itself has returned
+        self.future = None
+
+    def wait(self, timeout=None):
+        """Handler result, or None if it hasn't returned within `timeout`."""
+        self.done.wait(timeout)
+        return self.result
+
+
+class CommandExecutor:
+    def __init__(self, emit, workers=2, max_pending=4, timeouts=None, default_timeout=20.0,
+                 timeout_message="Sorry, that is taking too long."):
+        """
+        Initialize the executor
+
+        Args:
+            emit: Callable(text, trace) that actually queues a piece of speech
+            workers: Handlers allowed to run at the same time
+            max_pending: Unfinished commands accepted before new ones are refused
+            timeouts: Intent name -> seconds before the command is abandoned
+            default_timeout: Timeout for intents not in `timeouts`
+            timeout_message: Spoken (in order) when a command is abandoned
+        """
+        self.emit = emit
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="Command")
+        self.max_pending = max_pending
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.timeout_message = timeout_message
+        self.lock = threading.Lock()
+        self.jobs = deque()  # Unfinished jobs, oldest first (the head may speak directly)
+        self.seq = 0
+
+    def current_job(self):
+        """The job running on this thread, or None outside the pool."""
+        return getattr(_local, "job", None)
+
+    def is_cancelled(self):
+        """For long handlers (LLM streaming) to poll: has this thread's command been dropped?"""
+        job = self.current_job()
+        return job is not None and (job.cancelled or job.finished)
+
+    def submit(self, handler, text, intent=None, trace=None):
+        """
+        Run handler(text) on the pool
+
+        Returns:
+            CommandJob: or None if too many commands are still pending
+        """
+        with self.lock:
+            if len(self.jobs) >= self.max_pending:
+                print(f"Command Executor: busy, dropping '{text}'")
+                return None
+            self.seq += 1
+            job = CommandJob(self.seq, text, intent, trace)
+            self.jobs.append(job)
+
+        job.future = self.pool.submit(self._run, job, handler)
+        return job
+
+    def _run(self, job, handler):
+        # The timeout covers the handler itself, not the time spent queued behind others
+        timer = threading.Timer(self.timeouts.get(job.intent, self.default_timeout), self._expire, args=(job,))
+        timer.daemon = True
+        _local.job = job
+        try:
+            if not (job.cancelled or job.finished):
+                timer.start()
+                job.result = handler(job.text)
+        except Exception as e:
+            print(f"Command Error ({job.text}): {e}")
+        finally:
+            _local.job = None
+            timer.cancel()
+            job.done.set()
+            self._finish(job)
+
+    def _expire(self, job):
+        if job.done.is_set():
+            return
+        print(f"Command Executor: '{job.text}' timed out")
+        self._finish(job, message=self.timeout_message)
+
+    def _finish(self, job, message=None):
+        with self.lock:
+            if job.finished:
+                return
+            if message and not job.cancelled:
+                job.outbox.append(message)
+            job.finished = True
+            self._advance()
+
+    def _advance(self):
+        """Release speech of finished jobs at the head, then the new head's buffer (lock held)."""
+        while self.jobs:
+            head = self.jobs[0]
+            if not head.cancelled:
+                for text in head.outbox:
+                    self.emit(text, head.trace)
+            head.outbox = []
+            if not head.finished:
+                break
+            self.jobs.popleft()
+
+    def speech(self, text):
+        """
+        Route speech from a command handler
+
+        Returns:
+            bool: True if the executor took care of it (buffered, emitted or
+                  dropped); False if the caller isn't a command and should
+                  speak normally
+        """
+        job = self.current_job()
+        if job is None:
+            return False
+        with self.lock:
+            if job.cancelled or job.finished:
+                return True  # Barged in on, or already abandoned after a timeout
+            if self.jobs and self.jobs[0] is job:
+                self.emit(text, job.trace)
+            else:
+                job.outbox.append(text)
+        return True
+
+    def cancel_all(self):
+        """Drop every unfinished command (barge-in): queued ones never start, running ones go silent."""
+        with self.lock:
+            for job in self.jobs:
+                job.cancelled = True
+                job.outbox = []
+                if job.future is not None and job.future.cancel():
+                    job.done.set()  # Never started
+                job.finished = True
+            self.jobs.clear()
@@ -0,0 +1,180 @@
+"""
+Conversation Memory for Jarvis AI Assistant
+Keeps the chat history under a token budget so prompt size (and with it the
+LLM's prefill time) stays bounded however long the conversation runs.
+Turns live in a deque; when the budget is exceeded the oldest turns are
+evicted in one batch (down to a low-water mark, so the cached prompt prefix
+changes rarely) and folded into a running summary by a background thread.
+Until the new summary is ready the evicted turns stay visible, so nothing
+is lost and the reply path never waits on summarization.
+
+Run this module directly to simulate a long conversation:
+
+    python conversation_memory.py
+"""
+
+import re
+import threading
+from collections import deque
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text):
+    """Approximate LLM token count (words and punctuation, ~4/3 tokens per word)."""
+    return (len(_TOKEN.findall(text or "")) * 4 + 2) // 3
+
+
+def clip_tokens(text, limit):
+    """Cut `text` to roughly `limit` tokens at a word boundary."""
+    if count_tokens(text) <= limit:
+        return text
+    words = text.split()
+    keep = max(1, limit * 3 // 4)
+    while keep > 1 and count_tokens(" ".join(words[:keep])) > limit:
+        keep -= 1
+    return " ".join(words[:keep]) + " ..."
+
+
+def extractive_summary(summary, turns, limit=200):
+    """Fallback summarizer: what the user asked, newest last, within `limit` tokens."""
+    asked = "; ".join(user for user, _ in turns)
+    text = f"{summary} Earlier the user asked: {asked}." if summary else f"Earlier the user asked: {asked}."
+    # Keep the most recent part if it is too long
+    words = text.split()
+    while len(words) > 1 and count_tokens(" ".join(words)) > limit:
+        words = words[len(words) // 4 or 1:]
+    return " ".join(words)
+
+
+class ConversationMemory:
+    def __init__(self, budget_tokens=1200, low_water=0.6, keep_recent=2, max_turn_tokens=None,
+                 max_summary_tokens=200, summarizer=None):
+        """
+        Initialize the memory
+
+        Args:
+            budget_tokens: Most tokens the summary plus kept turns may use
+            low_water: Fraction of the budget left after an eviction (batching)
+            keep_recent: Newest turns that are never evicted
+            max_turn_tokens: Longer turns are clipped when stored (default: a third of the budget)
+            max_summary_tokens: Size the running summary is held to
+            summarizer: Callable(previous_summary, [(user, assistant)]) -> str, run off the
+                        reply path; falls back to extractive_summary on error or if None
+        """
+        self.budget = budget_tokens
+        self.low_water = low_water
+        self.keep_recent = keep_recent
+        self.max_turn_tokens = max_turn_tokens or budget_tokens // 3
+        self.max_summary_tokens = max_summary_tokens
+        self.summarizer = summarizer
+
+        self.turns = deque()  # (user, assistant, tokens), oldest first
+        self.folding = []  # Evicted turns not yet folded into the summary (still shown)
+        self.summary = ""
+        self.tokens = 0  # Tokens of `turns`
+        self.summary_tokens = 0
+        self.folds = 0
+        self.lock = threading.Lock()
+        self.worker = None
+
+    def add(self, user, assistant):
+        """Store a finished turn; may start a background fold."""
+        user = clip_tokens(user, self.max_turn_tokens)
+        assistant = clip_tokens(assistant, self.max_turn_tokens)
+        tokens = count_tokens(user) + count_tokens(assistant)
+        with self.lock:
+            self.turns.append((user, assistant, tokens))
+            self.tokens += tokens
+            if self.summary_tokens + self.tokens <= self.budget:
+                return
+            target = self.budget * self.low_water - self.summary_tokens
+            while len(self.turns) > self.keep_recent and self.tokens > target:
+                old_user, old_assistant, old_tokens = self.turns.popleft()
+                self.tokens -= old_tokens
+                self.folding.append((old_user, old_assistant))
+            if self.folding and self.worker is None:
+                self.worker = threading.Thread(target=self._fold, daemon=True, name="Memory_Summarizer")
+                self.worker.start()
+
+    def _fold(self):
+        while True:
+            with self.lock:
+                batch = list(self.folding)
+                previous = self.summary
+                if not batch:
+                    self.worker = None
+                    return
+            summary = None
+            if self.summarizer is not None:
+                try:
+                    summary = self.summarizer(previous, batch)
+                except Exception as e:
+                    print(f"Memory Summarizer Error: {e}")
+            if not summary:
+                summary = extractive_summary(previous, batch, self.max_summary_tokens)
+            summary = clip_tokens(summary.strip(), self.max_summary_tokens)
+            with self.lock:
+                self.summary = summary
+                self.summary_tokens = count_tokens(summary)
+                del self.folding[:len(batch)]
+                self.folds += 1
+
+    def view(self):
+        """
+        What the next prompt should contain
+
+        Returns:
+            tuple: (summary, [(user, assistant)]) with turns being folded still included
+        """
+        with self.lock:
+            return self.summary, self.folding + [(u, a) for u, a, _ in self.turns]
+
+    def prompt_tokens(self):
+        """Tokens the history currently adds to a prompt."""
+        with self.lock:
+            return (self.summary_tokens + self.tokens
+                    + sum(count_tokens(u) + count_tokens(a) for u, a in self.folding))
+
+    def last_user_text(self):
+        with self.lock:
+            if self.turns:
+                return self.turns[-1][0]
+            return self.folding[-1][0] if self.folding else None
+
+    def reset(self, turns=None, summary=""):
+        """Replace everything (e.g. a new conversation)."""
+        with self.lock:
+            self.turns.clear()
+            self.folding = []
+            self.tokens = 0
+            self.summary = summary
+            self.summary_tokens = count_tokens(summary)
+        for user, assistant in turns or []:
+            self.add(user, assistant)
+
+
+def _demo(turns=60):
+    import time
+    import random
+    rng = random.Random(0)
+    words = "the a model answer light speed planet ocean history music python code weather city".split()
+
+    memory = ConversationMemory(budget_tokens=800)
+    peak = 0
+    for i in range(turns):
+        question = f"question {i}: " + " ".join(rng.choices(words, k=rng.randint(4, 12)))
+        answer = " ".join(rng.choices(words, k=rng.randint(20, 400))) + "."
+        memory.add(question, answer)
+        peak = max(peak, memory.prompt_tokens())
+        time.sleep(0.005)  # Let the summarizer run between turns, as speech playback would
+        if i % 10 == 9:
+            summary, kept = memory.view()
+            print(f"turn {i + 1:3d}: history {memory.prompt_tokens():4d} tokens "
+                  f"({len(kept)} turns + {count_tokens(summary)}-token summary), {memory.folds} folds")
+    print(f"Peak history size {peak} tokens with an 800-token budget "
+          f"(turns are clipped to {memory.max_turn_tokens}; evicted turns stay visible until folded)")
+
+
+if __name__ == "__main__":
+    _demo()
@@ -0,0 +1,176 @@
+"""
+Acoustic Echo Cancellation for Jarvis AI Assistant
+Removes the assistant's own voice from the microphone using the exact PCM
+the playback engine is playing as a reference. A partitioned-block
+frequency-domain NLMS filter (one block per 30 ms mic frame, vectorized
+over partitions) learns the speaker -> room -> microphone echo path;
+adaptation freezes during double talk so the
+user's voice doesn't corrupt it. Once the filter has converged, barge-in
+can use the normal VAD threshold instead of a raised one.
+"""
+
+import numpy as np
+
+from audio_format import pcm_to_mono
+
+
+def _resample(x, src_rate, dst_rate):
+    """Linear resampling with a box pre-filter when downsampling."""
+    if src_rate == dst_rate or not len(x):
+        return x.astype(np.float32)
+    ratio = src_rate / dst_rate
+    if ratio > 1.5:
+        width = int(round(ratio))
+        x = np.convolve(x, np.ones(width, dtype=np.float32) / width, mode="same")
+    positions = np.arange(int(len(x) / ratio)) * ratio
+    return np.interp(positions, np.arange(len(x)), x).astype(np.float32)
+
+
+class EchoReference:
+    """The speaker signal at the microphone's rate, addressable by monotonic time."""
+
+    def __init__(self, engine, rate, history_s=2.0):
+        """
+        Args:
+            engine: PlaybackEngine whose output is the echo source
+            rate: Microphone sample rate
+            history_s: How long finished segments are kept (the mic lags the speaker)
+        """
+        self.engine = engine
+        self.rate = rate
+        self.history_s = history_s
+        self.segments = {}  # (id(sound), start) -> (start, end, mono float32 at `rate`)
+
+    def _refresh(self, now):
+        for start, end, sound in self.engine.playing_segments():
+            key = (id(sound), start)
+            if key not in self.segments:
+                mono = pcm_to_mono(sound.get_raw(), self.engine.channels, self.engine.size)
+                self.segments[key] = (start, end, _resample(mono, self.engine.freq, self.rate))
+        for key, (_, end, _) in list(self.segments.items()):
+            if end < now - self.history_s:
+                del self.segments[key]
+
+    def block(self, t_end, n):
+        """
+        Reference samples for the `n` mic samples ending at monotonic `t_end`
+
+        Returns:
+            np.ndarray: float32 (full scale = 1.0), zeros where nothing played
+        """
+        self._refresh(t_end)
+        out = np.zeros(n, dtype=np.float32)
+        t0 = t_end - n / self.rate
+        stopped = self.engine.last_stop
+
+        for start, end, samples in self.segments.values():
+            if start < stopped:
+                end = min(end, stopped)  # Cut off by stop_speaking()
+            if end <= t0 or start >= t_end:
+                continue
+            offset = int(round((start - t0) * self.rate))
+            limit = int(round((min(end, t_end) - t0) * self.rate))
+            src = max(0, -offset)
+            dst = max(0, offset)
+            count = min(n - dst, len(samples) - src, limit - dst)
+            if count > 0:
+                out[dst:dst + count] += samples[src:src + count]
+        return out
+
+
+class EchoCanceller:
+    def __init__(self, reference, frame_samples, taps_ms=120, mu=0.5):
+        """
+        Initialize the canceller
+
+        Args:
+            reference: EchoReference for the speaker signal
+            frame_samples: Mic frame length; also the filter's block size
+            taps_ms: Echo path length the filter can model (delay + room tail)
+            mu: Step size (0-1; larger converges faster but is noisier)
+        """
+        self.reference = reference
+        self.block = frame_samples
+        self.partitions = max(1, -(-int(reference.rate * taps_ms / 1000) // frame_samples))
+        self.mu = mu
+        bins = frame_samples + 1
+
+        # Partitioned-block frequency-domain filter: one spectrum per block of delay
+        self.X = np.zeros((self.partitions, bins), dtype=np.complex64)  # Newest reference block first
+        self.W = np.zeros((self.partitions, bins), dtype=np.complex64)
+        self.power = None  # Smoothed reference power per bin
+        self.previous = np.zeros(frame_samples, dtype=np.float32)
+        self.active = 0  # Blocks left in which the reference (or its echo tail) can be non-zero
+        self.residual = 1.0  # Smoothed e/d energy ratio on echo-only frames (1 / ERLE)
+        self.bad_frames = 0  # Consecutive frames where cancellation added energy
+
+    @property
+    def erle_db(self):
+        """Echo return loss enhancement currently achieved."""
+        return -10.0 * np.log10(max(self.residual, 1e-6))
+
+    @property
+    def converged(self):
+        return self.erle_db >= 10.0
+
+    def process(self, frame, t_end):
+        """
+        Cancel echo in one mic frame
+
+        Args:
+            frame: np.int16 samples (frame_samples long)
+            t_end: Monotonic time the frame was read (its last sample)
+
+        Returns:
+            np.ndarray: int16 frame with the estimated echo removed
+        """
+        B = self.block
+        if len(frame) != B:
+            return frame
+        x = self.reference.block(t_end, B) * 32768.0
+        if x.any():
+            self.active = self.partitions + 1
+        elif self.active:
+            self.active -= 1
+        else:
+            self.previous = x
+            return frame  # Nothing played recently: no echo to remove
+
+        # Overlap-save: the newest spectrum covers the previous and current block
+        self.X[1:] = self.X[:-1]
+        self.X[0] = np.fft.rfft(np.concatenate((self.previous, x)))
+        self.previous = x
+
+        d = frame.astype(np.float32)
+        y = np.fft.irfft((self.W * self.X).sum(axis=0), 2 * B)[B:]
+        e = d - y
+
+        d_energy = float(d @ d) + 1.0
+        ratio = float(e @ e) / d_energy
+        block_power = float(x @ x) / B
+        if ratio > 2.0:
+            # Subtracting makes this frame worse (quiet mic, or the echo path changed).
+            # Pass it through; only start over if it keeps happening while audio plays.
+            if block_power > 1.0:
+                self.bad_frames += 1
+            if self.bad_frames >= 10:
+                self.W[:] = 0
+                self.residual = 1.0
+                self.bad_frames = 0
+            return frame
+        self.bad_frames = 0
+
+        # Double talk: the error jumps far above what the filter usually leaves
+        double_talk = self.converged and ratio > 4.0 * self.residual
+        if not double_talk and block_power > 1.0:
+            block_psd = np.abs(self.X[0]) ** 2
+            self.power = block_psd if self.power is None else 0.9 * self.power + 0.1 * block_psd
+            E = np.fft.rfft(np.concatenate((np.zeros(B, dtype=np.float32), e)))
+            G = np.conj(self.X) * E / (self.power + 1e-6)
+            # Gradient constraint: keep each partition a causal B-tap filter
+            g = np.fft.irfft(G, 2 * B, axis=1)
+            g[:, B:] = 0
+            self.W += self.mu * np.fft.rfft(g, axis=1)
+            self.residual += 0.1 * (min(ratio, 1.0) - self.residual)
+
+        return np.clip(e, -32768, 32767).astype(np.int16)
@@ -0,0 +1,215 @@
+"""
+HTTP Access for Jarvis AI Assistant
+One pooled requests.Session with strict timeouts for every external lookup,
+plus a TTL cache in front of them. Each namespace (location, ip, weather,
+search, wiki...) has a fresh lifetime and a stale window: inside the stale
+window the old answer is returned immediately and refreshed in the
+background (stale-while-revalidate), so a repeated question never waits on
+the network. Queries are normalized before they become cache keys.
+
+Run this module directly for a demo against a local stub server:
+
+    python http_cache.py
+"""
+
+import re
+import time
+import threading
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# namespace -> (fresh seconds, extra stale seconds)
+DEFAULT_TTLS = {
+    "ip": (6 * 3600, 18 * 3600),
+    "location": (6 * 3600, 18 * 3600),
+    "weather": (10 * 60, 50 * 60),
+    "news": (10 * 60, 20 * 60),
+    "search": (30 * 60, 6 * 3600),
+    "wiki": (24 * 3600, 6 * 24 * 3600),
+}
+
+
+def normalize_query(text):
+    """Cache key form of a query: lowercase, no punctuation, single spaces."""
+    return " ".join(re.sub(r"[^\w\s]", " ", (text or "").lower()).split())
+
+
+class TTLCache:
+    """Thread-safe LRU of values with a fresh lifetime and a stale window."""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (value, fresh_until, stale_until)
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns:
+            tuple: (value, "fresh" | "stale"), or (None, None) if missing or expired
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None, None
+            value, fresh_until, stale_until = entry
+            if now >= stale_until:
+                del self.entries[key]
+                return None, None
+            self.entries.move_to_end(key)
+            return value, ("fresh" if now < fresh_until else "stale")
+
+    def put(self, key, value, ttl, stale_ttl=0.0):
+        now = time.monotonic()
+        with self.lock:
+            self.entries[key] = (value, now + ttl, now + ttl + stale_ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class HTTPClient:
+    def __init__(self, timeout=(3.05, 6.0), pool_size=8, ttls=None, max_entries=512):
+        """
+        Initialize the client
+
+        Args:
+            timeout: requests timeout, (connect, read) seconds
+            pool_size: Keep-alive connections kept per host
+            ttls: namespace -> (fresh seconds, stale seconds), merged over DEFAULT_TTLS
+            max_entries: Cache size across all namespaces
+        """
+        self.timeout = timeout
+        self.session = requests.Session()
+        # One retry for a dropped keep-alive connection; a read that timed out is not sent
+        # again, so a stalled upstream costs one read timeout, not two
+        retries = Retry(total=1, read=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.cache = TTLCache(max_entries)
+        self.refreshing = set()  # Keys with a background refresh in flight
+        self.lock = threading.Lock()
+        self.stats = {"fresh": 0, "stale": 0, "miss": 0, "refresh_errors": 0}
+
+    def get(self, url, **kwargs):
+        """GET through the pooled session (default timeout applied)."""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def get_json(self, url, **kwargs):
+        """GET and decode JSON; raises for HTTP errors."""
+        response = self.get(url, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def cached(self, namespace, query, fetch):
+        """
+        Answer from the cache or call fetch()
+
+        Args:
+            namespace: Key prefix and TTL class (see DEFAULT_TTLS)
+            query: Normalized into the key ("" for singletons like the IP)
+            fetch: Callable returning the value; None results are not cached,
+                   exceptions propagate on a miss
+
+        Returns:
+            The cached or fetched value
+        """
+        key = (namespace, normalize_query(query))
+        value, state = self.cache.get(key)
+        if state == "fresh":
+            self.stats["fresh"] += 1
+            return value
+        if state == "stale":
+            self.stats["stale"] += 1
+            self._refresh_later(key, fetch)
+            return value
+
+        self.stats["miss"] += 1
+        value = fetch()
+        self._store(key, value)
+        return value
+
+    def _store(self, key, value):
+        if value is not None:
+            ttl, stale_ttl = self.ttls.get(key[0], (300, 0))
+            self.cache.put(key, value, ttl, stale_ttl)
+
+    def _refresh_later(self, key, fetch):
+        with self.lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+
+        def refresh():
+            try:
+                self._store(key, fetch())
+            except Exception as e:
+                self.stats["refresh_errors"] += 1
+                print(f"HTTP Cache Refresh Error ({key[0]}): {e}")
+            finally:
+                with self.lock:
+                    self.refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True, name="HTTP_Refresh").start()
+
+
+def _demo():
+    """Miss, hit and stale-while-revalidate timings against a local stub server."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    connections = []
+
+    class Stub(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, so pooling is visible
+
+        def setup(self):
+            super().setup()
+            connections.append(self.client_address)
+
+        def do_GET(self):
+            time.sleep(0.2)  # A slow upstream
+            body = f'{{"path": "{self.path}", "at": {time.time():.3f}}}'.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/weather"
+
+    client = HTTPClient(ttls={"weather": (0.5, 5.0)})
+    fetch = lambda: client.get_json(url)
+
+    def timed(label, query):
+        start = time.perf_counter()
+        value = client.cached("weather", query, fetch)
+        print(f"  {label:<34} {(time.perf_counter() - start) * 1000:7.1f} ms  (fetched at {value['at']})")
+
+    print("Stub upstream takes 200 ms; weather TTL 0.5 s fresh + 5 s stale")
+    timed("miss", "London")
+    timed("hit (same query, other spelling)", "  london? ")
+    time.sleep(0.6)
+    timed("stale: old value, refresh started", "London")
+    time.sleep(0.3)
+    timed("hit on the refreshed value", "London")
+    print(f"  {len(connections)} TCP connection(s) for {client.stats['miss'] + 1} requests; stats {client.stats}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    _demo()
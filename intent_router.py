@@ -0,0 +1,349 @@
+"""
+Intent Routing for Jarvis AI Assistant
+Replaces process_command's cascade of substring checks with a declarative
+intent table. Every trigger phrase of every intent is compiled into one
+Aho-Corasick automaton over words, so a command is matched against all
+phrases in a single pass; the highest-priority intent whose triggers are
+satisfied (and none of whose excludes are present) wins, and its slot
+(app name, search query, city...) is cut from the same token positions.
+
+Matching is on whole words: "time" no longer fires inside "sometimes", nor
+"date" inside "update".
+
+Run this module directly to check the regression table and benchmark:
+
+    python intent_router.py [count]
+"""
+
+import re
+import time
+from collections import deque, namedtuple
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+# Result of routing a command: intent name, extracted slot text and the trigger phrases that matched
+Route = namedtuple("Route", ["intent", "slot", "phrases"])
+
+
+def tokenize(text):
+    """Lowercase words (apostrophes kept, so "what's" is one word)."""
+    return _WORD.findall(text.lower())
+
+
+# --- Slot extractors: (tokens, trigger spans) -> str ---
+
+def after_trigger(tokens, spans):
+    """Everything after the last trigger phrase ("can you open notepad" -> "notepad")."""
+    return " ".join(tokens[max(end for _, end in spans):])
+
+
+def without_triggers(tokens, spans):
+    """The command with its trigger phrases cut out ("who is ada lovelace" -> "ada lovelace")."""
+    covered = set()
+    for start, end in spans:
+        covered.update(range(start, end))
+    return " ".join(t for i, t in enumerate(tokens) if i not in covered)
+
+
+def after_word(word):
+    """Everything after the last occurrence of `word` ("weather in paris" -> "paris")."""
+    def extract(tokens, spans):
+        for i in range(len(tokens) - 1, -1, -1):
+            if tokens[i] == word:
+                return " ".join(tokens[i + 1:])
+        return ""
+    return extract
+
+
+def without_words(*words):
+    """Like without_triggers, also dropping the given filler words."""
+    drop = set(words)
+
+    def extract(tokens, spans):
+        return " ".join(t for t in without_triggers(tokens, spans).split() if t not in drop)
+    return extract
+
+
+class Intent:
+    def __init__(self, name, triggers, priority=0, excludes=(), slot=None, min_slot=0):
+        """
+        Declare an intent
+
+        Args:
+            name: Returned by the router
+            triggers: Phrases that select the intent; a tuple means all of its phrases must occur
+            priority: Higher wins when several intents match
+            excludes: Phrases that disqualify the intent (routing falls through to the next one)
+            slot: Extractor (tokens, trigger spans) -> str, or None
+            min_slot: The intent only matches if its slot is at least this many characters
+        """
+        self.name = name
+        self.alternatives = [(t,) if isinstance(t, str) else tuple(t) for t in triggers]
+        self.priority = priority
+        self.excludes = tuple(excludes)
+        self.slot = slot
+        self.min_slot = min_slot
+
+    def phrases(self):
+        return {p for alt in self.alternatives for p in alt} | set(self.excludes)
+
+
+class _WordAutomaton:
+    """Aho-Corasick automaton whose alphabet is words rather than characters."""
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        self.lengths = [len(p) for p in patterns]
+
+        for index, words in enumerate(patterns):
+            node = 0
+            for word in words:
+                nxt = self.goto[node].get(word)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][word] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                node = nxt
+            self.out[node].append(index)
+
+        # Breadth-first failure links: longest proper suffix that is also a trie path
+        pending = deque(self.goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for word, nxt in self.goto[node].items():
+                pending.append(nxt)
+                f = self.fail[node]
+                while f and word not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(word, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def scan(self, tokens):
+        """All (pattern index, start, end) occurrences in one left-to-right pass."""
+        goto, fail, out, lengths = self.goto, self.fail, self.out, self.lengths
+        hits = []
+        node = 0
+        for i, word in enumerate(tokens):
+            while node and word not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(word, 0)
+            for index in out[node]:
+                hits.append((index, i + 1 - lengths[index], i + 1))
+        return hits
+
+
+class IntentRouter:
+    def __init__(self, intents, fallback="chat"):
+        """
+        Compile an intent table
+
+        Args:
+            intents: Intent declarations (order doesn't matter, priority does)
+            fallback: Intent returned when nothing matches (its slot is the whole text)
+        """
+        self.intents = sorted(intents, key=lambda i: -i.priority)
+        self.fallback = fallback
+        self.phrases = sorted({p for intent in self.intents for p in intent.phrases()})
+        self.phrase_ids = {p: i for i, p in enumerate(self.phrases)}
+        self.automaton = _WordAutomaton([tuple(tokenize(p)) for p in self.phrases])
+
+        # Phrase id -> intents it can trigger (excludes alone never make an intent a candidate)
+        self.triggered_by = [[] for _ in self.phrases]
+        for rank, intent in enumerate(self.intents):
+            for p in {p for alt in intent.alternatives for p in alt}:
+                self.triggered_by[self.phrase_ids[p]].append(rank)
+
+    def route(self, text):
+        """
+        Pick the intent for a command
+
+        Returns:
+            Route: (intent, slot, matched trigger phrases)
+        """
+        tokens = tokenize(text)
+        spans = {}  # Phrase id -> [(start, end)]
+        candidates = set()
+        for index, start, end in self.automaton.scan(tokens):
+            spans.setdefault(index, []).append((start, end))
+            candidates.update(self.triggered_by[index])
+
+        for rank in sorted(candidates):
+            intent = self.intents[rank]
+            if any(self.phrase_ids[p] in spans for p in intent.excludes):
+                continue
+            matched = next((alt for alt in intent.alternatives
+                            if all(self.phrase_ids[p] in spans for p in alt)), None)
+            if matched is None:
+                continue
+            slot = None
+            if intent.slot is not None:
+                trigger_spans = [s for alt in intent.alternatives for p in alt
+                                 for s in spans.get(self.phrase_ids[p], ())]
+                slot = intent.slot(tokens, trigger_spans)
+                if len(slot) < intent.min_slot:
+                    continue
+            return Route(intent.name, slot, matched)
+        return Route(self.fallback, " ".join(tokens), ())
+
+
+# Jarvis's command table. Priorities follow the order of the old if-chain,
+# except vision_hand, which now outranks knowledge explicitly.
+COMMAND_INTENTS = [
+    Intent("exit", ["exit", "quit", "shutdown", "terminate", "code 999", "999"], priority=300),
+    Intent("stop", ["stop"], priority=290),
+    Intent("play_music", ["play music", "play songs"], priority=280),
+    Intent("open_app", ["open"], priority=270, slot=after_trigger, min_slot=2),
+    Intent("knowledge", ["who is", "what is", "tell me about"], priority=260,
+           excludes=["in my hand", "this", "in front", "holding", "see"], slot=without_triggers),
+    Intent("time", ["time"], priority=250),
+    Intent("date", ["date"], priority=245),
+    Intent("my_ip", ["my ip", "my internet address"], priority=240),
+    Intent("search_web", ["search web for", "search online for"], priority=230, slot=without_triggers),
+    Intent("current_events", ["current events"], priority=220),
+    Intent("google", ["google"], priority=210, slot=without_words("search", "for")),
+    Intent("organize_downloads", [("organize", "downloads")], priority=200),
+    # Where the old chain checked it: after time/date/IP/search/google, so "what is the time
+    # in this city" or "google what is this" don't open the camera
+    Intent("vision_hand", ["in my hand", "in hand", "what am i holding", "what's in my hand",
+                           ("what is", "this")], priority=195),
+    Intent("clean_temp", [("clean", "temp"), ("clean", "temporary")], priority=190),
+    Intent("list_objects", ["what objects", "list objects"], priority=180),
+    Intent("see", ["what do you see", "look at this", "identify"], priority=170),
+    Intent("location", ["where am i", "my location"], priority=160),
+    Intent("weather", ["weather"], priority=150, slot=after_word("in")),
+    Intent("latency_report", ["latency report", "latency stats"], priority=140),
+    Intent("voice_stats", ["voice stats", "speech stats"], priority=130),
+    Intent("system_status", ["system status", "cpu", "battery"], priority=120),
+    Intent("system_control", ["screenshot", "volume", "mute"], priority=110),
+    Intent("reminder", ["remind me", "set a reminder"], priority=100),
+    Intent("memory", ["what did i say", "repeat me"], priority=90),
+    Intent("change_voice", ["change voice", "switch voice", "set voice"], priority=80),
+]
+
+# Pinned routing of (already wake-word-stripped) commands: (command, intent, slot or None to skip)
+REGRESSION_CASES = [
+    ("exit", "exit", None),
+    ("quit now", "exit", None),
+    ("code 999", "exit", None),
+    ("stop", "stop", None),
+    ("stop talking", "stop", None),
+    ("play music", "play_music", None),
+    ("play songs for me", "play_music", None),
+    ("open notepad", "open_app", "notepad"),
+    ("can you open visual studio code", "open_app", "visual studio code"),
+    ("is the shop open", "chat", None),  # Nothing after "open": falls through
+    ("what is this", "vision_hand", None),
+    ("what is in my hand", "vision_hand", None),
+    ("what am i holding", "vision_hand", None),
+    ("who is ada lovelace", "knowledge", "ada lovelace"),
+    ("tell me about black holes", "knowledge", "black holes"),
+    ("what is the capital of france", "knowledge", "the capital of france"),
+    ("what is the weather", "knowledge", "the weather"),  # Old chain order: knowledge comes first
+    ("what is my ip", "knowledge", "my ip"),  # Same
+    ("tell me about this", "chat", None),  # Vision words exclude knowledge
+    ("what is in front of me", "chat", None),
+    ("what is the date this friday", "date", None),  # Old chain order: time/date/search/google before vision
+    ("what is the time in this city", "time", None),
+    ("google what is this", "google", "what is this"),
+    ("search web for what is this song", "search_web", "what is this song"),
+    ("what time is it", "time", None),
+    ("what's the date today", "date", None),
+    ("sometimes i feel tired", "chat", None),  # Was "time" (substring match)
+    ("update my notes", "chat", None),  # Was "date" (substring match)
+    ("my ip", "my_ip", None),
+    ("search web for python tutorials", "search_web", "python tutorials"),
+    ("search online for cheap flights", "search_web", "cheap flights"),
+    ("current events", "current_events", None),
+    ("google best pizza near me", "google", "best pizza near me"),
+    ("search google for california", "google", "california"),  # Was "caliia" ("for" removed inside words)
+    ("organize my downloads", "organize_downloads", None),
+    ("clean temp files", "clean_temp", None),
+    ("what objects are there", "list_objects", None),
+    ("what do you see", "see", None),
+    ("look at this", "see", None),
+    ("where am i", "location", None),
+    ("weather in london", "weather", "london"),
+    ("what's the weather like", "weather", ""),
+    ("weather this morning", "weather", ""),  # Was city "g" (split on "in" inside "morning")
+    ("latency report", "latency_report", None),
+    ("voice stats", "voice_stats", None),
+    ("system status", "system_status", None),
+    ("how is my battery", "system_status", None),
+    ("set volume to 50", "system_control", None),
+    ("take a screenshot", "system_control", None),
+    ("remind me to call mom at 5 pm", "reminder", None),
+    ("what did i say", "memory", None),
+    ("change voice to two", "change_voice", None),
+    ("how are you", "chat", None),
+    ("", "chat", None),
+]
+
+
+def _linear_route(intents, text):
+    """The old approach: substring checks intent by intent (benchmark baseline; intents sorted by priority)."""
+    for intent in intents:
+        if any(p in text for p in intent.excludes):
+            continue
+        if any(all(p in text for p in alt) for alt in intent.alternatives):
+            return intent.name
+    return "chat"
+
+
+def check_regressions(router):
+    """Route every pinned command; returns the list of mismatches."""
+    failures = []
+    for command, intent, slot in REGRESSION_CASES:
+        route = router.route(command)
+        if route.intent != intent or (slot is not None and route.slot != slot):
+            failures.append((command, (intent, slot), (route.intent, route.slot)))
+    return failures
+
+
+def _synthetic_commands(count, seed=0):
+    import random
+    rng = random.Random(seed)
+    fillers = ["please", "can you", "now", "for me", "the", "quickly", "jarvis", "hey", "my", "today",
+               "something", "about", "really", "maybe", "and then", "again"]
+    phrases = [p for intent in COMMAND_INTENTS for alt in intent.alternatives for p in alt]
+    commands = []
+    for _ in range(count):
+        words = rng.sample(fillers, rng.randint(1, 5))
+        if rng.random() < 0.8:
+            words.insert(rng.randint(0, len(words)), rng.choice(phrases))
+        commands.append(" ".join(words))
+    return commands
+
+
+def benchmark(count=20000):
+    router = IntentRouter(COMMAND_INTENTS)
+    commands = _synthetic_commands(count)
+
+    start = time.perf_counter()
+    for command in commands:
+        router.route(command)
+    compiled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for command in commands:
+        _linear_route(router.intents, command)
+    linear = time.perf_counter() - start
+
+    print(f"{count} synthetic commands, {len(router.phrases)} phrases, {len(router.intents)} intents")
+    print(f"  compiled router:  {compiled / count * 1e6:6.2f} us/command")
+    print(f"  substring chain:  {linear / count * 1e6:6.2f} us/command")
+
+
+if __name__ == "__main__":
+    import sys
+    router = IntentRouter(COMMAND_INTENTS)
+    failures = check_regressions(router)
+    for command, expected, got in failures:
+        print(f"MISMATCH {command!r}: expected {expected}, got {got}")
+    print(f"Regression table: {len(REGRESSION_CASES) - len(failures)}/{len(REGRESSION_CASES)} pass")
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
+    sys.exit(1 if failures else 0)
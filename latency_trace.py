@@ -0,0 +1,189 @@
+"""
+Latency Tracing for Jarvis AI Assistant
+Follows one conversational turn through the voice pipeline with a trace ID
+and monotonic timestamps at each stage:
+
+    speech_end -> captured -> stt_done -> llm_start -> llm_first_token
+               -> tts_queued -> tts_first_byte -> first_audio
+
+Finished turns are appended to a JSONL file (stage times in ms relative
+to the end of the user's speech) and summarized as p50/p95.
+
+Run this module directly to summarize an existing trace file.
+"""
+
+import json
+import math
+import time
+import threading
+from collections import deque
+
+STAGES = ["speech_end", "captured", "stt_done", "llm_start", "llm_first_token",
+          "tts_queued", "tts_first_byte", "first_audio"]
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a list (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(p / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(records):
+    """
+    p50/p95 per stage over finished trace records
+
+    Args:
+        records: Dicts as written to the JSONL file
+
+    Returns:
+        dict: {"turns": n, "stages": {stage: {"p50", "p95", "count"}}} with ms values
+    """
+    stages = {}
+    for stage in STAGES[1:]:
+        values = [r["stages"][stage] for r in records if stage in r.get("stages", {})]
+        stages[stage] = {"p50": percentile(values, 50), "p95": percentile(values, 95), "count": len(values)}
+    return {"turns": len(records), "stages": stages}
+
+
+def format_summary(summary):
+    """Human readable report of summarize() output."""
+    lines = [f"Latency over {summary['turns']} turns (ms after end of speech):"]
+    for stage, s in summary["stages"].items():
+        if s["count"]:
+            lines.append(f"  {stage:>16}: p50 {s['p50']:7.0f}  p95 {s['p95']:7.0f}  (n={s['count']})")
+    return "\n".join(lines)
+
+
+class LatencyTracer:
+    def __init__(self, path="latency_traces.jsonl", history=200, enabled=True, max_active=8):
+        """
+        Initialize the tracer
+
+        Args:
+            path: JSONL file finished traces are appended to (None = keep in memory only)
+            history: Finished traces kept in memory for summaries
+            enabled: When False every call is a cheap no-op
+            max_active: Turns kept open at once (commands run concurrently); beyond
+                        this the oldest is written out as-is
+        """
+        self.path = path
+        self.enabled = enabled
+        self.max_active = max_active
+        self.lock = threading.Lock()
+        self.active = {}  # trace_id -> {"marks": {stage: monotonic}, "meta": {}}
+        self.finished = deque(maxlen=history)
+        self.current = None  # Trace of the turn being handled right now
+        self._next_id = 0
+
+        # Monotonic <-> wall clock offset (playback events are stamped in wall time)
+        self._wall_offset = time.time() - time.monotonic()
+
+    def from_wall(self, wall_time):
+        """Convert a time.time() timestamp to the monotonic clock used by marks."""
+        return wall_time - self._wall_offset
+
+    def begin(self, speech_end=None):
+        """
+        Start a new turn (earlier turns stay open until their first audio,
+        up to `max_active`; the oldest beyond that is written out as-is)
+
+        Args:
+            speech_end: Monotonic time the user stopped talking (defaults to now)
+
+        Returns:
+            int: Trace ID, also stored as `current`
+        """
+        if not self.enabled:
+            return None
+        with self.lock:
+            self._next_id += 1
+            trace_id = self._next_id
+            self.active[trace_id] = {
+                "marks": {"speech_end": speech_end if speech_end is not None else time.monotonic()},
+                "meta": {},
+            }
+            self.current = trace_id
+            stale = sorted(self.active)[:-self.max_active]
+        for old in stale:
+            self.finish(old)
+        return trace_id
+
+    def mark(self, trace_id, stage, t=None):
+        """Record `stage` for a trace; only the first mark of each stage counts."""
+        if trace_id is None:
+            return
+        with self.lock:
+            trace = self.active.get(trace_id)
+            if trace is None or stage in trace["marks"]:
+                return
+            trace["marks"][stage] = t if t is not None else time.monotonic()
+        if stage == "first_audio":
+            self.finish(trace_id)  # Time-to-first-audio is the end of the critical path
+
+    def annotate(self, trace_id, **meta):
+        """Attach extra fields (e.g. cache hits, backend) to a trace."""
+        if trace_id is None:
+            return
+        with self.lock:
+            trace = self.active.get(trace_id)
+            if trace is not None:
+                trace["meta"].update(meta)
+
+    def finish(self, trace_id):
+        """Export a trace to JSONL and the in-memory history."""
+        with self.lock:
+            trace = self.active.pop(trace_id, None)
+            if self.current == trace_id:
+                self.current = None
+        if trace is None:
+            return
+
+        marks = trace["marks"]
+        origin = marks["speech_end"]
+        record = {
+            "trace": trace_id,
+            "wall": round(origin + self._wall_offset, 3),
+            "stages": {stage: round((marks[stage] - origin) * 1000, 1) for stage in STAGES if stage in marks},
+        }
+        record.update(trace["meta"])
+
+        with self.lock:
+            self.finished.append(record)
+        if self.path:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+            except OSError as e:
+                print(f"Latency Trace Write Error: {e}")
+
+    def summary(self):
+        """p50/p95 per stage over the recent finished turns."""
+        with self.lock:
+            records = list(self.finished)
+        return summarize(records)
+
+
+def load_traces(path):
+    """Read a JSONL trace file, skipping damaged lines."""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+if __name__ == "__main__":
+    import sys
+    import os
+    trace_file = sys.argv[1] if len(sys.argv) > 1 else "latency_traces.jsonl"
+    records = load_traces(trace_file) if os.path.exists(trace_file) else []
+    if records:
+        print(format_summary(summarize(records)))
+    else:
+        print(f"No traces recorded in {trace_file} yet (run the assistant with latency tracing on).")
@@ -0,0 +1,508 @@
+"""
+LLM Session for Jarvis AI Assistant
+A persistent chat session with the local Ollama server. The model is kept
+loaded (keep_alive) and warmed with the system prompt at startup, and the
+message list is append-only between memory folds, so every turn shares its
+prefix with the previous request and Ollama only has to evaluate the new
+tokens (its KV cache covers the rest). History is held by a
+ConversationMemory, which keeps it under a token budget and folds old turns
+into a summary that this session's model writes in the background, only
+while no reply is streaming (a new reply cancels it).
+Per-turn prompt-eval and generation timings from Ollama are recorded so
+cache reuse is measurable. A reply can also be started speculatively, as
+soon as a transcript arrives and before command handling has decided it is
+a chat turn; stream() then picks it up already running, or it is cancelled.
+
+Run this module directly to compare against resending a sliding history,
+using a local stub of the Ollama HTTP API:
+
+    python llm_session.py
+"""
+
+import json
+import time
+import queue
+import threading
+from collections import deque
+
+import requests
+
+from conversation_memory import ConversationMemory
+
+SUMMARY_PROMPT = ("Summarize this conversation between a user and Jarvis in at most {words} words. "
+                  "Keep names, facts, preferences and open questions; drop small talk.")
+
+
+def _ms(ns):
+    return (ns or 0) / 1e6
+
+
+class _Speculation:
+    """A reply streaming into a queue until stream() claims it (or it is cancelled)."""
+
+    def __init__(self, session, text, expire_s):
+        self.session = session
+        self.text = text
+        self.chunks_queue = queue.Queue()
+        self.cancelled = threading.Event()
+        self.response = None
+        self.started = time.perf_counter()
+        # Never claimed (the command went elsewhere without cancelling): stop generating
+        self.timer = threading.Timer(expire_s, self.cancel)
+        self.timer.daemon = True
+        self.timer.start()
+        threading.Thread(target=self._run, daemon=True, name="LLM_Speculation").start()
+
+    def _run(self):
+        try:
+            self.response = self.session._post(self.session.messages(self.text))
+            if self.cancelled.is_set():
+                return
+            for chunk in self.session._chunks(self.response):
+                if self.cancelled.is_set():
+                    break
+                self.chunks_queue.put(chunk)
+        except Exception as e:
+            if not self.cancelled.is_set():
+                self.chunks_queue.put(e)
+        finally:
+            self.chunks_queue.put(None)
+            if self.response is not None:
+                self.response.close()
+
+    def chunks(self):
+        self.timer.cancel()
+        while True:
+            item = self.chunks_queue.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def cancel(self):
+        """Stop generating (closing the connection makes Ollama abort the request)."""
+        self.cancelled.set()
+        self.timer.cancel()
+        response = self.response
+        if response is not None:
+            response.close()
+
+
+class ChatSession:
+    def __init__(self, model="llama3.2", system_prompt="", host="http://localhost:11434",
+                 keep_alive="30m", memory=None, options=None, timeout=(3.05, 120.0), history=50):
+        """
+        Initialize the session
+
+        Args:
+            model: Ollama model name
+            system_prompt: Fixed first message (the shared prefix of every request)
+            host: Ollama server URL
+            keep_alive: How long Ollama keeps the model (and its cache) loaded after a request
+            memory: ConversationMemory holding the history (default: a new one that
+                    uses summarize() for its rolling summary)
+            options: Ollama model options (e.g. {"num_ctx": 4096})
+            timeout: requests (connect, read) timeout; read applies between streamed chunks
+            history: Per-turn stats kept for stats()
+        """
+        self.model = model
+        self.system_prompt = system_prompt
+        self.host = host.rstrip("/")
+        self.keep_alive = keep_alive
+        self.options = options or {}
+        self.timeout = timeout
+        self.http = requests.Session()
+        if memory is None:
+            memory = ConversationMemory(summarizer=self.summarize)
+        self.memory = memory
+        self.turn_stats = deque(maxlen=history)
+        self.last_stats = None
+        self.speculation = None  # _Speculation waiting to be claimed by stream()
+        self.active = 0  # Replies currently streaming
+        self.turn_open = False  # A reply started whose turn isn't committed (or discarded) yet
+        self.summary_response = None  # summarize() request in flight, closed when a reply starts
+        self.summary_cancelled = threading.Event()
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)  # Notified when a reply's turn ends
+
+    @property
+    def turns(self):
+        """Kept (user, assistant) pairs, oldest first."""
+        return self.memory.view()[1]
+
+    def messages(self, text=None):
+        """The request's message list: system prompt, summary, kept turns, then `text`."""
+        summary, turns = self.memory.view()
+        messages = [{"role": "system", "content": self.system_prompt}] if self.system_prompt else []
+        if summary:
+            # Separate message so the system prompt stays a cached prefix when the summary changes
+            messages.append({"role": "system", "content": f"Earlier in this conversation: {summary}"})
+        for user_text, bot_text in turns:
+            messages.append({"role": "user", "content": user_text})
+            messages.append({"role": "assistant", "content": bot_text})
+        if text is not None:
+            messages.append({"role": "user", "content": text})
+        return messages
+
+    def _post(self, messages, stream=True, **extra):
+        payload = {"model": self.model, "messages": messages, "stream": stream,
+                   "keep_alive": self.keep_alive, "options": dict(self.options, **extra.pop("options", {}))}
+        payload.update(extra)
+        response = self.http.post(f"{self.host}/api/chat", json=payload, stream=stream, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def warm(self, background=True):
+        """Load the model and prefill the system prompt so the first real turn starts hot."""
+        def run():
+            try:
+                start = time.perf_counter()
+                self._post(self.messages(), stream=False, options={"num_predict": 1}).json()
+                print(f"LLM warmed ({self.model}) in {(time.perf_counter() - start):.1f} s")
+            except Exception as e:
+                print(f"LLM Warm-up Error: {e}")
+
+        if background:
+            threading.Thread(target=run, daemon=True, name="LLM_Warmup").start()
+        else:
+            run()
+
+    def _chunks(self, response):
+        """Decoded chunks of a streamed /api/chat response."""
+        for line in response.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if chunk.get("error"):
+                raise RuntimeError(chunk["error"])
+            yield chunk
+
+    def speculate(self, text, expire_s=15.0):
+        """
+        Start replying to `text` before it is known to be a chat turn
+
+        stream(text) picks the running reply up; otherwise call cancel_speculation().
+        Skipped from the start of a reply until its turn is committed or discarded,
+        since until then the history the speculation would be built from is incomplete.
+
+        Returns:
+            bool: True if a speculative reply was started
+        """
+        with self.lock:
+            if self.active or self.turn_open:
+                return False
+            previous, self.speculation = self.speculation, _Speculation(self, text, expire_s)
+        if previous is not None:
+            previous.cancel()
+        self._cancel_summary()
+        return True
+
+    def cancel_speculation(self):
+        """Drop the speculative reply, if any (e.g. the command was not a chat turn)."""
+        with self.lock:
+            speculation, self.speculation = self.speculation, None
+        if speculation is not None:
+            speculation.cancel()
+
+    def speculating(self, text):
+        """True if stream(text) will continue a speculative reply."""
+        speculation = self.speculation
+        return speculation is not None and speculation.text == text and not speculation.cancelled.is_set()
+
+    def _claim(self, text):
+        with self.lock:
+            speculation, self.speculation = self.speculation, None
+            self.active += 1
+            self.turn_open = True
+        self._cancel_summary()
+        if speculation is not None and (speculation.text != text or speculation.cancelled.is_set()):
+            speculation.cancel()
+            speculation = None
+        return speculation
+
+    def stream(self, text):
+        """
+        Stream a reply to `text`
+
+        Yields:
+            str: Content pieces as they are generated. Per-turn timings are in
+                 `last_stats` once the stream is exhausted (None if the reply ended
+                 before the model finished it). Call commit() with the full reply to
+                 keep the turn, or discard().
+        """
+        start = time.perf_counter()
+        first_token = None
+        speculation = self._claim(text)
+        self.last_stats = None
+        response = None
+        try:
+            if speculation is not None:
+                chunks = speculation.chunks()
+            else:
+                response = self._post(self.messages(text))
+                chunks = self._chunks(response)
+            for chunk in chunks:
+                content = chunk.get("message", {}).get("content", "")
+                if content:
+                    if first_token is None:
+                        first_token = time.perf_counter()
+                    yield content
+                if chunk.get("done"):
+                    self._record(chunk, start, first_token, speculation)
+        finally:
+            if speculation is not None:
+                speculation.cancel()
+            if response is not None:
+                response.close()
+            with self.lock:
+                self.active -= 1
+                self.idle.notify_all()
+
+    def _record(self, final, start, first_token, speculation=None):
+        stats = {
+            "prompt_tokens": final.get("prompt_eval_count", 0),  # Only tokens not served from the cache
+            "prompt_ms": round(_ms(final.get("prompt_eval_duration")), 1),
+            "gen_tokens": final.get("eval_count", 0),
+            "gen_ms": round(_ms(final.get("eval_duration")), 1),
+            "load_ms": round(_ms(final.get("load_duration")), 1),
+            "ttft_ms": round((first_token - start) * 1000, 1) if first_token else None,
+            # How long the reply had already been running when stream() was called
+            "head_start_ms": round((start - speculation.started) * 1000, 1) if speculation else 0.0,
+            "turns": len(self.turns),
+            "history_tokens": self.memory.prompt_tokens(),
+        }
+        self.last_stats = stats
+        with self.lock:
+            self.turn_stats.append(stats)
+
+    def commit(self, text, reply):
+        """Keep a finished turn (the memory evicts and summarizes when over budget)."""
+        self.memory.add(text, reply)
+        self.discard()
+
+    def discard(self):
+        """End the current turn without keeping it (reply failed or was cancelled)."""
+        with self.lock:
+            self.turn_open = False
+            self.idle.notify_all()
+
+    def reset(self, turns=None):
+        """Replace the kept turns (the next request re-evaluates everything after the system prompt)."""
+        self.memory.reset(turns)
+
+    def _idle(self):
+        """No reply streaming, no turn waiting for its commit, no live speculation (lock held)."""
+        speculation = self.speculation
+        return (not self.active and not self.turn_open
+                and (speculation is None or speculation.cancelled.is_set()))
+
+    def _cancel_summary(self):
+        """Stop a summarize() request so the reply that is starting doesn't queue behind it."""
+        with self.lock:
+            self.summary_cancelled.set()
+            response = self.summary_response
+        if response is not None:
+            response.close()
+
+    def summarize(self, summary, turns, words=120):
+        """
+        Fold `turns` into `summary` with the model (ConversationMemory's summarizer)
+
+        Runs on the memory's background thread. Ollama serves one request at a
+        time per model, so a summary generating up to `words` * 2 tokens would
+        hold the next reply back for as long. Instead it waits until no reply is
+        streaming or waiting to be committed, and a reply or speculation that
+        starts meanwhile cancels it; it is retried at the next idle moment. The
+        cost is that the folded turns stay in the prompt (over budget) until
+        such a moment comes, usually while the reply is being spoken. The prompt
+        changes after a fold anyway, so the next turn re-evaluates once either way.
+        """
+        transcript = "\n".join(f"User: {user}\nJarvis: {bot}" for user, bot in turns)
+        if summary:
+            transcript = f"Summary so far: {summary}\n\n{transcript}"
+        messages = [{"role": "system", "content": SUMMARY_PROMPT.format(words=words)},
+                    {"role": "user", "content": transcript}]
+        while True:
+            with self.lock:
+                while not self._idle():
+                    self.idle.wait(1.0)  # Timed: expired speculations don't notify
+                self.summary_cancelled.clear()
+            pieces = []
+            response = None
+            try:
+                response = self._post(messages, options={"num_predict": words * 2})
+                with self.lock:
+                    self.summary_response = response
+                if not self.summary_cancelled.is_set():
+                    for chunk in self._chunks(response):
+                        pieces.append(chunk.get("message", {}).get("content", ""))
+            except Exception:
+                if not self.summary_cancelled.is_set():
+                    raise
+            finally:
+                with self.lock:
+                    self.summary_response = None
+                if response is not None:
+                    response.close()
+            if not self.summary_cancelled.is_set():
+                return "".join(pieces).strip()
+
+    def stats(self):
+        """Median per-turn timings over recent turns."""
+        with self.lock:
+            recent = list(self.turn_stats)
+        if not recent:
+            return None
+
+        def median(key):
+            values = sorted(s[key] for s in recent if s.get(key) is not None)
+            return values[len(values) // 2] if values else None
+
+        gen_ms = sum(s["gen_ms"] for s in recent)
+        gen_tokens = sum(s["gen_tokens"] for s in recent)
+        return {
+            "turns": len(recent),
+            "prompt_tokens": median("prompt_tokens"),
+            "prompt_ms": median("prompt_ms"),
+            "ttft_ms": median("ttft_ms"),
+            "tokens_per_s": round(gen_tokens / gen_ms * 1000, 1) if gen_ms else None,
+        }
+
+
+def _stub_server(prefill_ms_per_token=2.0, gen_ms_per_token=4.0, load_ms=400):
+    """A tiny imitation of Ollama's /api/chat with a prefix (KV) cache."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    state = {"loaded": False, "cached": [], "requests": [], "cancelled": 0}
+
+    class Stub(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            state["requests"].append(body)
+            tokens = [w for m in body["messages"] for w in (m["role"] + " " + m["content"]).split()]
+
+            load = 0 if state["loaded"] else load_ms
+            state["loaded"] = body.get("keep_alive") not in (0, "0")
+            cached = state["cached"] if load == 0 else []
+            common = 0
+            while common < min(len(cached), len(tokens)) and cached[common] == tokens[common]:
+                common += 1
+            evaluated = len(tokens) - common
+            time.sleep((load + evaluated * prefill_ms_per_token) / 1000)
+
+            words = "Well, hmm, that is a really good question and here is my answer.".split()
+            reply = words[:body.get("options", {}).get("num_predict", len(words))]
+            state["cached"] = tokens + ["assistant"] + reply
+            final = {"message": {"role": "assistant", "content": ""}, "done": True,
+                     "load_duration": load * 1e6, "prompt_eval_count": evaluated,
+                     "prompt_eval_duration": evaluated * prefill_ms_per_token * 1e6,
+                     "eval_count": len(reply), "eval_duration": len(reply) * gen_ms_per_token * 1e6}
+
+            if not body.get("stream", True):
+                time.sleep(len(reply) * gen_ms_per_token / 1000)
+                final["message"]["content"] = " ".join(reply)
+                data = json.dumps(final).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def send(obj):
+                data = (json.dumps(obj) + "\n").encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+            try:
+                for word in reply:
+                    time.sleep(gen_ms_per_token / 1000)
+                    send({"message": {"role": "assistant", "content": word + " "}, "done": False})
+                send(final)
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                state["cancelled"] += 1  # Client cancelled the request
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Stub)
+    server.state = state  # Requests received and cancelled, for tests
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _demo(turns=12):
+    system = "You are Jarvis, a helpful assistant. " * 20
+    questions = [f"question number {i} about something fairly long and detailed" for i in range(turns)]
+
+    def run(label, session, sliding):
+        print(label)
+        history = []
+        for i, question in enumerate(questions):
+            reply = "".join(session.stream(question))
+            if sliding:
+                # The old chat(): full history resent, oldest turn popped every turn
+                history.append((question, reply))
+                if len(history) > 5:
+                    history.pop(0)
+                session.reset(history)
+            else:
+                session.commit(question, reply)
+            s = session.last_stats
+            print(f"  turn {i + 1:2d}: {s['prompt_tokens']:4d} prompt tokens evaluated, "
+                  f"prefill {s['prompt_ms']:6.1f} ms, load {s['load_ms']:5.0f} ms, TTFT {s['ttft_ms']:6.1f} ms")
+
+    server = _stub_server()
+    host = f"http://127.0.0.1:{server.server_address[1]}"
+    # Ollama's default keep_alive is 5 minutes, which the old code relied on
+    run("Sliding history (old behaviour):", ChatSession(system_prompt=system, host=host, keep_alive="5m"), True)
+    server.shutdown()
+
+    server = _stub_server()
+    session = ChatSession(system_prompt=system, host=f"http://127.0.0.1:{server.server_address[1]}")
+    session.warm(background=False)
+    run("ChatSession (keep_alive, append-only prefix):", session, False)
+    print(f"  median: {session.stats()}")
+    server.shutdown()
+
+    _speculation_demo(system)
+
+
+def _speculation_demo(system, delay_s=0.05, turns=5):
+    """Time from transcript to first token when the reply starts after command handling vs speculatively."""
+    server = _stub_server()
+    session = ChatSession(system_prompt=system, host=f"http://127.0.0.1:{server.server_address[1]}")
+    session.warm(background=False)
+    print(f"Transcript to first token, {delay_s * 1000:.0f} ms of command handling before chat():")
+    for label, speculative in (("after command handling", False), ("speculative start", True)):
+        latencies = []
+        for i in range(turns):
+            text = f"tell me something interesting, take {label} {i}"
+            arrived = time.perf_counter()
+            if speculative:
+                session.speculate(text)
+            time.sleep(delay_s)  # Routing, waiting for a worker, answer cache lookup...
+            stream = session.stream(text)
+            reply = next(stream)
+            latencies.append((time.perf_counter() - arrived) * 1000)
+            session.commit(text, reply + "".join(stream))
+        print(f"  {label:<24} {sorted(latencies)[len(latencies) // 2]:6.1f} ms (median of {turns})")
+
+    session.speculate("what time is it")
+    time.sleep(0.01)
+    session.cancel_speculation()  # A deterministic intent matched
+    print(f"  cancelled speculation left {len(session.turns)} turns in the session "
+          f"and {session.active} replies streaming")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    _demo()
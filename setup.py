@@ -257,22 +257,16 @@ while True:
     cv2.putText(frame, display_text, (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, emotion_color, 2)
     
     # System Stats Overlay (Right Side)
-    try:
-        import psutil
-        cpu = psutil.cpu_percent()
-        mem = psutil.virtual_memory().percent
-        
+    # Latest reading from the background sampler (no psutil calls per frame)
+    stats = ai_assistant.system_monitor.latest()
+    if stats:
         cv2.putText(frame, "SYSTEM STATUS", (width-220, 50), cv2.FONT_HERSHEY_PLAIN, 1, CYAN, 1)
-        cv2.putText(frame, f"CPU: {cpu}%", (width-220, 70), cv2.FONT_HERSHEY_PLAIN, 1, White, 1)
-        cv2.putText(frame, f"RAM: {mem}%", (width-220, 90), cv2.FONT_HERSHEY_PLAIN, 1, White, 1)
+        cv2.putText(frame, f"CPU: {stats['cpu']:.0f}%", (width-220, 70), cv2.FONT_HERSHEY_PLAIN, 1, White, 1)
+        cv2.putText(frame, f"RAM: {stats['memory']:.0f}%", (width-220, 90), cv2.FONT_HERSHEY_PLAIN, 1, White, 1)
         
         # Power
-        batt = psutil.sensors_battery()
-        if batt:
-            cv2.putText(frame, f"PWR: {batt.percent}%", (width-220, 110), cv2.FONT_HERSHEY_PLAIN, 1, White, 1)
-            
-    except ImportError:
-        pass
+        if stats["battery"] is not None:
+            cv2.putText(frame, f"PWR: {stats['battery']:.0f}%", (width-220, 110), cv2.FONT_HERSHEY_PLAIN, 1, White, 1)
 
     # Clock Overlay (Bottom Left)
     now_str = time.strftime("%H:%M:%S")
@@ -0,0 +1,305 @@
+"""
+Speech Chunking for Jarvis AI Assistant
+Splits streamed LLM output into pieces for TTS. Complete sentences are
+emitted as before; in speculative mode a stable clause-level prefix of the
+sentence still being generated (up to a comma, or a run of finished words)
+goes out early so synthesis of it overlaps generation of the rest. When the
+sentence ends, only the part that has not been spoken yet is emitted, so
+the pieces always add up to exactly the generated text.
+
+Sentence boundaries come from SentenceSegmenter, which scans each piece of
+the stream once (it keeps an offset instead of re-splitting the buffer per
+token), skips abbreviations, initials and list numbers, and merges
+fragments that are too short to be worth a TTS request of their own.
+
+Run this module directly to benchmark segmentation on token streams (JSON
+lines, each a list of the content pieces Ollama streamed):
+
+    python speech_stream.py [streams.jsonl]
+"""
+
+import re
+import sys
+import json
+import time
+
+# A run of terminators (plus closing quotes, brackets or *action* markers) followed by
+# whitespace, or a line break
+_SENTENCE_END = re.compile(r'[.?!\u2026]+["\')\]*\u201d]*\s+|\n\s*')
+_END_CHAR = re.compile(r'[.?!\u2026\n]')
+_TAIL_CHARS = '.?!\u2026"\')]*\u201d'
+_LAST_WORD = re.compile(r'([\w.]+)[.?!\u2026]*["\')\]*\u201d]*\s*$')
+# Words whose trailing period doesn't end a sentence
+ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "approx",
+                 "e.g", "i.e", "u.s", "fig"}
+# Only abbreviations when a number follows ("No. 5", "Oct. 2"); "simply no." ends a sentence
+NUMBER_ABBREVIATIONS = {"no", "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept",
+                        "oct", "nov", "dec"}
+# Clause boundaries where a speculative cut still sounds natural
+_CLAUSE_END = re.compile(r'[,;:—]\s+')
+
+
+def _balanced(text):
+    """True if no *action* marker or (aside) is left open in `text`."""
+    return text.count("*") % 2 == 0 and text.count("(") <= text.count(")")
+
+
+class SentenceSegmenter:
+    def __init__(self, min_chars=20):
+        """
+        Initialize the segmenter
+
+        Args:
+            min_chars: Sentences shorter than this ("Oh! ") are joined with the next one
+        """
+        self.min_chars = min_chars
+        self.buffer = ""
+        self.start = 0  # Offset in `buffer` where the current sentence begins
+        self.scan = 0   # Offset from which terminators haven't been looked for yet
+
+    @property
+    def pending(self):
+        """Text of the sentence still being generated."""
+        return self.buffer[self.start:]
+
+    def _is_boundary(self, m):
+        """False for "Dr. ", "J. K. ", "No. 5", "1. " (list item), '"Really?" she said' and the like."""
+        following = self.buffer[m.end()]
+        if following.islower():
+            return False
+        if m.group()[0] != ".":
+            return True
+        word = _LAST_WORD.search(self.buffer, max(self.start, m.start() - 24), m.end())
+        if word is None:
+            return True
+        raw = word.group(1).rstrip(".")
+        token = raw.lower()
+        if token in ABBREVIATIONS or (token in NUMBER_ABBREVIATIONS and following.isdigit()):
+            return False
+        # Initials are capitals ("J. K. Rowling"), but "So do I." ends a sentence
+        if len(raw) == 1 and raw.isupper() and raw != "I":
+            return False
+        # A bare number opening a line is a list marker, not a sentence
+        before = self.buffer[self.start:word.start()]
+        return not (token.isdigit() and (not before.strip() or before.endswith("\n")))
+
+    def feed(self, text):
+        """
+        Add streamed text
+
+        Returns:
+            list: Every sentence completed by this text, in order
+        """
+        if self.scan == len(self.buffer) and not _END_CHAR.search(text):
+            # Nothing pending and no terminator in the new text (most tokens)
+            self.buffer += text
+            self.scan = len(self.buffer)
+            return []
+        self.buffer += text
+        sentences = []
+        for m in _SENTENCE_END.finditer(self.buffer, self.scan):
+            if m.end() == len(self.buffer):
+                # The whitespace run (or closing quotes) may continue in the next piece
+                self.scan = m.start()
+                return self._compact(sentences)
+            self.scan = m.end()
+            if not self._is_boundary(m):
+                continue
+            if len(self.buffer[self.start:m.end()].strip()) < self.min_chars:
+                continue
+            sentences.append(self.buffer[self.start:m.end()])
+            self.start = m.end()
+        # Only a trailing run of terminators / closing marks can still become a boundary
+        self.scan = max(self.scan, len(self.buffer.rstrip(_TAIL_CHARS)))
+        return self._compact(sentences)
+
+    def _compact(self, sentences):
+        if self.start:
+            self.buffer = self.buffer[self.start:]
+            self.scan -= self.start
+            self.start = 0
+        return sentences
+
+    def flush(self):
+        """Whatever is left at the end of the stream (may be empty)."""
+        rest = self.buffer
+        self.buffer = ""
+        self.start = self.scan = 0
+        return rest if rest.strip() else ""
+
+
+class SpeechChunker:
+    def __init__(self, speculative=True, min_clause_chars=24, max_words=14, min_sentence_chars=20):
+        """
+        Initialize the chunker
+
+        Args:
+            speculative: Emit clause prefixes before the sentence terminator arrives
+            min_clause_chars: Shortest clause worth synthesizing on its own
+            max_words: Finished words after which a prefix goes out even without a comma
+            min_sentence_chars: Shorter sentences are joined with the next one
+        """
+        self.speculative = speculative
+        self.min_clause_chars = min_clause_chars
+        self.max_words = max_words
+        self.segmenter = SentenceSegmenter(min_sentence_chars)
+        self.spoken = 0   # Characters of the unfinished sentence already emitted speculatively
+
+    def _stable_prefix(self):
+        """End offset (into the unfinished sentence) of the longest prefix safe to speak now, or 0."""
+        pending = self.segmenter.pending[self.spoken:]
+
+        # Prefer the last clause boundary that leaves a long enough clause
+        cut = 0
+        for m in _CLAUSE_END.finditer(pending):
+            clause = pending[:m.end()]
+            if len(clause.strip()) >= self.min_clause_chars and _balanced(clause):
+                cut = m.end()
+        if cut:
+            return self.spoken + cut
+
+        # No usable comma: fall back to a run of words that are followed by whitespace
+        words = pending.split()
+        if pending and not pending[-1].isspace():
+            words = words[:-1]  # Last word may still be growing
+        if len(words) < self.max_words:
+            return 0
+        for m in reversed(list(re.finditer(r'\s+', pending))):
+            if _balanced(pending[:m.end()]):
+                return self.spoken + m.end()
+        return 0
+
+    def feed(self, text):
+        """
+        Add streamed text
+
+        Returns:
+            list: Pieces ready to be spoken, in order
+        """
+        pieces = []
+        for sentence in self.segmenter.feed(text):
+            # Reconcile: speak only what the speculative prefixes didn't cover
+            piece = sentence[self.spoken:]
+            self.spoken = max(0, self.spoken - len(sentence))
+            if piece.strip():
+                pieces.append(piece)
+
+        if self.speculative:
+            end = self._stable_prefix()
+            if end > self.spoken:
+                pieces.append(self.segmenter.pending[self.spoken:end])
+                self.spoken = end
+
+        return pieces
+
+    def flush(self):
+        """Remaining unspoken text at the end of the stream (may be empty)."""
+        rest = self.segmenter.flush()[self.spoken:]
+        self.spoken = 0
+        return rest if rest.strip() else ""
+
+
+# Replies in the style the system prompt asks for, used when no recorded streams are given
+SAMPLE_REPLIES = [
+    "Hmm... Well, that's a great question! *giggles* The Eiffel Tower was finished in 1889. "
+    "It's about 330 m tall, roughly 1,083 ft. Mr. Eiffel's company built it for the World's Fair. "
+    "Oh! And it was only meant to stand for 20 years.",
+    "Oh! *clears throat* Okay, here are three ideas:\n1. Take a short walk.\n2. Drink some water.\n"
+    "3. Call a friend. Dr. Lee says even 5 min. of sunlight helps, e.g. at lunch. Does that sound good?",
+    "Well... *sighs* I can't see your screen, sorry! But if you tell me what it says, I'll help. "
+    "Version 3.12 of Python came out on Oct. 2, 2023, and it's faster than 3.11 by about 5%. "
+    "\"Really?\" you ask. Yes, really! *laughs*",
+]
+
+
+def _token_stream(text, rng):
+    """Split `text` into pieces shaped like LLM tokens (word fragments with leading spaces)."""
+    tokens = []
+    for word in re.findall(r"\s*\S+", text):
+        while len(word) > 4:
+            cut = rng.randint(2, 4)
+            tokens.append(word[:cut])
+            word = word[cut:]
+        tokens.append(word)
+    return tokens
+
+
+def _legacy_segments(tokens):
+    """The loop chat() used to run: re-split the whole buffer on every token, one sentence at a time."""
+    pieces, emitted_at, buffer = [], [], ""
+    for i, token in enumerate(tokens):
+        buffer += token
+        if any(punct in buffer for punct in [". ", "? ", "! ", ".\n", "?\n", "!\n"]):
+            import re as _re  # (re-imported per token, as it was)
+            parts = _re.split(r'([.?!]\s+)', buffer)
+            if len(parts) > 1:
+                pieces.append(parts[0] + parts[1])
+                emitted_at.append(i)
+                buffer = "".join(parts[2:])
+    if buffer.strip():
+        pieces.append(buffer)
+        emitted_at.append(len(tokens) - 1)
+    return pieces, emitted_at
+
+
+def _segments(tokens, min_chars=20):
+    segmenter = SentenceSegmenter(min_chars)
+    pieces, emitted_at = [], []
+    for i, token in enumerate(tokens):
+        for sentence in segmenter.feed(token):
+            pieces.append(sentence)
+            emitted_at.append(i)
+    rest = segmenter.flush()
+    if rest:
+        pieces.append(rest)
+        emitted_at.append(len(tokens) - 1)
+    return pieces, emitted_at
+
+
+def _lag(tokens, pieces, emitted_at):
+    """Mean number of chunks between a sentence's last character arriving and its emission."""
+    arrived, total = [], 0
+    for token in tokens:
+        total += len(token)
+        arrived.append(total)
+    lags, offset = [], 0
+    for piece, index in zip(pieces, emitted_at):
+        end = offset + len(piece.rstrip())
+        offset += len(piece)
+        complete = next(i for i, n in enumerate(arrived) if n >= end)
+        lags.append(index - complete)
+    return sum(lags) / len(lags) if lags else 0.0
+
+
+def benchmark(streams, repeat=200):
+    """Time both segmenters over token streams and compare emission lag and splits."""
+    for batch in (1, 8):
+        # Larger chunks stand in for network-batched streams and answers replayed whole
+        chunked = [["".join(tokens[i:i + batch]) for i in range(0, len(tokens), batch)] for tokens in streams]
+        print(f"Chunks of {batch} token(s):")
+        for name, run in (("legacy re.split loop", _legacy_segments), ("SentenceSegmenter", _segments)):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for tokens in chunked:
+                    run(tokens)
+            elapsed = time.perf_counter() - start
+            token_count = sum(len(tokens) for tokens in streams) * repeat
+            results = [(tokens, *run(tokens)) for tokens in chunked]
+            sentences = sum(len(pieces) for _, pieces, _ in results)
+            lag = sum(_lag(*r) for r in results) / len(results)
+            print(f"  {name:<22} {elapsed / token_count * 1e6:6.2f} us/token, {sentences} pieces, "
+                  f"mean emission lag {lag:.2f} chunks")
+    print("\nSentenceSegmenter pieces of the first stream:")
+    for piece in _segments(streams[0])[0][:8]:
+        print(f"  {piece!r}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding="utf-8") as f:
+            streams = [json.loads(line) for line in f if line.strip()]
+    else:
+        import random
+        rng = random.Random(0)
+        streams = [_token_stream(text, rng) for text in SAMPLE_REPLIES * 4]
+    benchmark(streams)
@@ -0,0 +1,143 @@
+"""
+Speech Text Normalizer for Jarvis AI Assistant
+Turns LLM output into something pleasant for TTS: roleplay action markers
+like *laughs* become vocal sounds, silent actions and leftover bracketed
+asides are dropped, and "..." is removed. Everything is done with one
+precompiled alternation regex and a dispatch table.
+
+Run this module directly for a micro-benchmark against the old
+pattern-by-pattern implementation.
+"""
+
+import re
+
+# Action marker -> what the voice should say instead (empty = silent action)
+ACTION_SOUNDS = {
+    ("laughs", "laughter", "laughing", "chuckles", "giggles", "rofl", "lol"): " Haha! ",
+    ("sighs", "sighing"): " hh... ",
+    ("clears throat", "ahem"): " mm-hm ",
+    ("gasps", "gasp"): " oh! ",
+    ("yawn", "yawns"): " yawn... ",
+    ("cries", "sobs", "sniffles"): " snff... ",
+    ("hums", "humming"): " hmm hmm ",
+    ("screams", "shouts"): " ah! ",
+    ("smirk", "smirks", "smirking"): " heh. ",
+    ("blushes", "shy", "acting shy"): " um... ",
+    ("pauses", "thinking", "thinks"): " hmm... ",
+    ("winks", "nods", "shrugs", "smiles", "frowns", "looks", "points", "waves",
+     "stares", "leans", "bounces", "beams"): "",
+}
+
+_ELLIPSIS = re.compile(r'(\.\.\.|…)')
+
+
+def _build_dispatch():
+    dispatch = {}
+    for words, sound in ACTION_SOUNDS.items():
+        # "..." is stripped from the output anyway, so bake that in once here
+        sound = _ELLIPSIS.sub(' ', sound)
+        for word in words:
+            dispatch[word] = sound
+    return dispatch
+
+
+_DISPATCH = _build_dispatch()
+
+# Longest words first so "acting shy" wins over "shy" and "laughter" over "laughs"
+_WORDS = "|".join(re.escape(w) for w in sorted(_DISPATCH, key=len, reverse=True))
+
+# One pass: action marker | ellipsis | any other bracketed aside
+_SPEECH_PATTERN = re.compile(
+    r'\s*[\(\*]+(?P<action>' + _WORDS + r')[\)\*]+'
+    r'|(?P<ellipsis>\.\.\.|…)'
+    r'|\s*[\(\*][^\)\*]+[\)\*]\s*',
+    re.IGNORECASE,
+)
+
+
+def _replace(match):
+    action = match.group("action")
+    if action is not None:
+        return _DISPATCH[action.lower()]
+    return " "
+
+
+def normalize_speech_text(text):
+    """
+    Prepare one chunk of assistant text for TTS
+
+    Args:
+        text: Raw text (usually one sentence of LLM output)
+
+    Returns:
+        str: Text with action markers voiced, asides removed and whitespace collapsed
+    """
+    return " ".join(_SPEECH_PATTERN.sub(_replace, text).split())
+
+
+def _legacy_normalize(text):
+    """The original speak() preprocessing, kept for the benchmark."""
+    replacements = {
+        r'[\(\*]+(laughs|laughter|laughing|chuckles|giggles|rofl|lol)[\)\*]+': ' Haha! ',
+        r'[\(\*]+(sighs|sighing)[\)\*]+': ' hh... ',
+        r'[\(\*]+(clears throat|ahem)[\)\*]+': ' mm-hm ',
+        r'[\(\*]+(gasps|gasp)[\)\*]+': ' oh! ',
+        r'[\(\*]+(yawn|yawns)[\)\*]+': ' yawn... ',
+        r'[\(\*]+(cries|sobs|sniffles)[\)\*]+': ' snff... ',
+        r'[\(\*]+(hums|humming)[\)\*]+': ' hmm hmm ',
+        r'[\(\*]+(screams|shouts)[\)\*]+': ' ah! ',
+        r'[\(\*]+(smirk|smirks|smirking)[\)\*]+': ' heh. ',
+        r'[\(\*]+(blushes|shy|acting shy)[\)\*]+': ' um... ',
+        r'[\(\*]+(pauses|thinking|thinks)[\)\*]+': ' hmm... ',
+        r'[\(\*]+(winks|nods|shrugs|smiles|frowns|looks|points|waves|stares|leans|bounces|beams)[\)\*]+': '',
+    }
+    for pattern, replacement in replacements.items():
+        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+    text = re.sub(r'(\.\.\.|…)', ' ', text)
+    text = re.sub(r'\s*[\(\*][^\)\*]+[\)\*]\s*', ' ', text)
+    return text.strip()
+
+
+# Representative chunks of what the personality prompt makes the LLM say
+BENCHMARK_CORPUS = [
+    "Hmm... *giggles* Well, hello there!",
+    "Oh! *gasps* You remembered my name? That's so sweet of you.",
+    "*clears throat* The weather today is sunny with a high of 24 degrees.",
+    "Well... (thinking) I'd say the capital of Australia is Canberra, not Sydney.",
+    "*laughs* You're funny! *winks* But seriously, I can help with that.",
+    "I'm not sure… *sighs* Let me try again.",
+    "**Giggles** Okay okay, I'll stop teasing you.",
+    "Here's a fun fact: honey never spoils. (It's true!) *smiles*",
+    "Sure thing! I set a reminder for 5 PM to call your mom.",
+    "*Acting shy* Um, do you really think so?",
+    "Plain sentence without any markers that still needs to go through the pipeline.",
+    "*hums* La la la... *pauses* Where was I? Oh right, your calendar.",
+]
+
+
+def benchmark(iterations=2000):
+    """Compare the compiled normalizer with the legacy path over the corpus."""
+    import timeit
+
+    for chunk in BENCHMARK_CORPUS:
+        old = " ".join(_legacy_normalize(chunk).split())
+        new = normalize_speech_text(chunk)
+        if old != new:
+            print(f"MISMATCH: {chunk!r}\n  legacy: {old!r}\n  new:    {new!r}")
+
+    def run(fn):
+        for chunk in BENCHMARK_CORPUS:
+            fn(chunk)
+
+    chunks = iterations * len(BENCHMARK_CORPUS)
+    legacy = min(timeit.repeat(lambda: run(_legacy_normalize), number=iterations, repeat=3))
+    compiled = min(timeit.repeat(lambda: run(normalize_speech_text), number=iterations, repeat=3))
+
+    print(f"Chunks per run: {chunks}")
+    print(f"Legacy:   {legacy * 1e6 / chunks:.2f} us/chunk")
+    print(f"Compiled: {compiled * 1e6 / chunks:.2f} us/chunk")
+    print(f"Speedup:  {legacy / compiled:.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark()
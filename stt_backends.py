@@ -0,0 +1,140 @@
+"""
+Speech Recognition Backends for Jarvis AI Assistant
+A small interface over speech-to-text engines. Google (network, whole
+utterance) is the original behaviour; Vosk is a local streaming engine
+that is fed audio frame by frame while the user talks and reports partial
+hypotheses, so routing can start before the utterance is finished and the
+final transcript is ready the moment the endpoint is detected.
+"""
+
+import os
+import json
+
+import speech_recognition as sr
+
+try:
+    import vosk
+    vosk.SetLogLevel(-1)
+except ImportError:
+    vosk = None
+    print("Warning: vosk not installed. Offline speech recognition disabled.")
+
+
+class STTSession:
+    """One utterance. Frames go in with accept(); finish() returns the transcript."""
+
+    def accept(self, data):
+        """
+        Feed one chunk of mono int16 PCM
+
+        Returns:
+            str: Updated partial hypothesis, or None if it did not change
+        """
+        return None
+
+    def finish(self, audio):
+        """
+        Final transcript
+
+        Args:
+            audio: The whole utterance as sr.AudioData
+
+        Raises:
+            sr.UnknownValueError: Nothing intelligible was said
+        """
+        raise NotImplementedError
+
+
+class STTBackend:
+    name = "base"
+    streaming = False  # True if sessions produce partials from accept()
+
+    def available(self):
+        return True
+
+    def start(self, sample_rate):
+        """Open a session for an utterance sampled at `sample_rate`."""
+        raise NotImplementedError
+
+
+class _GoogleSession(STTSession):
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+
+    def finish(self, audio):
+        return self.recognizer.recognize_google(audio)
+
+
+class GoogleSTTBackend(STTBackend):
+    name = "google"
+
+    def __init__(self, recognizer=None):
+        self.recognizer = recognizer or sr.Recognizer()
+
+    def start(self, sample_rate):
+        return _GoogleSession(self.recognizer)
+
+
+class _VoskSession(STTSession):
+    def __init__(self, model, sample_rate):
+        self.recognizer = vosk.KaldiRecognizer(model, sample_rate)
+        self.segments = []  # Finalized pieces (Vosk finalizes at its own internal pauses)
+        self.partial = ""
+
+    def _text(self, extra=""):
+        return " ".join(s for s in self.segments + [extra] if s)
+
+    def accept(self, data):
+        if self.recognizer.AcceptWaveform(data):
+            segment = json.loads(self.recognizer.Result()).get("text", "")
+            if segment:
+                self.segments.append(segment)
+            partial = self._text()
+        else:
+            partial = self._text(json.loads(self.recognizer.PartialResult()).get("partial", ""))
+
+        if partial == self.partial:
+            return None
+        self.partial = partial
+        return partial
+
+    def finish(self, audio):
+        text = self._text(json.loads(self.recognizer.FinalResult()).get("text", ""))
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+class VoskSTTBackend(STTBackend):
+    name = "vosk"
+    streaming = True
+
+    def __init__(self, model_path="models/vosk-model-small-en-us"):
+        self.model_path = model_path
+        self.model = None
+
+    def available(self):
+        return vosk is not None and os.path.isdir(self.model_path)
+
+    def start(self, sample_rate):
+        if self.model is None:
+            print(f"Loading Vosk model: {self.model_path}...")
+            self.model = vosk.Model(self.model_path)
+        return _VoskSession(self.model, sample_rate)
+
+
+def create_stt_backend(name="auto", vosk_model_path="models/vosk-model-small-en-us"):
+    """
+    Pick a recognizer backend
+
+    Args:
+        name: "google", "vosk", or "auto" (Vosk when its model is installed)
+        vosk_model_path: Directory of an unpacked Vosk model
+    """
+    if name in ("auto", "vosk"):
+        backend = VoskSTTBackend(vosk_model_path)
+        if backend.available():
+            return backend
+        if name == "vosk":
+            print(f"Warning: Vosk model not found at {vosk_model_path}. Using Google STT.")
+    return GoogleSTTBackend()
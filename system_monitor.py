@@ -0,0 +1,118 @@
+"""
+System Monitoring for Jarvis AI Assistant
+A background thread samples CPU, memory and battery at a fixed rate into a
+ring buffer, so the "system status" command and the HUD read the latest
+values instead of calling psutil themselves (cpu_percent(interval=1)
+blocked for a whole second). Running prefix sums make recent averages and
+trends O(1) as well.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+FIELDS = ("cpu", "memory", "battery")
+
+
+class SystemMonitor:
+    def __init__(self, interval=1.0, history_s=600, battery_every=10):
+        """
+        Initialize the monitor (call start() to begin sampling)
+
+        Args:
+            interval: Seconds between samples
+            history_s: How far back averages and trends can look
+            battery_every: Read the battery every N samples (slow on some platforms)
+        """
+        self.interval = interval
+        self.battery_every = max(1, battery_every)
+        self.size = max(2, int(history_s / interval)) + 1
+        # Ring of prefix sums per field over valid (non-NaN) samples up to global sample n:
+        # rows are count, sum(x), sum(n * x), sum(n), sum(n * n)
+        self.prefix = np.zeros((self.size, 5, len(FIELDS)))
+        self.count = 0  # Samples taken so far
+        self.last = None  # Latest sample as a dict
+        self.battery = np.nan  # Last battery reading (refreshed every `battery_every` samples)
+        self.plugged = None
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    @property
+    def available(self):
+        return psutil is not None
+
+    def start(self):
+        """Start the sampler thread (no-op without psutil or if already running)."""
+        if not self.available or self.thread is not None:
+            return
+        # One short blocking reading so there is a sample right away; it also primes
+        # cpu_percent(interval=None), whose first reading would be meaningless
+        self._sample(psutil.cpu_percent(interval=0.1))
+        self.thread = threading.Thread(target=self._run, daemon=True, name="System_Monitor")
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self._sample(psutil.cpu_percent(interval=None))
+            except Exception as e:
+                print(f"System Monitor Error: {e}")
+
+    def _sample(self, cpu):
+        if self.count % self.battery_every == 0:
+            reading = psutil.sensors_battery()
+            self.battery = reading.percent if reading else np.nan
+            self.plugged = reading.power_plugged if reading else None
+        self.add(cpu, psutil.virtual_memory().percent, self.battery)
+
+    def add(self, cpu, memory, battery=np.nan):
+        """Record one sample (called by the sampler thread)."""
+        values = np.array([cpu, memory, battery], dtype=float)
+        valid = ~np.isnan(values)
+        x = np.where(valid, values, 0.0)
+        with self.lock:
+            n = self.count
+            terms = np.array([valid, x, n * x, n * valid, n * n * valid], dtype=float)
+            previous = self.prefix[(n - 1) % self.size] if n else 0.0
+            self.prefix[n % self.size] = previous + terms
+            self.count = n + 1
+            self.last = {"time": time.time(), "cpu": cpu, "memory": memory,
+                         "battery": None if np.isnan(battery) else battery, "plugged": self.plugged}
+
+    def latest(self):
+        """Most recent sample ({"time", "cpu", "memory", "battery", "plugged"}) or None."""
+        return self.last
+
+    def _window(self, field, seconds):
+        """(count, sum x, sum n*x, sum n, sum n*n) of `field` over the last `seconds`."""
+        k = min(max(1, int(round(seconds / self.interval))), self.size - 1)
+        with self.lock:
+            if not self.count:
+                return np.zeros(5)
+            end = self.prefix[(self.count - 1) % self.size]
+            start = self.prefix[(self.count - 1 - k) % self.size] if self.count > k else 0.0
+            return (end - start)[:, FIELDS.index(field)]
+
+    def average(self, field, seconds=10.0):
+        """Mean of `field` over the last `seconds` (None if unknown)."""
+        count, total, _, _, _ = self._window(field, seconds)
+        return float(total / count) if count else None
+
+    def trend(self, field, seconds=60.0):
+        """Least-squares slope of `field` over the last `seconds`, in units per minute (None if unknown)."""
+        count, total, weighted, sum_n, sum_nn = self._window(field, seconds)
+        denom = count * sum_nn - sum_n ** 2
+        if count < 2 or denom <= 0:
+            return None
+        slope = (count * weighted - sum_n * total) / denom  # Per sample
+        return float(slope * 60.0 / self.interval)
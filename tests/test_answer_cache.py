@@ -0,0 +1,63 @@
+import time
+
+from answer_cache import AnswerCache
+
+
+def make_cache(**kwargs):
+    return AnswerCache(path=None, **kwargs)
+
+
+def test_exact_key_ignores_case_punctuation_and_fillers():
+    cache = make_cache()
+    cache.put("wiki", "Who is Elon Musk?", "Elon Musk is a businessman.")
+    assert cache.lookup("wiki", "jarvis, who's elon musk")[0] == "Elon Musk is a businessman."
+
+
+def test_wiki_and_search_need_the_exact_key():
+    cache = make_cache()
+    cache.put("wiki", "who is george washington carver", "Carver was a scientist.")
+    cache.put("search", "best pizza in new york", "Pizza places.")
+    assert cache.lookup("wiki", "who is george washington")[0] is None
+    assert cache.lookup("search", "best pizza in new york city")[0] is None
+
+
+def test_chat_never_reuses_an_answer_to_a_different_question():
+    cache = make_cache()
+    cache.put("chat", "tell me a joke about cats", "A cat joke.")
+    cache.put("chat", "write a poem about the sea", "A sea poem.")
+    cache.put("chat", "what is 5 plus 3", "8")
+    for question in ["tell me a joke about bats", "tell me a joke about rats", "tell me a joke about cars",
+                     "write a poem about the tea", "what is 5 plus 4"]:
+        assert cache.lookup("chat", question)[0] is None, question
+
+
+def test_chat_reuses_a_reworded_question_with_the_same_content_words():
+    cache = make_cache(threshold=0.8)
+    cache.put("chat", "tell me a joke about cats", "A cat joke.")
+    assert cache.lookup("chat", "tell me joke about the cats")[0] == "A cat joke."
+
+
+def test_expired_entries_are_dropped():
+    cache = make_cache(ttls={"chat": 0.05})
+    cache.put("chat", "how are you", "Great!")
+    time.sleep(0.1)
+    assert cache.lookup("chat", "how are you")[0] is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = make_cache(max_entries=2)
+    cache.put("chat", "first question", "1")
+    cache.put("chat", "second question", "2")
+    cache.lookup("chat", "first question")
+    cache.put("chat", "third question", "3")
+    assert cache.lookup("chat", "second question")[0] is None
+    assert cache.lookup("chat", "first question")[0] == "1"
+
+
+def test_entries_persist_to_disk(tmp_path):
+    path = str(tmp_path / "answers.json")
+    cache = AnswerCache(path=path)
+    cache.put("wiki", "who is ada lovelace", "A mathematician.")
+    cache.save()
+    assert AnswerCache(path=path).lookup("wiki", "Who is Ada Lovelace?")[0] == "A mathematician."
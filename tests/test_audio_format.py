@@ -0,0 +1,18 @@
+import numpy as np
+
+from audio_format import pcm_to_mono
+
+
+def test_int16_stereo_is_averaged():
+    pcm = np.array([16384, -16384, 32767, 32767], dtype=np.int16).tobytes()
+    assert np.allclose(pcm_to_mono(pcm, 2), [0.0, 32767 / 32768])
+
+
+def test_float32_and_uint8():
+    assert np.allclose(pcm_to_mono(np.array([0.5, -0.5], dtype=np.float32).tobytes(), 1, 32), [0.5, -0.5])
+    assert np.allclose(pcm_to_mono(bytes([128, 192]), 1, 8), [0.0, 0.5])
+
+
+def test_partial_frame_is_dropped():
+    pcm = np.array([100, 200, 300], dtype=np.int16).tobytes()
+    assert len(pcm_to_mono(pcm, 2)) == 1
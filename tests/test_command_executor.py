@@ -0,0 +1,65 @@
+import threading
+import time
+
+from command_executor import CommandExecutor
+
+
+def make_executor(**kwargs):
+    spoken = []
+    executor = CommandExecutor(emit=lambda text, trace: spoken.append(text), **kwargs)
+    return executor, spoken
+
+
+def test_speech_is_released_in_command_order():
+    executor, spoken = make_executor(workers=2)
+    release = threading.Event()
+
+    def slow(text):
+        release.wait(1)
+        executor.speech("first")
+
+    first = executor.submit(slow, "slow")
+    second = executor.submit(lambda text: executor.speech("second"), "fast")
+    second.wait(1)
+    assert spoken == []
+    release.set()
+    first.wait(1)
+    time.sleep(0.05)
+    assert spoken == ["first", "second"]
+
+
+def test_timeout_starts_when_the_handler_starts():
+    executor, spoken = make_executor(workers=1, timeouts={"slow": 0.3, "queued": 0.1})
+    executor.submit(lambda text: time.sleep(0.2), "slow", intent="slow")
+    queued = executor.submit(lambda text: executor.speech("answer"), "queued", intent="queued")
+    assert queued.done.wait(1)
+    time.sleep(0.05)
+    assert spoken == ["answer"]
+
+
+def test_timed_out_command_apologizes_once_and_goes_silent():
+    executor, spoken = make_executor(timeouts={"slow": 0.1})
+
+    def slow(text):
+        time.sleep(0.3)
+        executor.speech("too late")
+
+    job = executor.submit(slow, "slow", intent="slow")
+    job.wait(1)
+    assert spoken == [executor.timeout_message]
+
+
+def test_cancel_all_silences_running_commands():
+    executor, spoken = make_executor()
+    started = threading.Event()
+
+    def handler(text):
+        started.set()
+        time.sleep(0.1)
+        executor.speech("too late")
+
+    job = executor.submit(handler, "cancel me")
+    started.wait(1)
+    executor.cancel_all()
+    job.wait(1)
+    assert spoken == []
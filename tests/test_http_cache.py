@@ -0,0 +1,147 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from http_cache import HTTPClient, TTLCache, normalize_query
+
+
+@pytest.fixture
+def upstream():
+    """Local JSON server that counts the requests it answers."""
+    hits = []
+
+    class Stub(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            hits.append(self.path)
+            if self.path.startswith("/slow"):
+                time.sleep(1.0)  # A stalled upstream
+            body = json.dumps({"hit": len(hits)}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/weather"
+    server.hits = hits
+    yield server
+    server.shutdown()
+
+
+def wait_for_refresh(client, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while client.refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not client.refreshing
+
+
+def test_normalize_query():
+    assert normalize_query("  London?! ") == "london"
+    assert normalize_query("New   York, NY") == "new york ny"
+    assert normalize_query(None) == ""
+
+
+def test_fresh_hit_does_not_touch_the_network(upstream):
+    client = HTTPClient(ttls={"weather": (60, 0)})
+    fetch = lambda: client.get_json(upstream.url)
+    assert client.cached("weather", "London", fetch) == {"hit": 1}
+    assert client.cached("weather", "  london? ", fetch) == {"hit": 1}
+    assert len(upstream.hits) == 1
+    assert client.stats["miss"] == 1 and client.stats["fresh"] == 1
+
+
+def test_stale_value_is_returned_at_once_and_refreshed_in_the_background(upstream):
+    client = HTTPClient(ttls={"weather": (0.05, 5.0)})
+    fetch = lambda: client.get_json(upstream.url)
+    assert client.cached("weather", "London", fetch) == {"hit": 1}
+    time.sleep(0.1)
+
+    assert client.cached("weather", "London", fetch) == {"hit": 1}  # Old value, no waiting
+    assert client.stats["stale"] == 1
+    wait_for_refresh(client)
+    assert len(upstream.hits) == 2
+    assert client.cached("weather", "London", fetch) == {"hit": 2}
+    assert client.stats["fresh"] == 1
+
+
+def test_one_refresh_per_key_at_a_time():
+    client = HTTPClient(ttls={"weather": (0.0, 5.0)})
+    release = threading.Event()
+    calls = []
+
+    def slow_fetch():
+        calls.append(1)
+        release.wait(2.0)
+        return "new"
+
+    client.cached("weather", "London", lambda: "old")
+    for _ in range(5):
+        assert client.cached("weather", "London", slow_fetch) == "old"
+    release.set()
+    wait_for_refresh(client)
+    assert len(calls) == 1
+
+
+def test_expired_entry_is_fetched_again(upstream):
+    client = HTTPClient(ttls={"weather": (0.05, 0.05)})
+    fetch = lambda: client.get_json(upstream.url)
+    client.cached("weather", "London", fetch)
+    time.sleep(0.15)
+    assert client.cached("weather", "London", fetch) == {"hit": 2}
+    assert client.stats["miss"] == 2 and client.stats["stale"] == 0
+
+
+def test_none_is_not_cached_and_errors_propagate_on_a_miss():
+    client = HTTPClient()
+    assert client.cached("weather", "London", lambda: None) is None
+    assert client.cached("weather", "London", lambda: "sunny") == "sunny"
+
+    def broken():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        client.cached("weather", "Paris", broken)
+
+
+def test_failed_refresh_keeps_the_stale_value():
+    client = HTTPClient(ttls={"weather": (0.0, 5.0)})
+    client.cached("weather", "London", lambda: "old")
+
+    def broken():
+        raise RuntimeError("upstream down")
+
+    assert client.cached("weather", "London", broken) == "old"
+    wait_for_refresh(client)
+    assert client.stats["refresh_errors"] == 1
+    assert client.cached("weather", "London", lambda: "new") == "old"
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2)
+    cache.put("a", 1, 60)
+    cache.put("b", 2, 60)
+    cache.get("a")
+    cache.put("c", 3, 60)
+    assert cache.get("b") == (None, None)
+    assert cache.get("a") == (1, "fresh")
+
+
+def test_read_timeout_stops_a_stalled_lookup(upstream):
+    client = HTTPClient(timeout=(1.0, 0.2))
+    slow = upstream.url.replace("/weather", "/slow")
+    start = time.monotonic()
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.cached("wiki", "Elon Musk", lambda: client.get_json(slow))
+    assert time.monotonic() - start < 0.8
+    assert client.cache.get(("wiki", "elon musk")) == (None, None)
@@ -0,0 +1,13 @@
+import pytest
+
+from intent_router import COMMAND_INTENTS, REGRESSION_CASES, IntentRouter
+
+router = IntentRouter(COMMAND_INTENTS)
+
+
+@pytest.mark.parametrize("command, intent, slot", REGRESSION_CASES)
+def test_pinned_routing(command, intent, slot):
+    route = router.route(command)
+    assert route.intent == intent
+    if slot is not None:
+        assert route.slot == slot
@@ -0,0 +1,34 @@
+import runpy
+import sys
+
+import latency_trace
+from latency_trace import LatencyTracer, load_traces, percentile
+
+
+def run_main(monkeypatch, *args):
+    monkeypatch.setattr(sys, "argv", ["latency_trace.py", *args])
+    runpy.run_path(latency_trace.__file__, run_name="__main__")
+
+
+def test_percentile():
+    assert percentile([], 50) is None
+    assert percentile([30, 10, 20], 50) == 20
+    assert percentile([30, 10, 20], 95) == 30
+
+
+def test_main_without_a_trace_file(tmp_path, monkeypatch, capsys):
+    run_main(monkeypatch, str(tmp_path / "missing.jsonl"))
+    assert "No traces recorded" in capsys.readouterr().out
+
+
+def test_main_summarizes_recorded_turns(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "traces.jsonl"
+    tracer = LatencyTracer(path=str(path))
+    trace = tracer.begin(speech_end=0.0)
+    tracer.mark(trace, "stt_done", 0.25)
+    tracer.mark(trace, "first_audio", 1.0)
+    assert load_traces(str(path))[0]["stages"] == {"speech_end": 0.0, "stt_done": 250.0, "first_audio": 1000.0}
+
+    run_main(monkeypatch, str(path))
+    out = capsys.readouterr().out
+    assert "Latency over 1 turns" in out and "first_audio" in out
@@ -0,0 +1,163 @@
+import threading
+import time
+
+import pytest
+
+from llm_session import ChatSession, _stub_server
+
+
+def make_session(**stub_kwargs):
+    server = _stub_server(**dict({"prefill_ms_per_token": 0.0, "gen_ms_per_token": 0.0, "load_ms": 0}, **stub_kwargs))
+    return server, ChatSession(system_prompt="You are Jarvis.", host=f"http://127.0.0.1:{server.server_address[1]}")
+
+
+@pytest.fixture
+def session():
+    server, session = make_session()
+    session.server = server
+    yield session
+    server.shutdown()
+
+
+@pytest.fixture
+def slow_session():
+    # Replies take ~300 ms to generate, so they can be cancelled midway
+    server, session = make_session(gen_ms_per_token=20.0)
+    session.server = server
+    yield session
+    server.shutdown()
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_every_request_keeps_the_model_loaded(session):
+    session.warm(background=False)
+    session.commit("first question", "".join(session.stream("first question")))
+    session.summarize("", session.turns)
+    requests = session.server.state["requests"]
+    assert len(requests) == 3
+    assert all(r["keep_alive"] == "30m" for r in requests)
+
+
+def test_each_prompt_extends_the_previous_one(session):
+    session.warm(background=False)
+    first = "".join(session.stream("first question"))
+    session.commit("first question", first)
+    session.commit("second question", "".join(session.stream("second question")))
+
+    warm, turn1, turn2 = [r["messages"] for r in session.server.state["requests"]]
+    assert warm == [{"role": "system", "content": "You are Jarvis."}]
+    assert turn1[:len(warm)] == warm
+    assert turn2[:len(turn1)] == turn1
+    assert turn2[len(turn1):] == [{"role": "assistant", "content": first},
+                                  {"role": "user", "content": "second question"}]
+
+
+def test_only_the_new_message_is_evaluated(session):
+    session.warm(background=False)
+    for question in ("first question", "second question"):
+        session.commit(question, "".join(session.stream(question)))
+        # The stub's prefix cache covers everything but "user <question>"
+        assert session.last_stats["prompt_tokens"] == 3
+        assert session.last_stats["load_ms"] == 0
+
+
+def test_no_speculation_until_the_previous_turn_is_committed(session):
+    reply = "".join(session.stream("first question"))
+    assert not session.speculate("second question")  # History lacks the first turn so far
+    session.commit("first question", reply)
+    assert session.speculate("second question")
+    session.cancel_speculation()
+
+
+def test_discarded_turn_reopens_speculation(session):
+    for _ in session.stream("first question"):
+        break
+    session.discard()
+    assert session.speculate("second question")
+    session.cancel_speculation()
+
+
+def test_speculative_reply_is_picked_up_by_stream(session):
+    assert session.speculate("tell me a story")
+    assert session.speculating("tell me a story")
+    time.sleep(0.05)
+    reply = "".join(session.stream("tell me a story"))
+    assert reply.startswith("Well,")
+    assert len(session.server.state["requests"]) == 1
+    assert session.last_stats["head_start_ms"] > 0
+
+
+def test_cancelled_speculation_stops_generating(slow_session):
+    state = slow_session.server.state
+    assert slow_session.speculate("what time is it")
+    assert wait_until(lambda: state["requests"])
+    slow_session.cancel_speculation()
+    assert wait_until(lambda: state["cancelled"] == 1)
+    assert not slow_session.speculating("what time is it")
+    assert slow_session.active == 0 and slow_session.turns == []
+
+
+def test_speculation_for_other_text_is_not_used(slow_session):
+    state = slow_session.server.state
+    slow_session.speculate("what time is it")
+    assert wait_until(lambda: state["requests"])
+    "".join(slow_session.stream("tell me a joke"))
+    assert [r["messages"][-1]["content"] for r in state["requests"]] == ["what time is it", "tell me a joke"]
+    assert wait_until(lambda: state["cancelled"] == 1)
+
+
+def test_abandoned_stream_closes_the_request(slow_session):
+    stream = slow_session.stream("tell me a story")
+    next(stream)
+    stream.close()  # Barge-in
+    assert wait_until(lambda: slow_session.server.state["cancelled"] == 1)
+    assert slow_session.active == 0
+    assert slow_session.last_stats is None
+
+
+def test_summary_waits_for_the_turn_to_be_committed(slow_session):
+    state = slow_session.server.state
+    reply = "".join(slow_session.stream("first question"))
+    result = []
+    worker = threading.Thread(target=lambda: result.append(slow_session.summarize("", [("a", "b")])))
+    worker.start()
+    time.sleep(0.1)
+    assert len(state["requests"]) == 1  # Turn not committed yet: no summary request
+
+    slow_session.commit("first question", reply)
+    worker.join(2.0)
+    assert result and result[0].startswith("Well,")
+    assert len(state["requests"]) == 2
+
+
+def test_starting_a_reply_cancels_the_summary(slow_session):
+    state = slow_session.server.state
+    result = []
+    worker = threading.Thread(target=lambda: result.append(slow_session.summarize("", [("a", "b")])))
+    worker.start()
+    assert wait_until(lambda: state["requests"])
+    time.sleep(0.05)  # Summary generating
+
+    reply = "".join(slow_session.stream("tell me a story"))
+    assert wait_until(lambda: state["cancelled"] == 1)
+    assert not result  # Retried only once the turn is over
+    slow_session.commit("tell me a story", reply)
+    worker.join(2.0)
+    assert result and result[0].startswith("Well,")
+    assert [r["messages"][0]["role"] for r in state["requests"]] == ["system", "system", "system"]
+    assert state["requests"][1]["messages"][-1]["content"] == "tell me a story"
+
+
+def test_unfinished_reply_has_no_stats_even_after_a_finished_one(slow_session):
+    slow_session.commit("first question", "".join(slow_session.stream("first question")))
+    assert slow_session.last_stats is not None
+    stream = slow_session.stream("second question")
+    next(stream)
+    stream.close()
+    assert slow_session.last_stats is None  # chat() discards the turn instead of committing it
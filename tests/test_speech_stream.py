@@ -0,0 +1,60 @@
+from speech_stream import SAMPLE_REPLIES, SentenceSegmenter, SpeechChunker
+
+
+def feed_words(segmenter, text):
+    """Feed `text` word by word; returns (sentences, index of the word each was emitted on)."""
+    sentences, emitted_at = [], []
+    words = text.split(" ")
+    for i, word in enumerate(words):
+        for sentence in segmenter.feed(word if i == 0 else " " + word):
+            sentences.append(sentence)
+            emitted_at.append(i)
+    return sentences, emitted_at
+
+
+def test_sentence_ending_in_no_is_emitted_right_away():
+    sentences, emitted_at = feed_words(SentenceSegmenter(), "The answer is simply no. That is final, sorry")
+    assert sentences == ["The answer is simply no. "]
+    assert emitted_at == [5]  # As soon as "That" shows the next sentence has started
+
+
+def test_sentence_ending_in_pronoun_i_is_emitted_right_away():
+    sentences, _ = feed_words(SentenceSegmenter(), "Well, honestly, so do I. That is a good one")
+    assert sentences == ["Well, honestly, so do I. "]
+
+
+def test_abbreviations_initials_and_numbers_do_not_split():
+    text = ("Dr. Smith met J. K. Rowling at 3.5 p.m. on Oct. 2 in room No. 5 today. "
+            "The list:\n1. First item here.\n2. Second item. Done")
+    segmenter = SentenceSegmenter()
+    sentences, _ = feed_words(segmenter, text)
+    sentences.append(segmenter.flush())
+    assert sentences[0] == "Dr. Smith met J. K. Rowling at 3.5 p.m. on Oct. 2 in room No. 5 today. "
+    assert "".join(sentences) == text
+
+
+def test_short_fragments_join_the_next_sentence():
+    sentences, _ = feed_words(SentenceSegmenter(min_chars=20), "Oh! That is a really nice idea. Yes")
+    assert sentences == ["Oh! That is a really nice idea. "]
+
+
+def test_any_chunking_gives_the_same_sentences():
+    for text in SAMPLE_REPLIES:
+        whole = SentenceSegmenter()
+        expected = whole.feed(text) + [whole.flush()]
+        for size in (1, 2, 3, 7):
+            segmenter = SentenceSegmenter()
+            got = []
+            for i in range(0, len(text), size):
+                got += segmenter.feed(text[i:i + size])
+            assert got + [segmenter.flush()] == expected
+
+
+def test_chunker_pieces_add_up_to_the_text():
+    for speculative in (False, True):
+        for text in SAMPLE_REPLIES:
+            chunker = SpeechChunker(speculative=speculative)
+            pieces = []
+            for i in range(0, len(text), 3):
+                pieces += chunker.feed(text[i:i + 3])
+            assert "".join(pieces) + chunker.flush() == text
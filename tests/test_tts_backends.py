@@ -0,0 +1,66 @@
+import asyncio
+
+from tts_backends import LatencyHistogram, TieredSynthesizer, TTSBackend
+
+
+class FakeStream:
+    def __init__(self):
+        self.data = b""
+        self.boundaries = []
+        self.format = None
+
+    def write(self, data):
+        self.data += data
+
+    def set_format(self, audio_format):
+        self.format = audio_format
+
+
+class FakeBackend(TTSBackend):
+    def __init__(self, name, delay_s, fail=False):
+        self.name = name
+        self.delay_s = delay_s
+        self.fail = fail
+
+    def available(self):
+        return True
+
+    async def synthesize(self, text, voice, stream):
+        await asyncio.sleep(self.delay_s)
+        if self.fail:
+            raise RuntimeError(f"{self.name} down")
+        stream.write(text.encode())
+        return text.encode()
+
+
+def synthesize(backends, deadline_ms):
+    synthesizer = TieredSynthesizer(backends, deadline_ms=deadline_ms)
+    backend, audio = asyncio.run(synthesizer.synthesize("hello", "voice", FakeStream()))
+    return synthesizer, backend, audio
+
+
+def test_cancelled_slow_tier_still_records_a_censored_sample():
+    synthesizer, backend, audio = synthesize([FakeBackend("slow", 1.0), FakeBackend("fast", 0.0)], 50)
+    assert backend.name == "fast" and audio == b"hello"
+    slow = synthesizer.stats()["backends"]["slow"]["first_byte"]
+    assert slow["count"] == 1 and slow["censored"] == 1
+    assert slow["mean_ms"] >= 40  # At least as long as it was waited for
+    fast = synthesizer.stats()["backends"]["fast"]["first_byte"]
+    assert fast["count"] == 1 and fast["censored"] == 0
+
+
+def test_failed_tier_records_a_censored_sample():
+    synthesizer, backend, _ = synthesize([FakeBackend("broken", 0.0, fail=True), FakeBackend("local", 0.0)], 1000)
+    assert backend.name == "local"
+    stats = synthesizer.stats()["backends"]["broken"]
+    assert stats["failures"] == 1
+    assert stats["first_byte"]["count"] == 1 and stats["first_byte"]["censored"] == 1
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for ms in (10, 30, 30, 90, 5000, 9000):
+        histogram.record(ms)
+    assert histogram.percentile(50) == 50
+    assert histogram.percentile(100) == float("inf")
+    assert histogram.snapshot()["count"] == 6
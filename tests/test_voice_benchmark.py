@@ -0,0 +1,15 @@
+import sys
+
+import pytest
+
+pytest.importorskip("speech_recognition")
+
+import voice_benchmark
+
+
+def test_default_run_routes_intents_without_importing_the_assistant():
+    result = voice_benchmark.run([])
+    assert result["missed"] == [] and result["split"] == []
+    assert len(result["stages"]["router"]) == len(voice_benchmark.SYNTHETIC_COMMANDS)
+    assert "ai_assistant" not in sys.modules
+    assert "pygame" not in sys.modules
@@ -0,0 +1,57 @@
+import wave
+
+import numpy as np
+import pytest
+
+from wake_word import WakeWordDetector
+
+RATE = 16000
+
+
+def tone(seconds, start_hz, end_hz, seed):
+    """A frequency sweep with a little noise: stands in for a spoken word."""
+    t = np.arange(int(seconds * RATE)) / RATE
+    phase = 2 * np.pi * (start_hz * t + (end_hz - start_hz) * t ** 2 / (2 * seconds))
+    noise = np.random.default_rng(seed).normal(0, 0.02, len(t))
+    return ((np.sin(phase) + noise) * 8000).astype(np.int16)
+
+
+def wake_word(seed):
+    return tone(0.6, 400, 1600, seed)
+
+
+def chatter(seconds, seed):
+    return tone(seconds, 300, 320, seed)
+
+
+@pytest.fixture
+def detector(tmp_path):
+    for i in range(3):
+        with wave.open(str(tmp_path / f"wake_{i}.wav"), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(RATE)
+            w.writeframes(wake_word(i).tobytes())
+    detector = WakeWordDetector(RATE, template_dir=str(tmp_path))
+    assert detector.enabled
+    return detector
+
+
+@pytest.mark.parametrize("before, after", [(0.0, 4.0), (5.0, 0.5), (4.0, 4.0), (1.0, 12.0)])
+def test_wake_word_is_found_anywhere_in_the_utterance(detector, before, after):
+    samples = np.concatenate([chatter(before, 10), wake_word(11), chatter(after, 12)])
+    assert detector.detect(samples)
+
+
+def test_speech_without_the_wake_word_is_rejected(detector):
+    assert not detector.detect(chatter(8.0, 13))
+
+
+def test_windows_cover_the_utterance_first_and_last_before_the_rest(detector):
+    windows = detector._windows(2000)
+    assert windows[0][0] == 0 and windows[1][1] == 2000
+    covered = np.zeros(2000, dtype=bool)
+    for lo, hi in windows:
+        covered[lo:hi] = True
+    assert covered.all()
+    assert detector._windows(100) == [(0, 100)]
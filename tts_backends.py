@@ -0,0 +1,344 @@
+"""
+TTS Backends for Jarvis AI Assistant
+Tiered speech synthesis: edge-tts (neural, network) first, then a local
+offline engine (pyttsx3) if edge-tts has not produced audio within a
+deadline or fails outright. Backends race once the deadline passes and the
+first one to produce audio wins. Per-backend latency histograms show when
+and how often failover kicks in.
+"""
+
+import os
+import time
+import asyncio
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import edge_tts
+except ImportError:
+    edge_tts = None
+    print("Warning: edge-tts not installed. Neural voice disabled.")
+
+try:
+    import pyttsx3
+except ImportError:
+    pyttsx3 = None
+    print("Warning: pyttsx3 not installed. Offline voice fallback disabled.")
+
+
+class LatencyHistogram:
+    """
+    Log-spaced latency histogram (milliseconds). Censored samples are lower
+    bounds (the wait was cut short before the event) and count in the
+    bucket of the time waited.
+    """
+
+    BUCKETS_MS = [25, 50, 100, 200, 400, 800, 1600, 3200, 6400]
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)  # Last bucket is overflow
+        self.total = 0
+        self.censored = 0
+        self.sum_ms = 0.0
+
+    def record(self, ms, censored=False):
+        with self.lock:
+            index = len(self.BUCKETS_MS)
+            for i, edge in enumerate(self.BUCKETS_MS):
+                if ms <= edge:
+                    index = i
+                    break
+            self.counts[index] += 1
+            self.total += 1
+            self.censored += censored
+            self.sum_ms += ms
+
+    def percentile(self, p):
+        """Upper bucket edge containing the p-th percentile (None when empty)."""
+        with self.lock:
+            if not self.total:
+                return None
+            target = p / 100.0 * self.total
+            running = 0
+            for i, count in enumerate(self.counts):
+                running += count
+                if running >= target:
+                    return self.BUCKETS_MS[i] if i < len(self.BUCKETS_MS) else float("inf")
+            return float("inf")
+
+    def snapshot(self):
+        with self.lock:
+            labels = [f"<={edge}ms" for edge in self.BUCKETS_MS] + [f">{self.BUCKETS_MS[-1]}ms"]
+            return {
+                "count": self.total,
+                "censored": self.censored,
+                "mean_ms": self.sum_ms / self.total if self.total else 0.0,
+                "buckets": dict(zip(labels, self.counts)),
+            }
+
+
+class TTSBackend:
+    """
+    Base class. synthesize() writes audio into `stream` (AudioRingBuffer-like:
+    write(), boundaries, set_format()) and returns the complete clip bytes.
+    """
+
+    name = "base"
+    audio_format = "mp3"
+    cacheable = True  # Whether clips from this backend belong in the TTS cache
+
+    async def synthesize(self, text, voice, stream):
+        raise NotImplementedError
+
+
+class EdgeTTSBackend(TTSBackend):
+    name = "edge"
+
+    def available(self):
+        return edge_tts is not None
+
+    def _communicate(self, text, voice):
+        try:
+            # edge-tts >= 7 only reports sentence boundaries unless asked
+            return edge_tts.Communicate(text, voice, boundary="WordBoundary")
+        except TypeError:
+            return edge_tts.Communicate(text, voice)
+
+    async def synthesize(self, text, voice, stream):
+        # Chunks go to the player as they arrive; the joined clip feeds the cache
+        communicate = self._communicate(text, voice)
+        chunks = []
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                stream.write(chunk["data"])
+                chunks.append(chunk["data"])
+            elif chunk["type"] == "WordBoundary":
+                # Lip sync timings (offset/duration in 100 ns ticks)
+                stream.boundaries.append({
+                    "offset": chunk["offset"],
+                    "duration": chunk["duration"],
+                    "text": chunk["text"],
+                })
+        return b"".join(chunks)
+
+
+class LocalTTSBackend(TTSBackend):
+    """
+    Offline pyttsx3 voice. The engine is not thread-safe, so it lives on
+    one dedicated thread and renders whole WAV files.
+    """
+
+    name = "local"
+    audio_format = "wav"
+    cacheable = False  # Robotic fallback audio shouldn't shadow the neural voice
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="TTS_Local")
+        self.engine = None
+
+    def available(self):
+        return pyttsx3 is not None
+
+    def _render(self, text):
+        if self.engine is None:
+            self.engine = pyttsx3.init()
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            self.engine.save_to_file(text, path)
+            self.engine.runAndWait()
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    async def synthesize(self, text, voice, stream):
+        loop = asyncio.get_running_loop()
+        audio = await loop.run_in_executor(self.executor, self._render, text)
+        if not audio:
+            raise RuntimeError("local TTS produced no audio")
+        stream.set_format(self.audio_format)
+        stream.write(audio)
+        return audio
+
+
+class _TierStream:
+    """
+    Per-backend view of the shared output stream. Nothing reaches the real
+    stream until this backend claims the race with its first audio byte.
+    """
+
+    def __init__(self, race, backend):
+        self.race = race
+        self.backend = backend
+        self.boundaries = []
+        self.format = backend.audio_format
+        self.first_byte_at = None
+
+    def set_format(self, audio_format):
+        self.format = audio_format
+
+    def write(self, data):
+        if self.first_byte_at is None:
+            self.first_byte_at = time.monotonic()
+        if not self.race.claim(self):
+            raise asyncio.CancelledError()  # Lost the race; stop producing
+        self.race.stream.write(data)
+
+
+class _Race:
+    def __init__(self, stream):
+        self.stream = stream
+        self.winner = None
+        self.claimed = asyncio.Event()
+
+    def claim(self, tier):
+        if self.winner is None:
+            self.winner = tier
+            # Hand over everything buffered before the first byte, then share the list
+            self.stream.set_format(tier.format)
+            self.stream.boundaries.extend(tier.boundaries)
+            tier.boundaries = self.stream.boundaries
+            self.claimed.set()
+        return self.winner is tier
+
+
+class TieredSynthesizer:
+    def __init__(self, backends, deadline_ms=1500):
+        """
+        Initialize the tiers
+
+        Args:
+            backends: Backends in preference order
+            deadline_ms: Time-to-first-audio after which the next tier joins the race
+        """
+        self.backends = [b for b in backends if b.available()]
+        self.deadline = deadline_ms / 1000.0
+        self.first_byte = {b.name: LatencyHistogram() for b in self.backends}
+        self.wins = {b.name: 0 for b in self.backends}
+        self.failures = {b.name: 0 for b in self.backends}
+        self.failovers = 0
+
+    async def _run(self, backend, tier, text, voice):
+        started = time.monotonic()
+        try:
+            return await backend.synthesize(text, voice, tier)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.failures[backend.name] += 1
+            raise
+        finally:
+            # Also for tiers that lost, were cancelled or failed: those are the slow
+            # ones, and leaving them out would make the backend look faster than it is
+            if tier.first_byte_at is not None:
+                self.first_byte[backend.name].record((tier.first_byte_at - started) * 1000)
+            else:
+                self.first_byte[backend.name].record((time.monotonic() - started) * 1000, censored=True)
+
+    async def synthesize(self, text, voice, stream):
+        """
+        Synthesize `text` into `stream`, failing over between tiers
+
+        Returns:
+            tuple: (winning backend, complete clip bytes)
+        """
+        if not self.backends:
+            raise RuntimeError("no TTS backend available")
+
+        race = _Race(stream)
+        running = {}  # task -> (backend, tier)
+        next_tier = 0
+        last_error = None
+        finished = {}  # tier -> audio for tasks that completed inside the race loop
+        claim_waiter = asyncio.ensure_future(race.claimed.wait())
+
+        def start_next():
+            nonlocal next_tier
+            backend = self.backends[next_tier]
+            next_tier += 1
+            tier = _TierStream(race, backend)
+            task = asyncio.ensure_future(self._run(backend, tier, text, voice))
+            running[task] = (backend, tier)
+            if next_tier > 1:
+                self.failovers += 1
+                print(f"TTS Failover: starting '{backend.name}' backend")
+
+        try:
+            start_next()
+            next_start = time.monotonic() + self.deadline
+
+            while race.winner is None:
+                if not running:
+                    if next_tier >= len(self.backends):
+                        raise last_error or RuntimeError("all TTS backends failed")
+                    start_next()  # Previous tier failed outright: don't wait for the deadline
+                    next_start = time.monotonic() + self.deadline
+
+                timeout = None
+                if next_tier < len(self.backends):
+                    timeout = max(0.0, next_start - time.monotonic())
+
+                done, _ = await asyncio.wait(set(running) | {claim_waiter}, timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    if task is claim_waiter or task not in running:
+                        continue
+                    _, tier = running.pop(task)
+                    if task.cancelled():
+                        continue
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                    elif tier is race.winner:
+                        finished[tier] = task.result()
+                    elif race.winner is None:
+                        # Finished without producing audio
+                        last_error = RuntimeError("TTS backend returned no audio")
+
+                if race.winner is None and not done and next_tier < len(self.backends):
+                    start_next()  # Deadline passed with no audio yet: race the next tier
+                    next_start = time.monotonic() + self.deadline
+
+            # Winner decided: stop the losers, then let the winner finish streaming
+            winner_task = None
+            for task, (backend, tier) in running.items():
+                if tier is race.winner:
+                    winner_task = task
+                else:
+                    task.cancel()
+
+            backend = race.winner.backend
+            if winner_task is not None:
+                audio = await winner_task
+            elif race.winner in finished:
+                audio = finished[race.winner]
+            else:
+                raise last_error or RuntimeError("TTS backend failed mid-clip")
+            self.wins[backend.name] += 1
+            return backend, audio
+        finally:
+            claim_waiter.cancel()
+            for task in running:
+                task.cancel()
+
+    def stats(self):
+        """Wins, failures and time-to-first-audio histograms per backend."""
+        return {
+            "failovers": self.failovers,
+            "backends": {
+                b.name: {
+                    "wins": self.wins[b.name],
+                    "failures": self.failures[b.name],
+                    "first_byte": self.first_byte[b.name].snapshot(),
+                    "p50_ms": self.first_byte[b.name].percentile(50),
+                    "p95_ms": self.first_byte[b.name].percentile(95),
+                }
+                for b in self.backends
+            },
+        }
@@ -0,0 +1,225 @@
+"""
+TTS Audio Cache for Jarvis AI Assistant
+Content-addressed cache of synthesized speech (MP3 bytes plus the word
+boundary timings used for lip sync) so repeated phrases skip network
+synthesis. Two tiers: a small in-memory LRU for hot phrases and an
+on-disk LRU bounded by a byte budget.
+"""
+
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class TTSCache:
+    def __init__(self, cache_dir="tts_cache", max_disk_mb=64, max_memory_mb=8):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Directory for cached clips (created on demand)
+            max_disk_mb: Disk budget in megabytes (0 disables the disk tier)
+            max_memory_mb: Budget for the warm in-memory tier in megabytes
+        """
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024)
+
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()  # key -> bytes (oldest first)
+        self.memory_meta = {}  # key -> word boundaries for clips in the memory tier
+        self.memory_bytes = 0
+        self.disk_index = OrderedDict()  # key -> size on disk (oldest first)
+        self.disk_bytes = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._scan_disk()
+
+    @staticmethod
+    def normalize_text(text):
+        """Collapse whitespace so trivially different strings share a clip."""
+        return " ".join(text.split())
+
+    @classmethod
+    def make_key(cls, voice, text):
+        """Content address for a (voice, normalized text) pair."""
+        payload = f"{voice}\x00{cls.normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def _path_for(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".mp3")
+
+    def _meta_path_for(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def _scan_disk(self):
+        """Rebuild the disk LRU index from file modification times."""
+        if self.max_disk_bytes <= 0 or not os.path.isdir(self.cache_dir):
+            return
+
+        entries = []
+        for root, dirs, files in os.walk(self.cache_dir):
+            for f in files:
+                if not f.endswith(".mp3"):
+                    continue
+                path = os.path.join(root, f)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                size = st.st_size
+                meta_path = path[:-4] + ".json"
+                if os.path.exists(meta_path):
+                    size += os.path.getsize(meta_path)
+                entries.append((st.st_mtime, f[:-4], size))
+
+        entries.sort()
+        for _, key, size in entries:
+            self.disk_index[key] = size
+            self.disk_bytes += size
+
+        with self.lock:
+            self._evict_disk()
+
+    def _remember(self, key, audio):
+        """Insert into the memory tier (caller holds the lock)."""
+        if len(audio) > self.max_memory_bytes:
+            return
+        old = self.memory.pop(key, None)
+        if old is not None:
+            self.memory_bytes -= len(old)
+        self.memory[key] = audio
+        self.memory_bytes += len(audio)
+        while self.memory_bytes > self.max_memory_bytes:
+            evicted_key, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+            self.memory_meta.pop(evicted_key, None)
+
+    def _evict_disk(self):
+        """Drop least recently used clips until under budget (caller holds the lock)."""
+        while self.disk_bytes > self.max_disk_bytes and self.disk_index:
+            key, size = self.disk_index.popitem(last=False)
+            self.disk_bytes -= size
+            for path in (self._path_for(key), self._meta_path_for(key)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def get(self, voice, text):
+        """
+        Look up a cached clip
+
+        Returns:
+            bytes: MP3 data, or None on a miss
+        """
+        key = self.make_key(voice, text)
+
+        with self.lock:
+            audio = self.memory.get(key)
+            if audio is not None:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+
+            if key not in self.disk_index:
+                self.misses += 1
+                return None
+
+        path = self._path_for(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            os.utime(path, None)  # Refresh recency for the next index rebuild
+        except OSError:
+            with self.lock:
+                size = self.disk_index.pop(key, None)
+                if size is not None:
+                    self.disk_bytes -= size
+                self.misses += 1
+            return None
+
+        with self.lock:
+            if key in self.disk_index:
+                self.disk_index.move_to_end(key)
+            self._remember(key, audio)
+            self.disk_hits += 1
+        return audio
+
+    def get_boundaries(self, voice, text):
+        """
+        Word boundary events stored with a cached clip
+
+        Returns:
+            list: Boundary dicts ("offset", "duration", "text"), empty if none were stored
+        """
+        key = self.make_key(voice, text)
+        with self.lock:
+            if key in self.memory_meta:
+                return self.memory_meta[key]
+        try:
+            with open(self._meta_path_for(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def put(self, voice, text, audio, boundaries=None):
+        """Store a freshly synthesized clip (and optional word boundaries) in both tiers."""
+        if not audio:
+            return
+        key = self.make_key(voice, text)
+        meta = json.dumps(boundaries, separators=(",", ":")).encode("utf-8") if boundaries else b""
+
+        with self.lock:
+            self._remember(key, audio)
+            if boundaries and key in self.memory:
+                self.memory_meta[key] = boundaries
+            if self.max_disk_bytes <= 0 or len(audio) > self.max_disk_bytes or key in self.disk_index:
+                return
+
+        files = [(self._path_for(key), audio)]
+        if meta:
+            # Sidecar goes first so a visible clip always has its timings
+            files.insert(0, (self._meta_path_for(key), meta))
+
+        for path, data in files:
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)  # Atomic so readers never see half a clip
+            except OSError as e:
+                print(f"TTS Cache Write Error: {e}")
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                return
+
+        with self.lock:
+            if key not in self.disk_index:
+                self.disk_index[key] = len(audio) + len(meta)
+                self.disk_bytes += len(audio) + len(meta)
+            self._evict_disk()
+
+    def stats(self):
+        """Hit/miss counters and current tier sizes."""
+        with self.lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self.memory),
+                "memory_bytes": self.memory_bytes,
+                "disk_entries": len(self.disk_index),
+                "disk_bytes": self.disk_bytes,
+            }
@@ -0,0 +1,93 @@
+"""
+Viseme Timeline for Jarvis AI Assistant
+Converts TTS WordBoundary events into a compact mouth-shape timeline that
+the avatar plays back in sync with the audio. Uses simple spelling rules
+(no phoneme dictionary), which is plenty for driving a mouth.
+"""
+
+# Viseme set (index is what goes over the wire). Matches VISEMES in SexyGirlAvatar.jsx
+VISEMES = ["sil", "PP", "FF", "TH", "DD", "kk", "CH", "SS", "nn", "RR", "aa", "E", "I", "O", "U"]
+_INDEX = {name: i for i, name in enumerate(VISEMES)}
+
+# Multi-letter spellings first, then single letters
+_DIGRAPHS = {
+    "th": "TH", "sh": "CH", "ch": "CH", "ph": "FF", "ck": "kk", "ng": "nn", "gh": None,
+    "oo": "U", "ou": "U", "ee": "I", "ea": "I", "ai": "E", "ay": "E", "oa": "O", "ow": "O",
+}
+_LETTERS = {
+    "p": "PP", "b": "PP", "m": "PP",
+    "f": "FF", "v": "FF",
+    "t": "DD", "d": "DD", "l": "DD",
+    "k": "kk", "g": "kk", "c": "kk", "q": "kk", "x": "kk",
+    "j": "CH",
+    "s": "SS", "z": "SS",
+    "n": "nn",
+    "r": "RR",
+    "a": "aa", "e": "E", "i": "I", "y": "I", "o": "O", "u": "U", "w": "U",
+}
+
+TICKS_PER_MS = 10000  # edge-tts offsets are in 100 ns units
+
+
+def word_to_visemes(word):
+    """Spell a word into a list of viseme names (consecutive repeats merged)."""
+    word = word.lower()
+    out = []
+    i = 0
+    while i < len(word):
+        pair = word[i:i + 2]
+        if pair in _DIGRAPHS:
+            viseme = _DIGRAPHS[pair]
+            i += 2
+            if viseme is None:
+                continue  # Silent spelling ("thought")
+        else:
+            viseme = _LETTERS.get(word[i])
+            i += 1
+            if viseme is None:
+                continue  # Digits, punctuation, silent 'h'
+        if not out or out[-1] != viseme:
+            out.append(viseme)
+    return out
+
+
+def build_timeline(boundaries, gap_ms=60):
+    """
+    Build a compact timeline from WordBoundary events
+
+    Args:
+        boundaries: List of dicts with "offset", "duration" (100 ns ticks) and "text"
+        gap_ms: Silences longer than this close the mouth between words
+
+    Returns:
+        dict: {"t": [start_ms, ...], "v": [viseme_index, ...]} relative to clip start
+    """
+    times = []
+    indices = []
+
+    def add(t, viseme):
+        index = _INDEX[viseme]
+        if indices and indices[-1] == index:
+            return
+        times.append(int(t))
+        indices.append(index)
+
+    last_end = 0.0
+    for b in boundaries:
+        start = b["offset"] / TICKS_PER_MS
+        duration = max(b["duration"] / TICKS_PER_MS, 1.0)
+        shapes = word_to_visemes(b.get("text", ""))
+        if not shapes:
+            continue
+
+        if start - last_end > gap_ms:
+            add(last_end, "sil")
+
+        step = duration / len(shapes)
+        for k, shape in enumerate(shapes):
+            add(start + k * step, shape)
+        last_end = start + duration
+
+    if times:
+        add(last_end, "sil")
+    return {"t": times, "v": indices}
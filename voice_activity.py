@@ -0,0 +1,207 @@
+"""
+Voice Activity Detection for Jarvis AI Assistant
+Frame-level capture front end that replaces speech_recognition's blocking
+Recognizer.listen(). The microphone is read in 30 ms frames; each frame is
+classified from its energy against an adaptive noise floor plus two
+spectral features (speech-band energy ratio and spectral flatness). An
+utterance is emitted as soon as a hangover of non-speech frames has passed;
+the hangover adapts to how long this speaker pauses mid-sentence instead of
+a fixed 2 s pause_threshold. An optional echo canceller removes the
+assistant's own voice first, and an optional streaming denoiser cleans each
+frame as it arrives, using the VAD's decision to learn the noise spectrum.
+"""
+
+import time
+from collections import deque
+
+import numpy as np
+import speech_recognition as sr
+
+from noise_suppression import StreamingDenoiser
+from echo_cancel import EchoCanceller
+
+
+class VoiceActivityDetector:
+    def __init__(self, sample_rate, frame_ms=30, margin_db=12.0):
+        """
+        Initialize the detector
+
+        Args:
+            sample_rate: Microphone sample rate (Hz)
+            frame_ms: Analysis frame length (20-30 ms works well)
+            margin_db: How far above the noise floor a frame must be to count as speech
+        """
+        self.sample_rate = sample_rate
+        self.frame_samples = int(sample_rate * frame_ms / 1000)
+        self.frame_ms = frame_ms
+        self.margin_db = margin_db
+        self.noise_db = -60.0  # Adaptive noise floor (dBFS)
+
+        self.window = np.hanning(self.frame_samples).astype(np.float32)
+        freqs = np.fft.rfftfreq(self.frame_samples, 1.0 / sample_rate)
+        self.speech_band = (freqs >= 80) & (freqs <= 4000)
+
+    def features(self, frame):
+        """
+        Energy and spectral features of one int16 frame
+
+        Returns:
+            tuple: (energy_dbfs, speech_band_ratio, spectral_flatness)
+        """
+        x = frame.astype(np.float32) / 32768.0
+        energy_db = 10.0 * np.log10(np.mean(x * x) + 1e-10)
+
+        power = np.abs(np.fft.rfft(x * self.window)) ** 2 + 1e-12
+        band = power[self.speech_band]
+        band_ratio = band.sum() / power.sum()
+        # Geometric / arithmetic mean: ~1 for noise, small for harmonic voiced speech
+        flatness = np.exp(np.mean(np.log(band))) / np.mean(band)
+        return energy_db, band_ratio, flatness
+
+    def is_speech(self, frame, extra_margin_db=0.0, adapt=True):
+        """
+        Classify one frame
+
+        Args:
+            frame: int16 samples (frame_samples long)
+            extra_margin_db: Added to the margin (e.g. while the assistant is talking)
+            adapt: Whether non-speech frames may move the noise floor
+        """
+        energy_db, band_ratio, flatness = self.features(frame)
+        loud = energy_db > self.noise_db + self.margin_db + extra_margin_db
+        voiced = band_ratio > 0.6 and flatness < 0.5
+        speech = loud and voiced
+
+        if adapt and not speech:
+            # Fall quickly to quieter rooms, rise slowly so speech tails don't lift the floor
+            rate = 0.2 if energy_db < self.noise_db else 0.02
+            self.noise_db += rate * (energy_db - self.noise_db)
+        return speech
+
+
+class UtteranceCapture:
+    def __init__(self, source, pre_roll_ms=300, onset_ms=90, min_hangover_ms=300,
+                 max_hangover_ms=1000, max_utterance_s=20, denoise=True, echo_reference=None):
+        """
+        Initialize the capture stage
+
+        Args:
+            source: An open sr.Microphone
+            pre_roll_ms: Audio kept from before the onset so first syllables aren't clipped
+            onset_ms: Consecutive speech needed to open an utterance
+            min_hangover_ms / max_hangover_ms: Bounds of the adaptive end-of-speech hangover
+            max_utterance_s: Hard cap on one utterance
+            denoise: Spectral-gate frames during capture (adds one frame of delay)
+            echo_reference: EchoReference of the speaker output to cancel (None = no AEC)
+        """
+        self.source = source
+        self.vad = VoiceActivityDetector(source.SAMPLE_RATE)
+        self.frame_ms = self.vad.frame_ms
+        self.pre_roll = deque(maxlen=max(1, pre_roll_ms // self.frame_ms))
+        self.onset_frames = max(1, onset_ms // self.frame_ms)
+        self.min_hangover_ms = min_hangover_ms
+        self.max_hangover_ms = max_hangover_ms
+        self.max_frames = int(max_utterance_s * 1000 / self.frame_ms)
+        self.denoiser = StreamingDenoiser(self.vad.frame_samples) if denoise else None
+        self.echo = EchoCanceller(echo_reference, self.vad.frame_samples) if echo_reference else None
+
+        self.pause_ms = 300.0  # EMA of mid-utterance pauses that did NOT end the utterance
+        self.speech_end = None  # Monotonic time of the last speech frame of the last utterance
+        self.barge_in = False  # Whether the last utterance started while the assistant was talking
+
+    def _read_frame(self):
+        data = self.source.stream.read(self.vad.frame_samples)
+        frame = np.frombuffer(data, dtype=np.int16)
+        if self.echo is not None:
+            frame = self.echo.process(frame, time.monotonic())
+            data = frame.tobytes()
+        return data, frame
+
+    def _clean(self, data, frame, speech, learn=True):
+        """Denoised bytes for a frame (the noise spectrum learns from non-speech)."""
+        if self.denoiser is None:
+            return data
+        return self.denoiser.process(frame, is_noise=learn and not speech).tobytes()
+
+    def calibrate(self, duration=1.0):
+        """Settle the noise floor on ambient sound before listening."""
+        frames = int(duration * 1000 / self.frame_ms)
+        levels = []
+        for _ in range(frames):
+            data, frame = self._read_frame()
+            levels.append(self.vad.features(frame)[0])
+            self._clean(data, frame, speech=False)
+        if levels:
+            self.vad.noise_db = float(np.median(levels))
+
+    def hangover_ms(self):
+        """Current end-of-speech hangover: a bit longer than this speaker's usual pause."""
+        return min(self.max_hangover_ms, max(self.min_hangover_ms, 1.5 * self.pause_ms))
+
+    def listen(self, is_speaking=None, on_frame=None):
+        """
+        Block until one utterance has been captured
+
+        Args:
+            is_speaking: Callable polled every frame; while it returns True the
+                         assistant is talking, so the noise floor is frozen (our own
+                         voice mustn't raise it) and, unless the echo canceller has
+                         converged, onsets need louder, longer speech
+            on_frame: Called with each frame of the utterance as it is captured
+                      (pre-roll first), e.g. to feed a streaming recognizer
+
+        Returns:
+            sr.AudioData: The utterance including pre-roll
+        """
+        self.pre_roll.clear()
+
+        # Wait for a confident onset
+        run = []
+        while True:
+            barge_in = bool(is_speaking and is_speaking())
+            # With the echo removed, barge-in can use the normal threshold
+            strict = barge_in and not (self.echo is not None and self.echo.converged)
+            extra_margin = 6.0 if strict else 0.0
+            onset_needed = self.onset_frames * 2 if strict else self.onset_frames
+            data, frame = self._read_frame()
+            speech = self.vad.is_speech(frame, extra_margin, adapt=not barge_in)
+            # Our own voice isn't room noise: don't learn it while barging in
+            data = self._clean(data, frame, speech, learn=not barge_in)
+            if speech:
+                run.append(data)
+                if len(run) >= onset_needed:
+                    break
+            else:
+                self.pre_roll.extend(run)
+                self.pre_roll.append(data)
+                run = []
+
+        self.barge_in = barge_in
+        frames = list(self.pre_roll) + run
+        if on_frame:
+            for data in frames:
+                on_frame(data)
+        silence_ms = 0.0
+        last_speech = time.monotonic()
+
+        # Collect until the hangover expires
+        while len(frames) < self.max_frames:
+            data, frame = self._read_frame()
+            speech = self.vad.is_speech(frame, extra_margin, adapt=False)
+            data = self._clean(data, frame, speech, learn=False)
+            frames.append(data)
+            if on_frame:
+                on_frame(data)
+            if speech:
+                if silence_ms >= 2 * self.frame_ms:
+                    # Pause the speaker resumed after: learn from it
+                    self.pause_ms += 0.2 * (silence_ms - self.pause_ms)
+                silence_ms = 0.0
+                last_speech = time.monotonic()
+            else:
+                silence_ms += self.frame_ms
+                if silence_ms >= self.hangover_ms():
+                    break
+
+        self.speech_end = last_speech
+        return sr.AudioData(b"".join(frames), self.source.SAMPLE_RATE, self.source.SAMPLE_WIDTH)
@@ -0,0 +1,221 @@
+"""
+Voice Pipeline Benchmark for Jarvis AI Assistant
+Replays a corpus of recorded commands through the same stages listen_loop
+uses (VAD capture with noise suppression, speech recognition, command
+router) without a microphone, and reports throughput plus per-stage
+latency percentiles.
+
+The recognizer is a stub by default: each clip's transcript comes from a
+.txt file next to the WAV, or from the file name ("what_time_is_it.wav").
+Use --stt to run a real backend instead. The router stage times intent
+classification (intent_router only, no handlers run). With --handlers it
+calls ai_assistant.process_command instead, with speech and the LLM
+fallback captured; importing ai_assistant starts its threads, loads and
+rewrites settings and warms the LLM, and the other handlers really run
+(network lookups, camera), so only use that on a corpus of harmless
+commands.
+
+    python voice_benchmark.py commands/ [--stt stub|google|vosk] [--speed 0] [--no-router] [--handlers]
+
+With no corpus, synthetic voiced clips are used (capture timing only makes
+sense there; their transcripts are canned).
+"""
+
+import os
+import time
+import argparse
+
+import numpy as np
+import speech_recognition as sr
+
+from audio_sources import ReplaySource, ReplayFinished, load_corpus
+from intent_router import IntentRouter, COMMAND_INTENTS
+from latency_trace import percentile
+from stt_backends import STTBackend, STTSession, create_stt_backend
+from voice_activity import UtteranceCapture
+
+# Handlers that stay on this machine and change nothing (no network, camera or volume)
+SYNTHETIC_COMMANDS = ["what time is it", "system status", "voice stats",
+                      "what did i say", "tell me a joke", "how are you"]
+
+
+def transcript_for(path):
+    """Reference transcript of a corpus clip: sidecar .txt, else the file name."""
+    sidecar = os.path.splitext(path)[0] + ".txt"
+    if os.path.exists(sidecar):
+        with open(sidecar, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    return os.path.splitext(os.path.basename(path))[0].replace("_", " ").replace("-", " ")
+
+
+class _StubSession(STTSession):
+    def __init__(self, backend):
+        self.backend = backend
+
+    def finish(self, audio):
+        text = self.backend.next_transcript
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+class StubSTTBackend(STTBackend):
+    """Returns the reference transcript of whichever clip the utterance came from."""
+    name = "stub"
+
+    def __init__(self):
+        self.next_transcript = None
+
+    def start(self, sample_rate):
+        return _StubSession(self)
+
+
+def synthetic_corpus(rate=16000, seed=0):
+    """Harmonic 'voiced' bursts the VAD accepts as speech, one per canned command."""
+    rng = np.random.default_rng(seed)
+    clips = []
+    for text in SYNTHETIC_COMMANDS:
+        t = np.arange(int(rate * rng.uniform(0.8, 1.6))) / rate
+        pitch = rng.uniform(110, 220)
+        voiced = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 15))
+        syllables = 0.6 + 0.4 * np.sin(2 * np.pi * 4.0 * t)  # Syllable-rate loudness
+        clips.append((text, (voiced * syllables * 3000).astype(np.int16)))
+    return clips
+
+
+def _router(captured):
+    """process_command with speech and the LLM fallback captured instead of played (runs handlers)."""
+    import ai_assistant
+    ai_assistant.speak = lambda text: captured.append(text)
+    ai_assistant.chat = lambda text: captured.append(f"<chat> {text}")
+
+    def route(text):
+        ai_assistant.last_interaction_time = time.time()  # Stay in conversation mode
+        return ai_assistant.process_command(text.lower())
+    return route
+
+
+def _intent_router(captured):
+    """Intent classification only: records the routed intent and slot."""
+    router = IntentRouter(COMMAND_INTENTS)
+
+    def route(text):
+        captured.append(router.route(text))
+    return route
+
+
+def _stage_line(name, values):
+    if not values:
+        return f"  {name:<20} -"
+    return (f"  {name:<20} p50 {percentile(values, 50):8.2f}  p95 {percentile(values, 95):8.2f}  "
+            f"max {max(values):8.2f} ms  (n={len(values)})")
+
+
+def run(paths, stt_name="stub", speed=0.0, router=True, handlers=False, denoise=True, rate=16000,
+        verbose=False):
+    """
+    Replay the corpus through the voice pipeline
+
+    Returns:
+        dict: Per-stage lists of ms, counts and throughput
+    """
+    if paths:
+        corpus = load_corpus(paths, rate)
+        transcripts = {path: transcript_for(path) for path, _ in corpus}
+    else:
+        print("No corpus given; using synthetic clips.")
+        corpus = synthetic_corpus(rate)
+        transcripts = {text: text for text, _ in corpus}
+    if not corpus:
+        print("Corpus is empty.")
+        return None
+
+    stt = StubSTTBackend() if stt_name == "stub" else create_stt_backend(stt_name)
+    replies = []
+    route = None
+    if router and handlers:
+        try:
+            route = _router(replies)
+        except Exception as e:
+            print(f"ai_assistant failed to import ({e}); timing intent classification only")
+    if router and route is None:
+        route = _intent_router(replies)
+
+    stages = {"capture": [], "endpoint (audio)": [], "stt": [], "router": []}
+    heard = {}  # Clip name -> utterances attributed to it
+    source = ReplaySource(corpus, rate, speed=speed)
+    started = time.perf_counter()
+
+    with source:
+        capture = UtteranceCapture(source, denoise=denoise)
+        capture.calibrate(duration=1.0)
+        while True:
+            session = stt.start(rate)
+            t0 = time.perf_counter()
+            try:
+                audio = capture.listen(on_frame=session.accept if stt.streaming else None)
+            except ReplayFinished:
+                break
+            t1 = time.perf_counter()
+            stages["capture"].append((t1 - t0) * 1000)
+
+            end = source.position
+            clip = source.clip_at(end - len(audio.frame_data) // 2, end)
+            heard[clip] = heard.get(clip, 0) + 1
+            for _, clip_end, name in source.spans:
+                if name == clip and end >= clip_end:
+                    stages["endpoint (audio)"].append((end - clip_end) * 1000 / rate)
+
+            if isinstance(stt, StubSTTBackend):
+                stt.next_transcript = transcripts.get(clip)
+            t2 = time.perf_counter()
+            try:
+                text = session.finish(audio)
+            except (sr.UnknownValueError, sr.RequestError) as e:
+                text = None
+                if verbose:
+                    print(f"  STT failed on {clip}: {type(e).__name__}")
+            t3 = time.perf_counter()
+            stages["stt"].append((t3 - t2) * 1000)
+
+            if text and route is not None:
+                before = len(replies)
+                route(text)
+                stages["router"].append((time.perf_counter() - t3) * 1000)
+                if verbose:
+                    print(f"  {clip}: {text!r} -> {replies[before:]}")
+            elif verbose:
+                print(f"  {clip}: {text!r}")
+
+    elapsed = time.perf_counter() - started
+    names = [name for _, _, name in source.spans]
+    missed = [n for n in names if n not in heard]
+    split = [n for n in names if heard.get(n, 0) > 1]
+    utterances = len(stages["capture"])
+
+    print(f"\n{len(names)} clips, {source.duration:.1f} s of audio, replayed in {elapsed:.2f} s "
+          f"({source.duration / elapsed:.1f}x real time)")
+    print(f"Utterances: {utterances} ({utterances / elapsed:.1f}/s), missed clips: {len(missed)}, "
+          f"split clips: {len(split)}, noise-only: {heard.get(None, 0)}")
+    print("Per-utterance latency (ms):")
+    for name, values in stages.items():
+        print(_stage_line(name, values))
+    print("  (capture covers VAD + noise suppression of the utterance and the silence before it;\n"
+          "   endpoint is audio time from the end of a clip to its release, i.e. the hangover)")
+    return {"stages": stages, "elapsed_s": elapsed, "audio_s": source.duration,
+            "utterances": utterances, "missed": missed, "split": split}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the voice pipeline on recorded commands")
+    parser.add_argument("paths", nargs="*", help="WAV files or folders of WAV files")
+    parser.add_argument("--stt", default="stub", help="stub (reference transcripts), google, vosk or auto")
+    parser.add_argument("--speed", type=float, default=0.0, help="Replay speed (1 = real time, 0 = unthrottled)")
+    parser.add_argument("--no-router", action="store_true", help="Skip the routing stage")
+    parser.add_argument("--handlers", action="store_true",
+                        help="Route through ai_assistant.process_command (side effects, handlers run)")
+    parser.add_argument("--no-denoise", action="store_true", help="Capture without noise suppression")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print each utterance")
+    args = parser.parse_args()
+    run(args.paths, args.stt, args.speed, router=not args.no_router, handlers=args.handlers,
+        denoise=not args.no_denoise, verbose=args.verbose)
@@ -0,0 +1,260 @@
+"""
+Wake Word Spotting for Jarvis AI Assistant
+On-device keyword spotter that runs ahead of speech recognition, so
+background chatter outside the conversation window never costs an STT
+request. Utterances are turned into MFCCs and matched against a few
+recorded examples of the wake word with subsequence DTW, which finds the
+best match anywhere in a stretch of audio in one vectorized pass per
+template frame. Long utterances are searched in overlapping windows, the
+first and last (where the name usually is) before the ones between, and
+detection stops at the first window that matches.
+
+Record templates (say the wake word once per prompt):
+    python wake_word.py enroll 3
+
+Score a recording and report CPU cost per second of audio:
+    python wake_word.py test recording.wav
+"""
+
+import os
+import glob
+import time
+import wave
+
+import numpy as np
+
+TEMPLATE_DIR = "wake_templates"
+
+
+def _mel_filterbank(rate, n_fft, n_mels=26, low=60.0, high=None):
+    high = high or rate / 2
+    mel = lambda f: 2595.0 * np.log10(1.0 + f / 700.0)
+    inv = lambda m: 700.0 * (10 ** (m / 2595.0) - 1.0)
+    points = inv(np.linspace(mel(low), mel(high), n_mels + 2))
+    bins = np.floor((n_fft + 1) * points / rate).astype(int)
+    fb = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        if center > left:
+            fb[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            fb[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+    return fb
+
+
+class MFCC:
+    """Vectorized MFCC extractor (25 ms windows, 10 ms hop)."""
+
+    def __init__(self, rate, n_mfcc=13, n_mels=26):
+        self.rate = rate
+        self.win = int(0.025 * rate)
+        self.hop = int(0.010 * rate)
+        self.n_fft = 1 << (self.win - 1).bit_length()
+        self.window = np.hamming(self.win).astype(np.float32)
+        self.fb = _mel_filterbank(rate, self.n_fft, n_mels)
+        k = np.arange(n_mels)
+        # DCT-II basis, first n_mfcc rows (c0 dropped: loudness isn't identity)
+        self.dct = np.cos(np.pi / n_mels * (k + 0.5)[None, :] * np.arange(1, n_mfcc + 1)[:, None]).astype(np.float32)
+
+    def __call__(self, samples):
+        """
+        Args:
+            samples: int16 or float mono audio
+
+        Returns:
+            np.ndarray: (frames, n_mfcc) features. No per-utterance mean
+                        normalization: the wake word is usually followed by a
+                        command, which would shift the mean, and templates are
+                        recorded on the same microphone anyway.
+        """
+        x = np.asarray(samples, dtype=np.float32) / 32768.0
+        if len(x) < self.win:
+            return np.zeros((0, self.dct.shape[0]), dtype=np.float32)
+        x = np.append(x[0], x[1:] - 0.97 * x[:-1])  # Pre-emphasis
+        count = 1 + (len(x) - self.win) // self.hop
+        idx = np.arange(self.win)[None, :] + self.hop * np.arange(count)[:, None]
+        frames = x[idx] * self.window
+        power = np.abs(np.fft.rfft(frames, self.n_fft)) ** 2 / self.n_fft
+        logmel = np.log(power @ self.fb.T + 1e-10)
+        return logmel @ self.dct.T
+
+
+def _trim_silence(samples, rate, floor_db=30.0):
+    """Keep the span whose 10 ms energy is within `floor_db` of the loudest part."""
+    hop = int(0.010 * rate)
+    x = np.asarray(samples, dtype=np.float32)
+    count = len(x) // hop
+    if count == 0:
+        return x
+    energy = 10 * np.log10(np.mean(x[:count * hop].reshape(count, hop) ** 2, axis=1) + 1e-10)
+    loud = np.nonzero(energy > energy.max() - floor_db)[0]
+    return x[loud[0] * hop:(loud[-1] + 1) * hop]
+
+
+def subsequence_dtw(template, query):
+    """
+    Best match of `template` anywhere inside `query`
+
+    Steps are (1,1), (1,2) and (1,0) in (template, query) frames, so each
+    template frame is one vectorized row update over all query positions.
+
+    Returns:
+        float: Path cost divided by template length (lower is a better match)
+    """
+    n, m = len(template), len(query)
+    if n == 0 or m == 0:
+        return np.inf
+    # Euclidean distances, all pairs at once
+    cost = np.sqrt(np.maximum(
+        (template ** 2).sum(1)[:, None] + (query ** 2).sum(1)[None, :] - 2 * template @ query.T, 0.0))
+
+    row = cost[0].copy()  # Free start anywhere in the query
+    for i in range(1, n):
+        diag = np.concatenate(([np.inf], row[:-1]))
+        skip = np.concatenate(([np.inf, np.inf], row[:-2]))
+        row = cost[i] + np.minimum(np.minimum(diag, skip), row)
+    return float(row.min()) / n
+
+
+def _read_wav(path):
+    with wave.open(path, "rb") as w:
+        data = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+        if w.getnchannels() > 1:
+            data = data.reshape(-1, w.getnchannels())[:, 0]
+        return data, w.getframerate()
+
+
+class WakeWordDetector:
+    def __init__(self, rate=16000, template_dir=TEMPLATE_DIR, search_s=3.0, margin=1.25):
+        """
+        Initialize the detector from recorded templates
+
+        Args:
+            rate: Sample rate of the audio that will be checked
+            template_dir: Folder of wake word recordings (*.wav)
+            search_s: Length of the windows a long utterance is searched in
+            margin: Threshold = worst template-to-template match cost * margin
+        """
+        self.rate = rate
+        self.mfcc = MFCC(rate)
+        self.window_frames = int(search_s * rate) // self.mfcc.hop
+        self.templates = []
+        self.threshold = None
+
+        # CPU accounting (this detector runs on the capture thread)
+        self.cpu_seconds = 0.0
+        self.audio_seconds = 0.0
+
+        for path in sorted(glob.glob(os.path.join(template_dir, "*.wav"))):
+            try:
+                samples, file_rate = _read_wav(path)
+            except (OSError, wave.Error) as e:
+                print(f"Wake Word Template Error ({path}): {e}")
+                continue
+            if file_rate != rate:
+                print(f"Wake Word: skipping {path} ({file_rate} Hz, expected {rate} Hz)")
+                continue
+            feats = self.mfcc(_trim_silence(samples, rate))
+            if len(feats):
+                self.templates.append(feats)
+
+        if len(self.templates) >= 2:
+            # Self-calibrate: genuine wake words should match about as well as the templates match each other
+            cross = [subsequence_dtw(a, b) for i, a in enumerate(self.templates)
+                     for j, b in enumerate(self.templates) if i != j and len(b) >= len(a) // 2]
+            self.threshold = max(cross) * margin if cross else None
+
+    @property
+    def enabled(self):
+        return self.threshold is not None
+
+    def _windows(self, count):
+        """Frame ranges covering `count` feature frames: first, last, then the ones between."""
+        # Windows overlap by the longest template, so a wake word on a boundary is whole in one
+        overlap = max((len(t) for t in self.templates), default=0)
+        size = max(self.window_frames, 2 * overlap)
+        if count <= size:
+            return [(0, count)]
+        starts = list(range(0, count - size, size - overlap)) + [count - size]
+        return [(s, s + size) for s in [starts[0], starts[-1]] + starts[1:-1]]
+
+    def score(self, samples, threshold=None):
+        """
+        Best (lowest) template match cost for an utterance
+
+        Args:
+            samples: int16 mono audio
+            threshold: Stop searching at the first window that scores this or lower
+        """
+        start = time.thread_time()
+        feats = self.mfcc(samples)
+        best = np.inf
+        for lo, hi in self._windows(len(feats)):
+            window = feats[lo:hi]
+            best = min(best, min((subsequence_dtw(t, window) for t in self.templates), default=np.inf))
+            if threshold is not None and best <= threshold:
+                break
+        self.cpu_seconds += time.thread_time() - start
+        self.audio_seconds += len(samples) / self.rate
+        return best
+
+    def detect(self, samples):
+        """True if the wake word occurs anywhere in `samples` (int16 mono)."""
+        return self.enabled and self.score(samples, self.threshold) <= self.threshold
+
+    def cpu_per_audio_second(self):
+        """CPU milliseconds spent per second of audio checked so far."""
+        if not self.audio_seconds:
+            return 0.0
+        return self.cpu_seconds * 1000.0 / self.audio_seconds
+
+
+def enroll(count=3, template_dir=TEMPLATE_DIR):
+    """Record `count` examples of the wake word from the microphone."""
+    import speech_recognition as sr
+    from voice_activity import UtteranceCapture
+
+    os.makedirs(template_dir, exist_ok=True)
+    with sr.Microphone(sample_rate=16000) as source:
+        capture = UtteranceCapture(source)
+        print("Calibrating, stay quiet...")
+        capture.calibrate(duration=1.0)
+        for n in range(count):
+            input(f"[{n + 1}/{count}] Press Enter, then say the wake word once.")
+            audio = capture.listen()
+            path = os.path.join(template_dir, f"wake_{int(time.time())}_{n}.wav")
+            with wave.open(path, "wb") as w:
+                w.setnchannels(1)
+                w.setsampwidth(audio.sample_width)
+                w.setframerate(audio.sample_rate)
+                w.writeframes(audio.get_raw_data())
+            print(f"Saved {path}")
+
+
+def test(paths, template_dir=TEMPLATE_DIR):
+    """Score recordings against the templates and report CPU cost."""
+    detector = None
+    for path in paths:
+        samples, rate = _read_wav(path)
+        if detector is None or detector.rate != rate:
+            detector = WakeWordDetector(rate, template_dir)
+            if not detector.enabled:
+                print(f"Need at least 2 {rate} Hz templates in {template_dir}/ (run: python wake_word.py enroll)")
+                return
+            print(f"{len(detector.templates)} templates, threshold {detector.threshold:.2f}")
+        cost = detector.score(samples)
+        verdict = "WAKE" if cost <= detector.threshold else "-"
+        print(f"{path}: cost {cost:.2f} {verdict}")
+    if detector is not None:
+        print(f"CPU: {detector.cpu_per_audio_second():.2f} ms per second of audio "
+              f"({detector.audio_seconds:.1f} s checked)")
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) >= 2 and sys.argv[1] == "enroll":
+        enroll(int(sys.argv[2]) if len(sys.argv) > 2 else 3)
+    elif len(sys.argv) >= 3 and sys.argv[1] == "test":
+        test(sys.argv[2:])
+    else:
+        print(__doc__)
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Canvas, useLoader } from '@react-three/fiber';
 import { OrbitControls, Stars } from '@react-three/drei';
 import { EffectComposer, Bloom, Noise, Vignette, Scanline, ToneMapping } from '@react-three/postprocessing';
@@ -48,18 +48,59 @@ class ErrorBoundary extends React.Component {
 function App() {
   const [isSpeaking, setIsSpeaking] = useState(false);
   const [facePosition, setFacePosition] = useState({ x: 0, y: 0 }); // New State
+  const [visemeTimeline, setVisemeTimeline] = useState(null); // { clip, t0, t: [ms], v: [index] }
+  // Loudness envelopes arrive as binary frames; kept in a ref so they don't re-render
+  const lipSyncRef = useRef({ clip: null, t0: 0, envelopes: new Map() });
   const [status, setStatus] = useState("Connecting...");
   const [debugInfo, setDebugInfo] = useState("");
 
   useEffect(() => {
+    // Binary layout (little endian): u8 type, u8 version, u16 frame rate,
+    // u32 clip id, u32 offset within clip (ms), u16 count, then count u8 levels
+    const handleEnvelope = (buffer) => {
+      const view = new DataView(buffer);
+      if (view.getUint8(0) !== 1) return; // Not an envelope frame
+      const rate = view.getUint16(2, true);
+      const clip = view.getUint32(4, true);
+      const offsetMs = view.getUint32(8, true);
+      const count = view.getUint16(12, true);
+      const levels = new Uint8Array(buffer, 14, count);
+
+      const envelopes = lipSyncRef.current.envelopes;
+      if (!envelopes.has(clip)) envelopes.set(clip, []);
+      envelopes.get(clip).push({ rate, offsetMs, levels });
+      // Clips that were interrupted never get a speak_stop; keep only the newest few
+      while (envelopes.size > 8) envelopes.delete(envelopes.keys().next().value);
+    };
+
     const connect = () => {
       const ws = new WebSocket('ws://localhost:8765');
+      ws.binaryType = 'arraybuffer';
       ws.onopen = () => { setStatus("Connected"); console.log("Connected"); };
       ws.onmessage = (event) => {
         try {
+          if (event.data instanceof ArrayBuffer) {
+            handleEnvelope(event.data);
+            return;
+          }
           const message = JSON.parse(event.data);
-          if (message.type === 'speak_start') setIsSpeaking(true);
-          else if (message.type === 'speak_stop') setIsSpeaking(false);
+          if (message.type === 'speak_start') {
+            lipSyncRef.current.clip = message.data?.clip ?? null;
+            lipSyncRef.current.t0 = message.data?.t ?? Date.now() / 1000;
+            setIsSpeaking(true);
+          }
+          else if (message.type === 'speak_stop') {
+            const clip = message.data?.clip;
+            lipSyncRef.current.envelopes.delete(clip);
+            if (lipSyncRef.current.clip === clip) lipSyncRef.current.clip = null;
+            // Drop the finished clip's timeline so the next clip can't replay it
+            setVisemeTimeline(timeline => (timeline && timeline.clip === clip ? null : timeline));
+            setIsSpeaking(false);
+          }
+          else if (message.type === 'visemes') {
+            // Sent just before a clip's speak_start (and again if more words arrive later)
+            setVisemeTimeline(message.data);
+          }
           else if (message.type === 'face_track') {
             // Expecting data: { x: float, y: float } (Normalized -1 to 1)
             // Smooth lerp could be done here or in component. 
@@ -220,7 +261,7 @@ function App() {
 
 
           <React.Suspense fallback={null}>
-            <SexyGirlAvatar isSpeaking={isSpeaking} setDebugInfo={setDebugInfo} facePosition={facePosition} />
+            <SexyGirlAvatar isSpeaking={isSpeaking} setDebugInfo={setDebugInfo} facePosition={facePosition} visemeTimeline={visemeTimeline} lipSyncRef={lipSyncRef} />
           </React.Suspense>
 
 
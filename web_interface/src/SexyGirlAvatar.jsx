@@ -6,7 +6,56 @@ import * as THREE from 'three';
 
 const MODEL_URL = '/models/sexy_girl/scene.gltf';
 
-export default function SexyGirlAvatar({ isSpeaking, setDebugInfo, facePosition = { x: 0, y: 0 } }) {
+// Viseme set sent by the backend (index order matches VISEMES in visemes.py)
+// open: jaw opening 0..1, narrow: rounded lips ("O"/"U") narrow the jaw
+const VISEMES = [
+    { name: 'sil', open: 0.0, narrow: false },
+    { name: 'PP', open: 0.0, narrow: false },
+    { name: 'FF', open: 0.15, narrow: false },
+    { name: 'TH', open: 0.25, narrow: false },
+    { name: 'DD', open: 0.3, narrow: false },
+    { name: 'kk', open: 0.35, narrow: false },
+    { name: 'CH', open: 0.3, narrow: true },
+    { name: 'SS', open: 0.2, narrow: false },
+    { name: 'nn', open: 0.25, narrow: false },
+    { name: 'RR', open: 0.3, narrow: true },
+    { name: 'aa', open: 0.75, narrow: false },
+    { name: 'E', open: 0.5, narrow: false },
+    { name: 'I', open: 0.4, narrow: false },
+    { name: 'O', open: 0.6, narrow: true },
+    { name: 'U', open: 0.35, narrow: true },
+];
+
+// Current viseme of a timeline { clip, t0 (seconds, epoch), t: [ms], v: [index] }, or null
+// if it isn't the playing clip's (so the loudness envelope drives the mouth instead)
+function sampleViseme(timeline, cursorRef, lipSync) {
+    if (!timeline || !timeline.t || timeline.t.length === 0) return null;
+    if (!lipSync || lipSync.clip === null || timeline.clip !== lipSync.clip) return null;
+    const elapsed = Date.now() - timeline.t0 * 1000;
+    if (elapsed < 0) return VISEMES[0];
+
+    // Timelines only move forward, so advance a cursor instead of searching
+    let i = cursorRef.current;
+    if (i >= timeline.t.length || timeline.t[i] > elapsed) i = 0;
+    while (i + 1 < timeline.t.length && timeline.t[i + 1] <= elapsed) i++;
+    cursorRef.current = i;
+    return VISEMES[timeline.v[i]] ?? VISEMES[0];
+}
+
+// Loudness (0..1) of the playing clip from the backend's RMS envelope, or null if none arrived
+function sampleEnvelope(lipSync) {
+    if (!lipSync || lipSync.clip === null) return null;
+    const segments = lipSync.envelopes.get(lipSync.clip);
+    if (!segments) return null;
+    const elapsed = Date.now() - lipSync.t0 * 1000;
+    for (const seg of segments) {
+        const i = Math.floor((elapsed - seg.offsetMs) * seg.rate / 1000);
+        if (i >= 0 && i < seg.levels.length) return seg.levels[i] / 255;
+    }
+    return 0; // Between segments or past the end
+}
+
+export default function SexyGirlAvatar({ isSpeaking, setDebugInfo, facePosition = { x: 0, y: 0 }, visemeTimeline = null, lipSyncRef = null }) {
 
     const { scene } = useGLTF(MODEL_URL);
     const { scene: hoodieScene } = useGLTF('/models/hoodie/scene.gltf');
@@ -24,6 +73,8 @@ export default function SexyGirlAvatar({ isSpeaking, setDebugInfo, facePosition
     const eyeBaseRotation = useRef({ left: new THREE.Euler(), right: new THREE.Euler() });
     const jawBaseQuaternion = useRef(new THREE.Quaternion()); // Store initial jaw rotation as quaternion
     const jawTargetQuaternion = useRef(new THREE.Quaternion()); // Target rotation for smooth interpolation
+    const visemeCursor = useRef(0);
+    const mouthOpen = useRef(0); // Smoothed viseme opening (0..1)
 
 
     // Blink State
@@ -657,8 +708,11 @@ export default function SexyGirlAvatar({ isSpeaking, setDebugInfo, facePosition
                 const jawOpen = dict['jawOpen'] ?? dict['Mouth_Open'] ?? dict['mouthOpen'] ?? dict['A'] ?? dict['aa'];
                 // 'A' or 'aa' are often used for general mouth opening in VRChat/MMD models
 
-                // Simple sine wave for talking simulation
-                const intensity = (Math.sin(t * 15) * 0.5 + 0.5) * 0.6; // 0 to 0.6 range
+                // Viseme timeline / loudness from the backend; sine wave only if neither arrived
+                const hasLipSync = sampleViseme(visemeTimeline, visemeCursor, lipSyncRef?.current) || sampleEnvelope(lipSyncRef?.current) !== null;
+                const intensity = hasLipSync
+                    ? mouthOpen.current * 0.8
+                    : (Math.sin(t * 15) * 0.5 + 0.5) * 0.6; // 0 to 0.6 range
 
                 if (jawOpen !== undefined) influences[jawOpen] = intensity;
 
@@ -669,6 +723,16 @@ export default function SexyGirlAvatar({ isSpeaking, setDebugInfo, facePosition
             }
         }
 
+        // --- VISEME SMOOTHING (shared by morphs and jaw bone) ---
+        // Shape comes from the viseme, amount from the real loudness
+        const currentViseme = isSpeaking ? sampleViseme(visemeTimeline, visemeCursor, lipSyncRef?.current) : null;
+        const loudness = isSpeaking ? sampleEnvelope(lipSyncRef?.current) : null;
+        let mouthTarget = 0;
+        if (currentViseme && loudness !== null) mouthTarget = currentViseme.open * (0.3 + 0.7 * loudness) + loudness * 0.2;
+        else if (currentViseme) mouthTarget = currentViseme.open;
+        else if (loudness !== null) mouthTarget = loudness * 0.8;
+        mouthOpen.current = THREE.MathUtils.lerp(mouthOpen.current, mouthTarget, 0.35);
+
         // --- BONE ANIMATION (Added for Jaw/Eyes/Arms) ---
         if (jawRef.current) {
             if (isSpeaking || testSpeak) {
@@ -685,6 +749,9 @@ export default function SexyGirlAvatar({ isSpeaking, setDebugInfo, facePosition
                 let wave = (s1 + s2 + s3 + s4 + 2) / 4;
                 wave = Math.max(0, Math.min(1, wave)); // Clamp to 0-1
 
+                // Real mouth shapes win over the synthetic rhythm when we have them
+                if (currentViseme || loudness !== null) wave = mouthOpen.current;
+
                 // More subtle intensity for natural movement
                 const intensity = 0.15; // Reduced from 0.18
                 const movementX = wave * intensity; // Primary jaw opening (down)
@@ -723,7 +790,7 @@ export default function SexyGirlAvatar({ isSpeaking, setDebugInfo, facePosition
                 // --- ENHANCED VISEME CYCLING ---
                 // Alternate between "Ah" (wide) and "O" (narrow) shapes
                 const shapeCycle = Math.sin(t * 2.5); // Slightly slower cycle
-                const isO_Shape = shapeCycle > 0.3;
+                const isO_Shape = currentViseme ? currentViseme.narrow : shapeCycle > 0.3;
 
                 // "O" SHAPE: Narrow jaw horizontally
                 // "Ah" SHAPE: Wide jaw (normal width)
@@ -278,10 +278,12 @@ class YOLODetector:
 
 # Global detector instance (initialized when needed)
 _detector = None
+_detector_lock = threading.Lock()
 
 def get_detector():
     """Get or create global YOLO detector instance"""
     global _detector
-    if _detector is None:
-        _detector = YOLODetector()
+    with _detector_lock: # Voice prefetch may load the model from another thread
+        if _detector is None:
+            _detector = YOLODetector()
     return _detector